@@ -0,0 +1,67 @@
+"""Benchmark single-pass discovery against the glob-based discovery.
+
+Usage
+-----
+$ python benchmarks/bench_discovery.py --files 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from synthetic import make_package, timeit
+
+from qtreload.utilities import walk_module_paths
+
+PY_PATTERN = ("**/*.py",)
+PY_IGNORE_PATTERN = ("**/__init__.py", "**/_version.py", "**/test_*.py")
+STYLESHEET_PATTERN = ("**/*.qss",)
+
+
+def glob_paths(path: Path, patterns: tuple[str, ...]) -> list[Path]:
+    """Glob-based discovery, one full tree walk per pattern."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(path.glob(pattern))
+    return list(paths)
+
+
+def glob_discovery(path: Path) -> tuple[list[Path], list[Path]]:
+    """Discovery as it was done before the single-pass walker."""
+    py_paths = glob_paths(path, PY_PATTERN)
+    ignore_paths = glob_paths(path, PY_IGNORE_PATTERN)
+    py_paths = [p for p in py_paths if p not in ignore_paths]
+    qss_paths = glob_paths(path, STYLESHEET_PATTERN)
+    return py_paths, qss_paths
+
+
+def walk_discovery(path: Path) -> tuple[list[Path], list[Path]]:
+    """Single-pass discovery."""
+    return walk_module_paths(path, PY_PATTERN, PY_IGNORE_PATTERN, STYLESHEET_PATTERN)
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10_000, help="Number of modules in the generated package.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats (best time is reported).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        package, _ = make_package(Path(tmp), "bench_pkg", args.files)
+        glob_py, glob_qss = glob_discovery(package)
+        walk_py, walk_qss = walk_discovery(package)
+        assert sorted(glob_py) == sorted(walk_py), "Python paths differ"
+        assert sorted(glob_qss) == sorted(walk_qss), "Stylesheet paths differ"
+
+        glob_time = timeit(lambda: glob_discovery(package), args.repeat)
+        walk_time = timeit(lambda: walk_discovery(package), args.repeat)
+    print(f"files={args.files} py={len(walk_py)} qss={len(walk_qss)}")
+    print(f"glob: {glob_time * 1000:.1f} ms")
+    print(f"walk: {walk_time * 1000:.1f} ms ({glob_time / walk_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark compile cost per reload with and without the code cache of `xreload`, and full against partial reloads.
+
+Usage
+-----
+$ python benchmarks/bench_reload.py --lines 4000
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import tempfile
+import time
+import tokenize
+from pathlib import Path
+
+from synthetic import make_module, timeit
+
+from qtreload.pydevd_reload import CodeCache, Reload
+
+
+def compile_uncached(path: str) -> None:
+    """Compile as `execfile` did before the code cache."""
+    with tokenize.open(path) as stream:
+        contents = stream.read()
+    compile(contents + "\n", path, "exec")
+
+
+def time_reloads(path: str, repeat: int, partial: bool) -> float:
+    """Return the best time of reloading the module after editing one method, out of `repeat` runs."""
+    spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    source = Path(path).read_text()
+    Reload(module, partial=partial).apply()
+
+    best = float("inf")
+    for index in range(repeat):
+        Path(path).write_text(source.replace("value * 2", f"value * {index + 3}", 1))
+        start = time.perf_counter()
+        Reload(module, partial=partial).apply()
+        best = min(best, time.perf_counter() - start)
+    Path(path).write_text(source)
+    return best
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=4000, help="Number of lines in the generated module.")
+    parser.add_argument("--table", type=int, default=100_000, help="Size of the lookup table built by the module.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of repeats (best time is reported).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(make_module(Path(tmp), "bench_reload_module", args.lines, args.table))
+        uncached_time = timeit(lambda: compile_uncached(path), args.repeat)
+
+        cache = CodeCache()
+        cache.get_code(path)
+        cached_time = timeit(lambda: cache.get_code(path), args.repeat)
+        pyc_time = timeit(lambda: CodeCache().get_code(path), args.repeat)
+
+        full_time = time_reloads(path, args.repeat, partial=False)
+        partial_time = time_reloads(path, args.repeat, partial=True)
+    print(f"lines={args.lines}")
+    print(f"compile: {uncached_time * 1000:.2f} ms")
+    print(f"pyc: {pyc_time * 1000:.2f} ms ({uncached_time / pyc_time:.1f}x faster)")
+    print(f"memory: {cached_time * 1000:.2f} ms ({uncached_time / cached_time:.1f}x faster)")
+    print(f"full reload after editing one method: {full_time * 1000:.2f} ms")
+    print(
+        f"partial reload after editing one method: {partial_time * 1000:.2f} ms "
+        f"({full_time / partial_time:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Configuration of the benchmark suite.
+
+Usage
+-----
+$ python -m pytest benchmarks --bench-sizes 100,1000,20000 --bench-json results.json
+
+Packages are generated in a temporary directory and Qt runs on the offscreen platform, so the suite runs offline and
+without a display. Results of every benchmark are written to `--bench-json`, so that they can be compared across
+commits.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import typing as ty
+from pathlib import Path
+
+import pytest
+from synthetic import make_package, timings
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _parse_ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add benchmark options."""
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-sizes", default="100,1000", help="Comma separated number of modules of the packages.")
+    group.addoption("--bench-depth", type=int, default=3, help="Nesting depth of subpackages.")
+    group.addoption("--bench-lines", default="1000,5000,20000", help="Comma separated lines of reloaded modules.")
+    group.addoption("--bench-repeat", type=int, default=5, help="Number of repeats of every measurement.")
+    group.addoption("--bench-json", default=None, help="Write results to this JSON file.")
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize benchmarks by package size (`n_modules`) and module size (`n_lines`)."""
+    if "n_modules" in metafunc.fixturenames:
+        metafunc.parametrize("n_modules", _parse_ints(metafunc.config.getoption("--bench-sizes")))
+    if "n_lines" in metafunc.fixturenames:
+        metafunc.parametrize("n_lines", _parse_ints(metafunc.config.getoption("--bench-lines")))
+
+
+class BenchmarkResults:
+    """Collect measurements of all benchmarks."""
+
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.results: list[dict[str, ty.Any]] = []
+
+    def add(self, name: str, times: list[float], **params: ty.Any) -> None:
+        """Add measurement (seconds) of benchmark `name`, repeated `len(times)` times."""
+        self.results.append(
+            {
+                "name": name,
+                "params": params,
+                "repeat": len(times),
+                "min": min(times),
+                "median": statistics.median(times),
+                "max": max(times),
+            }
+        )
+
+    def measure(self, name: str, func: ty.Callable[[], ty.Any], repeat: int | None = None, **params: ty.Any) -> None:
+        """Call `func` `repeat` times and add its timings."""
+        self.add(name, timings(func, repeat or self.repeat), **params)
+
+    def to_dict(self) -> dict[str, ty.Any]:
+        """Return results together with a description of the environment."""
+        from qtreload import __version__
+
+        qt_api = None
+        if "qtpy" in sys.modules:
+            qt_api = f"{sys.modules['qtpy'].API_NAME} {sys.modules['qtpy'].QT_VERSION}"
+        return {
+            "qtreload": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt": qt_api,
+            "created": time.time(),
+            "results": self.results,
+        }
+
+
+_results_key = pytest.StashKey[BenchmarkResults]()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Create results collector."""
+    config.stash[_results_key] = BenchmarkResults(config.getoption("--bench-repeat"))
+
+
+@pytest.fixture(scope="session")
+def bench(pytestconfig: pytest.Config) -> BenchmarkResults:
+    """Return results collector."""
+    return pytestconfig.stash[_results_key]
+
+
+@pytest.fixture(scope="session")
+def depth(pytestconfig: pytest.Config) -> int:
+    """Return nesting depth of the generated packages."""
+    return pytestconfig.getoption("--bench-depth")
+
+
+@pytest.fixture(scope="session")
+def _packages(
+    tmp_path_factory: pytest.TempPathFactory, depth: int
+) -> ty.Callable[[int], tuple[Path, Path, list[Path]]]:
+    """Return generated packages by number of modules, so that every size is only generated once per session."""
+    packages: dict[int, tuple[Path, Path, list[Path]]] = {}
+
+    def _make(n_modules: int) -> tuple[Path, Path, list[Path]]:
+        if n_modules not in packages:
+            root = tmp_path_factory.mktemp(f"packages_{n_modules}")
+            packages[n_modules] = (root, *make_package(root, f"bench_pkg_{n_modules}", n_modules, depth=depth))
+        return packages[n_modules]
+
+    return _make
+
+
+@pytest.fixture
+def synthetic_package(
+    _packages: ty.Callable, n_modules: int, monkeypatch: pytest.MonkeyPatch
+) -> ty.Iterator[tuple[str, Path, list[Path]]]:
+    """Return name, directory and module paths of a generated package of `n_modules` modules, importable by name."""
+    root, package, paths = _packages(n_modules)
+    monkeypatch.syspath_prepend(str(root))
+    yield package.name, package, paths
+    _unload(root)
+
+
+@pytest.fixture
+def import_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ty.Iterator[Path]:
+    """Return directory that is on `sys.path`, removing modules imported from it afterwards."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    _unload(tmp_path)
+
+
+def _unload(root: Path) -> None:
+    """Remove modules imported from `root` from `sys.modules`."""
+    for name, module in list(sys.modules.items()):
+        if str(getattr(module, "__file__", None) or "").startswith(str(root)):
+            del sys.modules[name]
+
+
+def pytest_terminal_summary(terminalreporter: ty.Any, config: pytest.Config) -> None:
+    """Print results and write them to `--bench-json`."""
+    results = config.stash[_results_key]
+    if not results.results:
+        return
+    terminalreporter.section("benchmarks")
+    for result in results.results:
+        params = ", ".join(f"{key}={value}" for key, value in result["params"].items())
+        terminalreporter.write_line(
+            f"{result['name']:<24} {params:<40} min={result['min'] * 1000:10.2f} ms"
+            f" median={result['median'] * 1000:10.2f} ms"
+        )
+    path = config.getoption("--bench-json")
+    if path:
+        Path(path).write_text(json.dumps(results.to_dict(), indent=2))
+        terminalreporter.write_line(f"Results written to '{path}'")
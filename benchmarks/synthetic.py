@@ -0,0 +1,110 @@
+"""Generate synthetic packages resembling Qt applications and time calls, used by the benchmark suite and scripts."""
+
+from __future__ import annotations
+
+import time
+import typing as ty
+from pathlib import Path
+
+METHOD = '''
+    def on_action_{index}(self, value: int = {index}) -> None:
+        """Handle action {index}."""
+        if value > {index}:
+            self.values.append(value * 2)
+        else:
+            self.values.extend([value, value + 1, value + 2])
+        self.label.setText(f"Action {index}: {{value}}")
+'''
+
+CLASS = '''
+
+class Widget{index}:
+    """Widget {index}."""
+
+    def __init__(self) -> None:
+        self.values: list[int] = []
+        self.label = None
+'''
+
+STYLESHEET = """QWidget#widget{index} {{
+    background-color: #{index:06x};
+    border: 1px solid #000000;
+}}
+"""
+
+
+def make_source(n_classes: int = 2, n_methods: int = 5) -> str:
+    """Return source of a module with `n_classes` classes of `n_methods` methods each."""
+    parts = ['"""Synthetic module."""', "", "CONSTANT = 1"]
+    for class_index in range(n_classes):
+        parts.append(CLASS.format(index=class_index))
+        parts.extend(METHOD.format(index=index) for index in range(n_methods))
+    return "\n".join(parts)
+
+
+def make_package(
+    root: Path,
+    name: str,
+    n_modules: int,
+    depth: int = 3,
+    per_directory: int = 20,
+    n_classes: int = 2,
+    n_methods: int = 5,
+    qss_every: int = 10,
+) -> tuple[Path, list[Path]]:
+    """Generate package `name` with `n_modules` modules spread over subpackages nested `depth` levels deep.
+
+    Every directory holds `per_directory` modules (more, once all `10 ** depth` directories are used) and every
+    `qss_every`-th module comes with a stylesheet. Returns the package directory and the paths of all modules.
+    """
+    package = root / name
+    source = make_source(n_classes, n_methods)
+    paths = []
+    for index in range(n_modules):
+        directory_index = index // per_directory
+        if depth:
+            directory = package.joinpath(*(f"sub{part}" for part in str(directory_index).zfill(depth)[-depth:]))
+        else:
+            directory = package
+        if index % per_directory == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+            parent = package
+            for part in ("", *directory.relative_to(package).parts):
+                parent = parent / part
+                init = parent / "__init__.py"
+                if not init.exists():
+                    init.write_text("")
+        path = directory / f"module_{index}.py"
+        path.write_text(source)
+        paths.append(path)
+        if qss_every and index % qss_every == 0:
+            (directory / f"style_{index}.qss").write_text(STYLESHEET.format(index=index))
+    return package, paths
+
+
+def make_module(root: Path, name: str, n_lines: int, table_size: int = 0) -> Path:
+    """Generate module `name` of (roughly) `n_lines` lines with a single class, optionally building a lookup table."""
+    lines = [f"TABLE = {{str(i): i for i in range({table_size})}}"] if table_size else []
+    lines.extend(CLASS.format(index=0).splitlines())
+    index = 0
+    while len(lines) < n_lines:
+        lines.extend(METHOD.format(index=index).splitlines())
+        index += 1
+    path = root / f"{name}.py"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def timings(func: ty.Callable[[], ty.Any], repeat: int) -> list[float]:
+    """Call `func` `repeat` times and return the time (seconds) of every call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def timeit(func: ty.Callable[[], ty.Any], repeat: int) -> float:
+    """Return the best time (seconds) of calling `func` `repeat` times."""
+    return min(timings(func, repeat))
@@ -0,0 +1,133 @@
+"""Benchmarks of discovery, watching and reloading on generated packages (see `conftest.py` for usage)."""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import time
+from pathlib import Path
+
+from synthetic import make_module
+
+from qtreload.pydevd_reload import Reload, xreload
+from qtreload.utilities import get_module_paths
+
+
+def _module_name(root: Path, path: Path) -> str:
+    """Return dotted name of the module at path."""
+    return ".".join(path.relative_to(root).with_suffix("").parts)
+
+
+def _wait_discovery(qtbot, obj, func) -> None:
+    """Call `func` and wait until discovery started by it finished."""
+    with qtbot.waitSignal(obj.evt_discovery_finished, timeout=600_000):
+        func()
+
+
+def test_get_module_paths(bench, synthetic_package, n_modules, depth):
+    """Benchmark discovery of the files of a package."""
+    name, _, paths = synthetic_package
+    py_paths, qss_paths = get_module_paths(name)
+    assert len(py_paths) == len(paths)
+    assert qss_paths
+    bench.measure("get_module_paths", lambda: get_module_paths(name), n_modules=n_modules, depth=depth)
+
+
+def test_widget_construction(bench, qtbot, synthetic_package, n_modules, depth):
+    """Benchmark construction of the widget, with and without waiting for the discovery it starts."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    name, _, paths = synthetic_package
+    construct, discover = [], []
+    for _ in range(bench.repeat):
+        start = time.perf_counter()
+        widget = QtReloadWidget([name], auto_connect=False)
+        qtbot.addWidget(widget)
+        construct.append(time.perf_counter() - start)
+        _wait_discovery(qtbot, widget, widget.setup_paths)
+        discover.append(time.perf_counter() - start)
+        assert widget._files_model.rowCount() == len(widget.engine.files)
+        widget.close()
+    assert len(widget.engine.path_to_module_map) >= len(paths)
+    bench.add("widget_construction", construct, n_modules=n_modules, depth=depth)
+    bench.add("widget_discovery", discover, n_modules=n_modules, depth=depth)
+
+
+def test_setup_paths(bench, qtbot, synthetic_package, n_modules, depth):
+    """Benchmark discovery through `setup_paths` of the engine, from scratch and when nothing changed."""
+    from qtreload.engine import ReloadEngine
+
+    name, _, paths = synthetic_package
+    engine = ReloadEngine([name], auto_connect=False)
+    bench.measure(
+        "setup_paths",
+        lambda: _wait_discovery(qtbot, engine, lambda: engine.setup_paths(clear=True)),
+        n_modules=n_modules,
+        depth=depth,
+    )
+    assert len(engine.path_to_module_map) >= len(paths)
+    bench.measure(
+        "setup_paths_unchanged",
+        lambda: _wait_discovery(qtbot, engine, engine.refresh),
+        n_modules=n_modules,
+        depth=depth,
+    )
+
+
+def test_edit_to_reload(bench, qtbot, synthetic_package, n_modules, depth):
+    """Benchmark time from saving a changed file until its module was reloaded."""
+    from qtreload.engine import ReloadEngine
+
+    name, package, paths = synthetic_package
+    path = paths[len(paths) // 2]
+    module = importlib.import_module(_module_name(package.parent, path))
+    source = path.read_text()
+
+    # a short quiet window, so that a file that is truncated and written in two steps is reloaded once
+    reload_delay = 20
+    engine = ReloadEngine([name], auto_connect=False, reload_delay=reload_delay)
+    _wait_discovery(qtbot, engine, engine.setup_paths)
+    reloaded = []
+    engine.evt_pyfile.connect(lambda *args: reloaded.append(time.perf_counter()))
+
+    times = []
+    for index in range(bench.repeat):
+        with qtbot.waitSignal(engine.evt_pyfile, timeout=10_000):
+            start = time.perf_counter()
+            path.write_text(source.replace("value * 2", f"value * {index + 3}", 1))
+        times.append(reloaded[-1] - start)
+        assert f"value * {index + 3}" in inspect.getsource(module.Widget0.on_action_0)
+        # let the watcher settle before the next edit
+        qtbot.wait(50)
+    with qtbot.waitSignal(engine.evt_pyfile, timeout=10_000):
+        path.write_text(source)
+    engine.remove_modules([name])
+    bench.add(
+        "edit_to_reload",
+        times,
+        n_modules=n_modules,
+        depth=depth,
+        watcher=engine.watcher_backend,
+        reload_delay=reload_delay,
+    )
+
+
+def test_xreload(bench, import_path, n_lines):
+    """Benchmark full and partial reloads of a module after one of its methods changed."""
+    path = make_module(import_path, f"bench_module_{n_lines}", n_lines)
+    module = importlib.import_module(path.stem)
+    source = path.read_text()
+
+    for partial in (False, True):
+        # the first reload of every module is always a full one
+        Reload(module, partial=partial).apply()
+        times, reports = [], []
+        for index in range(bench.repeat):
+            path.write_text(source.replace("value * 2", f"value * {index + 3}", 1))
+            start = time.perf_counter()
+            reports.append(xreload(module, partial=partial, report=True))
+            times.append(time.perf_counter() - start)
+        path.write_text(source)
+        assert all(report.ok for report in reports)
+        assert all(report.partial == partial for report in reports)
+        bench.add("xreload_partial" if partial else "xreload", times, n_lines=n_lines)
@@ -1,15 +1,52 @@
-"""Qt utilities to enable hot-reloading of python/Qt code."""
+"""Qt utilities to enable hot-reloading of python/Qt code.
 
-from importlib.metadata import PackageNotFoundError, version
+Attributes are imported on first access (PEP 562), so that importing `qtreload` and calling `install_hot_reload` while
+hot-reload is disabled does not import Qt or any of the reload machinery.
+"""
 
-from qtreload.install import install_hot_reload
-from qtreload.qt_reload import QtDevPopup, QtReloadWidget
+from __future__ import annotations
 
-try:
-    __version__ = version("qtreload")
-except PackageNotFoundError:
-    __version__ = "uninstalled"
+# `typing` is not imported either, it takes longer to import than the rest of this module
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from qtreload.engine import ReloadEngine
+    from qtreload.install import install_hot_reload
+    from qtreload.qt_reload import QtDevPopup, QtReloadWidget
 
 __author__ = "Lukasz G. Migas"
 __email__ = "lukas.migas@yahoo.com"
-__all__ = ["QtDevPopup", "QtReloadWidget", "install_hot_reload"]
+__all__ = ["QtDevPopup", "QtReloadWidget", "ReloadEngine", "install_hot_reload"]
+
+# attribute -> module it is imported from
+_LAZY_ATTRIBUTES = {
+    "QtDevPopup": "qtreload.qt_reload",
+    "QtReloadWidget": "qtreload.qt_reload",
+    "ReloadEngine": "qtreload.engine",
+    "install_hot_reload": "qtreload.install",
+}
+
+
+def _get_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("qtreload")
+    except PackageNotFoundError:
+        return "uninstalled"
+
+
+def __getattr__(name: str) -> object:
+    if name == "__version__":
+        value = _get_version()
+    elif name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), "__version__", *_LAZY_ATTRIBUTES])
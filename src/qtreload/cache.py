@@ -0,0 +1,210 @@
+"""Persistent caches of directory listings and module imports used during discovery."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import typing as ty
+from contextlib import suppress
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+try:
+    CACHE_VERSION = version("qtreload")
+except PackageNotFoundError:
+    CACHE_VERSION = "uninstalled"
+
+# directories modified less than two seconds before the scan are not trusted, since another change within the
+# same timestamp tick would go unnoticed
+RACY_INTERVAL_NS = 2_000_000_000
+
+
+def get_cache_dir() -> Path:
+    """Return the user cache directory for qtreload.
+
+    The location can be overridden with the `QTRELOAD_CACHE_DIR` environment variable.
+    """
+    cache_dir = os.environ.get("QTRELOAD_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+        return base / "qtreload" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "qtreload"
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "qtreload"
+
+
+def _cache_path(cache_dir: Path | None, prefix: str, root: str) -> Path:
+    """Return path of the cache file of a module root."""
+    cache_dir = cache_dir or get_cache_dir()
+    digest = hashlib.sha1(root.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
+    return cache_dir / f"{prefix}-{digest}.json"
+
+
+def _write_json(path: Path, data: dict) -> bool:
+    """Atomically write data to path, returning False if it could not be written."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        with suppress(OSError):
+            os.unlink(tmp_path)
+        return False
+    return True
+
+
+def _read_json(path: Path) -> ty.Any:
+    """Read data from path, returning None if it is missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class DiscoveryCache:
+    """On-disk cache of directory listings for a single module root.
+
+    Each directory is stored with its modification time, and its listing is reused for as long as the modification
+    time does not change. A different qtreload version or different discovery patterns invalidate the whole cache.
+    """
+
+    def __init__(self, root: Path, patterns: ty.Sequence[ty.Sequence[str]], cache_dir: Path | None = None):
+        self.root = str(root)
+        self.patterns = [list(pattern) for pattern in patterns]
+        self.path = _cache_path(cache_dir, "discovery", self.root)
+        self.directories: dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self._visited: set[str] = set()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, root: Path, patterns: ty.Sequence[ty.Sequence[str]], cache_dir: Path | None = None) -> DiscoveryCache:
+        """Load cache from disk, starting empty if the file is missing, unreadable or stale."""
+        cache = cls(root, patterns, cache_dir)
+        data = _read_json(cache.path)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CACHE_VERSION
+            and data.get("root") == cache.root
+            and data.get("patterns") == cache.patterns
+            and isinstance(data.get("directories"), dict)
+        ):
+            cache.directories = data["directories"]
+        return cache
+
+    def listdir(
+        self, directory: str, relative: str, scan_func: ty.Callable[[str], tuple[list[str], list[str]]]
+    ) -> tuple[list[str], list[str]]:
+        """Return `(files, directories)` for a directory, only calling `scan_func` if it changed."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return [], []
+        self._visited.add(relative)
+        entry = self.directories.get(relative)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        self.misses += 1
+        files, directories = scan_func(directory)
+        if time.time_ns() - mtime > RACY_INTERVAL_NS:
+            self.directories[relative] = [mtime, files, directories]
+        else:
+            self.directories.pop(relative, None)
+        self._dirty = True
+        return files, directories
+
+    def save(self) -> None:
+        """Write cache to disk, dropping directories that were not visited during the last walk."""
+        stale = set(self.directories) - self._visited
+        for relative in stale:
+            del self.directories[relative]
+        if not self._dirty and not stale:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "root": self.root,
+            "patterns": self.patterns,
+            "directories": self.directories,
+        }
+        if _write_json(self.path, data):
+            self._dirty = False
+
+
+class ImportCache:
+    """On-disk cache of the modules imported by the python files of a single module root.
+
+    Each file is stored with its modification time and size, and its imports are reused for as long as neither
+    changes, so that the import graph of a large tree can be rebuilt without parsing every file.
+    """
+
+    def __init__(self, root: Path, cache_dir: Path | None = None):
+        self.root = str(root)
+        self.path = _cache_path(cache_dir, "imports", self.root)
+        self.files: dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self._visited: set[str] = set()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, root: Path, cache_dir: Path | None = None) -> ImportCache:
+        """Load cache from disk, starting empty if the file is missing, unreadable or stale."""
+        cache = cls(root, cache_dir)
+        data = _read_json(cache.path)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CACHE_VERSION
+            and data.get("root") == cache.root
+            and isinstance(data.get("files"), dict)
+        ):
+            cache.files = data["files"]
+        return cache
+
+    def get_imports(self, path: str, parse_func: ty.Callable[[str], list[str]]) -> list[str]:
+        """Return imports of a file, only calling `parse_func` if it changed."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+        relative = os.path.relpath(path, self.root)
+        self._visited.add(relative)
+        entry = self.files.get(relative)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.hits += 1
+            imports: list[str] = entry[2]
+            return imports
+
+        self.misses += 1
+        imports = parse_func(path)
+        if time.time_ns() - stat.st_mtime_ns > RACY_INTERVAL_NS:
+            self.files[relative] = [stat.st_mtime_ns, stat.st_size, imports]
+        else:
+            self.files.pop(relative, None)
+        self._dirty = True
+        return imports
+
+    def save(self) -> None:
+        """Write cache to disk, dropping files that were not visited since the cache was loaded."""
+        stale = set(self.files) - self._visited
+        for relative in stale:
+            del self.files[relative]
+        if not self._dirty and not stale:
+            return
+        data = {"version": CACHE_VERSION, "root": self.root, "files": self.files}
+        if _write_json(self.path, data):
+            self._dirty = False
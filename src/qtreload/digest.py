@@ -0,0 +1,78 @@
+"""Content digests of watched files."""
+
+from __future__ import annotations
+
+import hashlib
+import typing as ty
+
+
+def data_digest(data: bytes) -> bytes:
+    """Return digest of (already read) file contents."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def read_file(path: str) -> bytes | None:
+    """Return file contents, or None if the file cannot be read."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def file_digest(path: str) -> bytes | None:
+    """Return digest of the file contents, or None if the file cannot be read."""
+    data = read_file(path)
+    return None if data is None else data_digest(data)
+
+
+class DigestCache:
+    """Content digest of every watched file.
+
+    Editors, formatters and `git checkout` often touch files without changing their contents. Comparing the digest of
+    a changed file with the one from its last reload (or discovery) lets such no-op changes be skipped.
+    """
+
+    def __init__(self) -> None:
+        self._digests: dict[str, bytes] = {}
+        # number of changes that were skipped because the contents did not change
+        self.skipped = 0
+
+    def __contains__(self, path: str) -> bool:
+        """Return True if the digest of path is known."""
+        return path in self._digests
+
+    def __len__(self) -> int:
+        """Return number of files with a known digest."""
+        return len(self._digests)
+
+    def update(self, digests: ty.Mapping[str, bytes | None]) -> None:
+        """Set digests of several files, e.g. computed during discovery."""
+        for path, digest in digests.items():
+            self.set(path, digest)
+
+    def set(self, path: str, digest: bytes | None) -> None:
+        """Set digest of a file, forgetting it if it is unknown."""
+        if digest is None:
+            self._digests.pop(path, None)
+        else:
+            self._digests[path] = digest
+
+    def get(self, path: str) -> bytes | None:
+        """Return cached digest of a file."""
+        return self._digests.get(path)
+
+    def discard(self, path: str) -> None:
+        """Forget file."""
+        self._digests.pop(path, None)
+
+    def check(self, path: str) -> tuple[bool, bytes | None]:
+        """Return whether the contents of a file differ from its cached digest, together with the current digest.
+
+        Files without a cached digest, or that cannot be read, are always considered changed. The cache is not updated,
+        call `set` once the change was handled.
+        """
+        digest = file_digest(path)
+        if digest is None:
+            return True, None
+        return self._digests.get(path) != digest, digest
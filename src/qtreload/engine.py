@@ -0,0 +1,944 @@
+"""Headless hot-reload engine."""
+
+from __future__ import annotations
+
+import importlib
+import itertools
+import os
+import sys
+import time
+import typing as ty
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from logging import getLogger
+from pathlib import Path
+
+from qtpy.QtCore import QObject, Signal  # type: ignore[attr-defined]
+
+from qtreload.digest import DigestCache, data_digest, file_digest, read_file
+from qtreload.imports import ImportGraph, get_imports_for_paths, parse_file_imports, parse_imports
+from qtreload.log import LogRecord
+from qtreload.pydevd_reload import Reload, code_cache, remember_source
+from qtreload.scheduler import ReloadScheduler
+from qtreload.utilities import (
+    PRUNE_PATTERN,
+    PatternSet,
+    compile_prune_pattern,
+    get_module_name,
+    get_module_package,
+    get_module_paths_for_path,
+    get_module_roots,
+    is_pruned,
+    path_to_module,
+)
+from qtreload.watcher import WATCHER_BACKENDS, DirectoryWatcher, QtFileWatcher, WatcherBackend, create_watcher
+
+logger = getLogger(__name__)
+
+PY_PATTERN = ("**/*.py",)
+PY_IGNORE_PATTERN = (
+    "**/__init__.py",
+    "**/_version.py",
+    "**/test_*.py",
+)
+STYLESHEET_PATTERN = ("**/*.qss",)
+WATCH_MODES = ("files", "directories")
+
+
+class _DiscoveryRelay(QObject):
+    """Deliver discovery results from worker threads to the GUI thread.
+
+    Worker threads only ever reference this (application-lifetime) object and never the engines themselves, otherwise
+    the last reference to an engine could be dropped, and the engine destroyed, outside of the GUI thread.
+    """
+
+    evt_discovered = Signal(object)
+
+
+_discovery_relay: _DiscoveryRelay | None = None
+_discovery_pool: ThreadPoolExecutor | None = None
+# every discovery run gets a unique generation so that stale results can be ignored
+_discovery_generations = itertools.count(1)
+
+
+def _get_discovery_relay() -> _DiscoveryRelay:
+    """Get relay object, creating it on first use (must be called from the GUI thread)."""
+    global _discovery_relay
+    if _discovery_relay is None:
+        _discovery_relay = _DiscoveryRelay()
+    return _discovery_relay
+
+
+def _get_discovery_pool() -> ThreadPoolExecutor:
+    """Get thread pool used for discovery."""
+    global _discovery_pool
+    if _discovery_pool is None:
+        _discovery_pool = ThreadPoolExecutor(thread_name_prefix="qtreload-discovery")
+    return _discovery_pool
+
+
+def _log_worker_error(future: Future) -> None:
+    """Log the error a worker raised, which would otherwise only be stored in its future."""
+    error = future.exception()
+    if error is not None:
+        logger.error("Error in worker thread", exc_info=error)
+
+
+def _discover_module(
+    relay: _DiscoveryRelay,
+    generation: int,
+    index: int,
+    module: str,
+    package: str,
+    module_path: Path,
+    options: tuple,
+    known_paths: frozenset[str],
+) -> None:
+    """Discover files for a single module (runs in a worker thread).
+
+    Python files are named relative to `package`, see `get_module_package`.
+
+    If `skip_unchanged` is set, the digest of every new file is computed here too, so that later changes can be
+    compared against the contents the files had when they were discovered. Files in `known_paths` are already watched
+    and keep the digest of their last reload, so they are not read again. If `reload_dependents` is set, the imports of
+    every python file are parsed as well. If `partial_reload` is set, the contents of new files of already imported
+    modules are returned too (by the `__file__` of the module), as the source the first partial reload compares with.
+    """
+    (
+        py_pattern,
+        ignore_py_pattern,
+        stylesheet_pattern,
+        prune_pattern,
+        use_gitignore,
+        use_cache,
+        skip_unchanged,
+        reload_dependents,
+        partial_reload,
+    ) = options
+    messages: list[str] = []
+    paths: dict[str, str | None] = {}
+    digests: dict[str, bytes | None] = {}
+    sources: dict[str, bytes] = {}
+    imports: dict[str, list[str]] = {}
+    try:
+        py_paths, qss_paths = get_module_paths_for_path(
+            module_path,
+            py_pattern=py_pattern,
+            ignore_py_pattern=ignore_py_pattern,
+            stylesheet_pattern=stylesheet_pattern,
+            log_func=messages.append,
+            use_cache=use_cache,
+            prune_pattern=prune_pattern,
+            use_gitignore=use_gitignore,
+        )
+        messages.append(f"Found {len(py_paths)} python files and {len(qss_paths)} qss files '{module}'")
+        paths = {str(p): get_module_name(package, module_path, str(p)) for p in py_paths}
+        paths.update((str(p), None) for p in qss_paths)
+        new_paths = [path for path in paths if path not in known_paths]
+        read: dict[str, bytes] = {}
+        if partial_reload:
+            for path in new_paths:
+                filename = getattr(sys.modules.get(paths[path] or ""), "__file__", None)
+                if filename and (filename == path or os.path.realpath(filename) == os.path.realpath(path)):
+                    source = read_file(path)
+                    if source is not None:
+                        read[path] = sources[filename] = source
+        if skip_unchanged:
+            digests = {path: data_digest(read[path]) if path in read else file_digest(path) for path in new_paths}
+        if reload_dependents:
+            imports = get_imports_for_paths(paths, module_path, use_cache)
+    except (ImportError, ValueError, OSError) as e:
+        messages.append(f"Failed to discover files for '{module}' Error={e}...")
+        paths = {}
+    finally:
+        # other errors propagate (see `_log_worker_error`), but discovery of the module still finishes
+        with suppress(RuntimeError):
+            relay.evt_discovered.emit((generation, index, module_path, paths, digests, sources, imports, messages))
+
+
+class _ReloadRelay(QObject):
+    """Deliver changed files that were read and compiled in a worker thread to the GUI thread."""
+
+    evt_prepared = Signal(object)
+
+
+_reload_relay: _ReloadRelay | None = None
+_reload_pool: ThreadPoolExecutor | None = None
+# every engine gets a unique token, so that it only handles its own batches
+_reload_tokens = itertools.count(1)
+
+
+def _get_reload_relay() -> _ReloadRelay:
+    """Get relay object, creating it on first use (must be called from the GUI thread)."""
+    global _reload_relay
+    if _reload_relay is None:
+        _reload_relay = _ReloadRelay()
+    return _reload_relay
+
+
+def _get_reload_pool() -> ThreadPoolExecutor:
+    """Get thread pool used to prepare reloads (a single thread, so batches are prepared in the order they arrive)."""
+    global _reload_pool
+    if _reload_pool is None:
+        _reload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qtreload-compile")
+    return _reload_pool
+
+
+def _prepare_reload(
+    relay: _ReloadRelay,
+    token: int,
+    paths: list[str],
+    digests: dict[str, bytes | None] | None,
+    names: dict[str, str | None] | None,
+    cascade: bool,
+    dependents: bool,
+) -> None:
+    """Read and compile a batch of changed files (runs in a worker thread).
+
+    Compiled code is put in the code cache of `xreload`, so that the GUI thread only has to execute the module and
+    update it in place, and syntax errors are found before the GUI thread ever touches the file. Files whose digest
+    matches the one in `digests` did not change and are not compiled; without `digests`, every file is. If module
+    names are given in `names`, the imports of python files are parsed as well.
+    """
+    begin = time.perf_counter()
+    prepared = []
+    for path in paths:
+        source = digest = error = imports = None
+        changed = True
+        timings = {}
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                source = f.read()
+        except OSError as e:
+            error = str(e)
+        else:
+            digest = data_digest(source)
+            changed = digests is None or digests.get(path) != digest
+            timings["read"] = time.perf_counter() - start
+            if changed and path.endswith(".py"):
+                start = time.perf_counter()
+                try:
+                    code_cache.get_code(path, source)
+                except (SyntaxError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                timings["compile"] = time.perf_counter() - start
+                name = names.get(path) if names is not None else None
+                if error is None and name is not None:
+                    imports = parse_imports(source, name, is_package=Path(path).name == "__init__.py")
+        prepared.append((path, (changed, source, digest, error, imports, timings)))
+    with suppress(RuntimeError):
+        relay.evt_prepared.emit((token, prepared, cascade, dependents, time.perf_counter() - begin))
+
+
+class ReloadEngine(QObject):
+    """Discover, watch and reload the files of a list of modules, without any user interface.
+
+    The engine owns the file watcher, the module list and patterns, the index of watched files and the reload
+    scheduler. Messages are passed to `log_func` and emitted through `evt_message` (as `LogRecord`), and changes to
+    the watched files through `evt_files_changed`, so that views such as `QtReloadWidget` can display them.
+    """
+
+    # name of the reloaded module and its `ReloadReport`
+    evt_pyfile = Signal(str, object)
+    evt_stylesheet = Signal()
+    evt_discovery_finished = Signal()
+    # added and removed paths
+    evt_files_changed = Signal(list, list)
+    evt_modules_changed = Signal()
+    # number of files in a reloaded batch and the time (seconds) spent preparing and reloading them
+    evt_reload_finished = Signal(int, float)
+    evt_message = Signal(object)
+
+    def __init__(
+        self,
+        modules: ty.Iterable[str],
+        parent: QObject | None = None,
+        auto_connect: bool = True,
+        py_pattern: tuple[str, ...] = PY_PATTERN,
+        ignore_py_pattern: tuple[str, ...] = PY_IGNORE_PATTERN,
+        stylesheet_pattern: tuple[str, ...] = STYLESHEET_PATTERN,
+        log_func: ty.Callable[[LogRecord], None] | None = None,
+        use_cache: bool = False,
+        watch_mode: ty.Literal["files", "directories"] = "files",
+        prune_pattern: tuple[str, ...] = PRUNE_PATTERN,
+        use_gitignore: bool = False,
+        watcher_backend: ty.Literal["qt", "inotify", "polling"] = "qt",
+        skip_unchanged: bool = True,
+        reload_delay: int = 500,
+        reload_max_wait: int = 5000,
+        reload_dependents: bool = False,
+        partial_reload: bool = False,
+    ) -> None:
+        super().__init__(parent)
+        if watch_mode not in WATCH_MODES:
+            raise ValueError(f"Invalid watch mode '{watch_mode}'. Expected one of {WATCH_MODES}.")
+        if watcher_backend not in WATCHER_BACKENDS:
+            raise ValueError(f"Invalid watcher backend '{watcher_backend}'. Expected one of {WATCHER_BACKENDS}.")
+
+        if log_func is None:
+
+            def log_func(_: LogRecord) -> None:
+                return None
+
+        self.log_func = log_func
+        # pattern information
+        self.py_pattern = py_pattern
+        self.ignore_py_pattern = ignore_py_pattern
+        self.stylesheet_pattern = stylesheet_pattern
+        self.prune_pattern = prune_pattern
+        self.use_gitignore = use_gitignore
+        self.use_cache = use_cache
+        # digest of every watched file, used to skip reloads of files whose contents did not change
+        self.skip_unchanged = skip_unchanged
+        self.digest_cache = DigestCache()
+        # changed files are collected until no change arrived for `reload_delay` ms (or for at most `reload_max_wait` ms
+        # after the first change) and then reloaded together
+        self.reload_scheduler = ReloadScheduler(
+            self._reload_files, reload_delay, self._get_reload_order, self, max_wait=reload_max_wait
+        )
+        # changed files are read and compiled in a worker thread before they are reloaded on the GUI thread
+        self._reload_token = next(_reload_tokens)
+        self._reload_pending = 0
+        self.last_reload_duration = 0.0
+        _get_reload_relay().evt_prepared.connect(self._on_reload_prepared)
+        # modules that bind names from a changed module (`from x import y`) are reloaded after it
+        self.reload_dependents = reload_dependents
+        self.import_graph = ImportGraph()
+        # only replace code of changed functions when nothing else in a module changed
+        self.partial_reload = partial_reload
+
+        # discovery state
+        self._discovery_generation = 0
+        self._discovery_pending = 0
+        self._discovery_added = 0
+        self._discovery_removed = 0
+        # directories scanned so far and their files, for modules split across several directories
+        self._discovery_partial: dict[int, tuple[set[Path], dict[str, str | None]]] = {}
+        # files discovered for each module, and the modules each path belongs to (modules can overlap)
+        self._module_files: dict[str, set[str]] = {}
+        self._path_owners: dict[str, list[str]] = {}
+        self._indexed_modules: list[str] = []
+        _get_discovery_relay().evt_discovered.connect(self._on_module_discovered)
+
+        # setup file watcher
+        self.watch_mode = watch_mode
+        self.watcher_backend = watcher_backend
+        self._accept_patterns: tuple[tuple, tuple[PatternSet, PatternSet, PatternSet, PatternSet]] | None = None
+        self._watcher: DirectoryWatcher | WatcherBackend
+        if watch_mode == "directories":
+            self._watcher = DirectoryWatcher(
+                accept=self._accept_new_file, accept_directory=self._accept_new_directory, backend=watcher_backend
+            )
+            self._watcher.fileAdded.connect(self._on_file_added)
+            self._watcher.fileRemoved.connect(self._on_file_removed)
+        else:
+            self._watcher = create_watcher(watcher_backend)
+            if isinstance(self._watcher, QtFileWatcher):
+                self._watcher.fileRewatched.connect(self._on_file_rewatched)
+        self._connected = False
+
+        # setup modules
+        self._modules: list[str] = []
+        # every module has one or more directories (namespace packages can be split across several)
+        self._module_paths: list[tuple[Path, ...]] = []
+        self._set_modules(modules)
+        self.path_to_index_map: dict[str, int] = {}
+        # path -> (dotted module name, module directory), built during discovery so that reloads are a dict lookup
+        self.path_to_module_map: dict[str, tuple[str | None, Path]] = {}
+        if self._module_paths and auto_connect:
+            self.setup_paths()
+
+    @property
+    def modules(self) -> list[str]:
+        """Return watched modules."""
+        return list(self._modules)
+
+    @property
+    def files(self) -> list[str]:
+        """Return watched files."""
+        return list(self._path_owners)
+
+    def _set_modules(self, modules: ty.Iterable[str]) -> None:
+        """Set watched modules, skipping duplicates and modules that cannot be found."""
+        deduplicated_modules: list[str] = []
+        deduplicated_paths: list[tuple[Path, ...]] = []
+        for module in modules:
+            if module in deduplicated_modules:
+                continue
+            roots = get_module_roots(module)
+            if not roots:
+                self.log_message(f"Could not find path for the module '{module}'")
+                continue
+            deduplicated_modules.append(module)
+            deduplicated_paths.append(roots)
+            self._log_watching(module, roots)
+        self._modules = deduplicated_modules
+        self._module_paths = deduplicated_paths
+        self.evt_modules_changed.emit()
+
+    def replace_modules(self, modules: ty.Iterable[str]) -> None:
+        """Replace the watched module list and refresh watched paths."""
+        self._set_modules(modules)
+        self.refresh()
+
+    def add_module(self, module: str) -> bool:
+        """Add module to the watched modules, returning True if it was added."""
+        if not module:
+            self.log_message(f"The specified module '{module}' does not exist.")
+            return False
+        if module in self._modules:
+            self.log_message(f"The module '{module}' is already in the list.")
+            return False
+        roots = get_module_roots(module)
+        if not roots:
+            self.log_message(f"Could not find path for the module '{module}'")
+            return False
+        self._log_watching(module, roots)
+        self._modules.append(module)
+        self._module_paths.append(roots)
+        self.evt_modules_changed.emit()
+        self.refresh()
+        return True
+
+    def remove_modules(self, modules: ty.Iterable[str]) -> None:
+        """Remove modules from the watched modules."""
+        modules = set(modules)
+        keep = [index for index, module in enumerate(self._modules) if module not in modules]
+        self._modules = [self._modules[index] for index in keep]
+        self._module_paths = [self._module_paths[index] for index in keep]
+        self.evt_modules_changed.emit()
+        self.refresh()
+
+    def set_patterns(
+        self,
+        py_pattern: tuple[str, ...] | None = None,
+        ignore_py_pattern: tuple[str, ...] | None = None,
+        stylesheet_pattern: tuple[str, ...] | None = None,
+        prune_pattern: tuple[str, ...] | None = None,
+        use_gitignore: bool | None = None,
+    ) -> None:
+        """Update discovery patterns (those that are not None) and refresh watched paths."""
+        if py_pattern is not None:
+            self.py_pattern = py_pattern
+        if ignore_py_pattern is not None:
+            self.ignore_py_pattern = ignore_py_pattern
+        if stylesheet_pattern is not None:
+            self.stylesheet_pattern = stylesheet_pattern
+        if prune_pattern is not None:
+            self.prune_pattern = prune_pattern
+        if use_gitignore is not None:
+            self.use_gitignore = use_gitignore
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Refresh file list."""
+        self.setup_paths(connect=False)
+
+    def _log_watching(self, module: str, roots: tuple[Path, ...]) -> None:
+        if len(roots) == 1:
+            self.log_message(f"Watching for '{module}' changes in '{roots[0]}'")
+        else:
+            self.log_message(f"Watching for '{module}' changes in {len(roots)} directories")
+
+    def setup_paths(self, clear: bool = False, connect: bool = True) -> None:
+        """Setup paths.
+
+        Paths are updated incrementally, only adding or removing those that changed since the last discovery. Use
+        `clear=True` to remove everything from the watcher first.
+        """
+        if clear:
+            self._remove_filenames()
+        self._add_filenames()
+        if connect and not self._connected:
+            self._watcher.fileChanged.connect(self.on_reload_file)
+            self._connected = True
+
+    def _remove_filenames(self) -> None:
+        """Clear existing filenames."""
+        files = self._watcher.files()
+        if files:
+            self._watcher.removePaths(files)
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+        paths = list(self._path_owners)
+        self._module_files.clear()
+        self._path_owners.clear()
+        self.digest_cache = DigestCache()
+        self.import_graph = ImportGraph()
+        self.path_to_index_map = {}
+        self.path_to_module_map = {}
+        self.evt_files_changed.emit([], paths)
+        self.log_message(f"Removed {len(files)} files and {len(directories)} directories from watcher.")
+
+    @property
+    def is_discovering(self) -> bool:
+        """Return True while files are being discovered in the background."""
+        return self._discovery_pending > 0
+
+    @property
+    def is_reloading(self) -> bool:
+        """Return True while changed files are being compiled in the background."""
+        return self._reload_pending > 0
+
+    def _add_filenames(self) -> None:
+        """Discover files of every module in a thread pool.
+
+        Each module directory is handled by a separate task and the results of a module are merged on the GUI thread as
+        soon as all of its directories were scanned, so the file list fills in gradually and the GUI stays responsive.
+        """
+        self._discovery_generation = next(_discovery_generations)
+        self._discovery_pending = len(self._modules)
+        self._discovery_partial = {}
+        self._discovery_added = self._discovery_removed = 0
+
+        # drop files of modules that are no longer watched and update indices of the remaining ones
+        for module in [module for module in self._module_files if module not in self._modules]:
+            self._update_module_files(module, -1, set())
+            del self._module_files[module]
+        if self._indexed_modules != self._modules:
+            index_of = {module: index for index, module in enumerate(self._modules)}
+            for path, owners in self._path_owners.items():
+                self.path_to_index_map[path] = index_of[owners[0]]
+            self._indexed_modules = list(self._modules)
+
+        if not self._modules:
+            self._finish_discovery()
+            return
+
+        pool, relay = _get_discovery_pool(), _get_discovery_relay()
+        options = (
+            self.py_pattern,
+            self.ignore_py_pattern,
+            self.stylesheet_pattern,
+            self.prune_pattern,
+            self.use_gitignore,
+            self.use_cache,
+            self.skip_unchanged,
+            self.reload_dependents,
+            self.partial_reload,
+        )
+        known_paths = frozenset(self._path_owners)
+        for index, (module, roots) in enumerate(zip(self._modules, self._module_paths, strict=True)):
+            package = get_module_package(module)
+            for module_path in roots:
+                future = pool.submit(
+                    _discover_module,
+                    relay,
+                    self._discovery_generation,
+                    index,
+                    module,
+                    package,
+                    module_path,
+                    options,
+                    known_paths,
+                )
+                future.add_done_callback(_log_worker_error)
+
+    def _on_module_discovered(
+        self,
+        result: tuple[
+            int,
+            int,
+            Path,
+            dict[str, str | None],
+            dict[str, bytes | None],
+            dict[str, bytes],
+            dict[str, list[str]],
+            list[str],
+        ],
+    ) -> None:
+        """Merge results of a single module directory, updating the watcher and file list once the module is done."""
+        generation, index, module_path, paths, digests, sources, imports, messages = result
+        if generation != self._discovery_generation:
+            return
+        for msg in messages:
+            self.log_message(msg)
+        self.digest_cache.update(digests)
+        for filename, source in sources.items():
+            remember_source(filename, source)
+        for path, names in imports.items():
+            module = paths[path]
+            if module is not None:
+                self.import_graph.set_imports(module, path, names)
+        roots = self._module_paths[index]
+        if len(roots) > 1:
+            scanned, module_names = self._discovery_partial.setdefault(index, (set(), {}))
+            scanned.add(module_path)
+            module_names.update(paths)
+            if len(scanned) < len(roots):
+                return
+            paths = self._discovery_partial.pop(index)[1]
+        self._update_module_files(self._modules[index], index, set(paths), paths)
+        self._discovery_pending -= 1
+        if self._discovery_pending == 0:
+            self._finish_discovery()
+
+    def _finish_discovery(self) -> None:
+        self.log_message(
+            f"Added {self._discovery_added} and removed {self._discovery_removed} paths"
+            f" (watching {len(self._path_owners)} paths)"
+        )
+        self.evt_discovery_finished.emit()
+
+    def _update_module_files(
+        self, module: str, index: int, paths: set[str], names: dict[str, str | None] | None = None
+    ) -> None:
+        """Diff newly discovered files of a module against the previous ones and apply only the difference.
+
+        The module names of python files can be provided in `names`, otherwise they are determined here.
+        """
+        previous = self._module_files.get(module, set())
+        self._module_files[module] = paths
+
+        added, removed = [], []
+        for path in paths - previous:
+            owners = self._path_owners.setdefault(path, [])
+            owners.append(module)
+            if len(owners) == 1:
+                added.append(path)
+                self.path_to_index_map[path] = index
+                root = self._get_root_for_path(index, path)
+                name = names[path] if names is not None else get_module_name(get_module_package(module), root, path)
+                self.path_to_module_map[path] = (name, root)
+        for path in previous - paths:
+            owners = self._path_owners[path]
+            owners.remove(module)
+            if owners:
+                owner_index = self.path_to_index_map[path] = self._modules.index(owners[0])
+                owner_path = self._get_root_for_path(owner_index, path)
+                name = get_module_name(get_module_package(owners[0]), owner_path, path)
+                self.path_to_module_map[path] = (name, owner_path)
+            else:
+                del self._path_owners[path]
+                del self.path_to_index_map[path]
+                name = self.path_to_module_map.pop(path)[0]
+                if name is not None:
+                    self.import_graph.remove(name)
+                self.digest_cache.discard(path)
+                removed.append(path)
+        self._set_paths(added, removed)
+        self._discovery_added += len(added)
+        self._discovery_removed += len(removed)
+
+    def _get_root_for_path(self, index: int, path: str) -> Path:
+        """Return the directory of module `index` that contains path."""
+        roots = self._module_paths[index]
+        if len(roots) > 1:
+            for root in roots:
+                if path.startswith(str(root).rstrip(os.sep) + os.sep):
+                    return root
+        return roots[0]
+
+    def _get_accept_patterns(self) -> tuple[PatternSet, PatternSet, PatternSet, PatternSet]:
+        """Get compiled patterns used to check newly created files."""
+        patterns = (self.py_pattern, self.ignore_py_pattern, self.stylesheet_pattern, self.prune_pattern)
+        if self._accept_patterns is None or self._accept_patterns[0] != patterns:
+            compiled = (
+                PatternSet(self.py_pattern),
+                PatternSet(self.ignore_py_pattern),
+                PatternSet(self.stylesheet_pattern),
+                compile_prune_pattern(self.prune_pattern),
+            )
+            self._accept_patterns = (patterns, compiled)
+        return self._accept_patterns[1]
+
+    def _get_relative_path(self, path: str) -> tuple[int, str] | None:
+        """Return index of the module a path is in, together with the path relative to the module directory."""
+        for index, roots in enumerate(self._module_paths):
+            for module_path in roots:
+                try:
+                    return index, Path(path).relative_to(module_path).as_posix()
+                except ValueError:
+                    continue
+        return None
+
+    def _accept_new_directory(self, path: str) -> bool:
+        """Check whether a newly created directory should be watched."""
+        relative = self._get_relative_path(path)
+        return relative is not None and not is_pruned(self._get_accept_patterns()[3], relative[1], path)
+
+    def _accept_new_file(self, path: str) -> bool:
+        """Check whether a newly created file matches the discovery patterns of any of the modules."""
+        return self._get_module_for_new_file(path) is not None
+
+    def _get_module_for_new_file(self, path: str) -> int | None:
+        """Return index of the module a new file belongs to."""
+        relative = self._get_relative_path(path)
+        if relative is None:
+            return None
+        index, relative_path = relative
+        include, ignore, stylesheet, prune = self._get_accept_patterns()
+        parts = relative_path.split("/")[:-1]
+        root = path[: len(path) - len(relative_path)]
+        for i in range(len(parts)):
+            if is_pruned(prune, "/".join(parts[: i + 1]), os.path.join(root, *parts[: i + 1])):
+                return None
+        if (include.match(relative_path) and not ignore.match(relative_path)) or stylesheet.match(relative_path):
+            return index
+        return None
+
+    def _on_file_added(self, path: str) -> None:
+        """Start watching a newly created file."""
+        index = self._get_module_for_new_file(path)
+        if index is None:
+            return
+        module = self._modules[index]
+        self._update_module_files(module, index, self._module_files.get(module, set()) | {path})
+        if self.skip_unchanged:
+            self.digest_cache.set(path, file_digest(path))
+        if self.reload_dependents:
+            self._update_imports(path)
+        self.log_message(f"'{Path(path).name}' was added")
+
+    def _on_file_removed(self, path: str) -> None:
+        """Stop watching a deleted file."""
+        for module in list(self._path_owners.get(path, [])):
+            index = self._modules.index(module)
+            self._update_module_files(module, index, self._module_files[module] - {path})
+        self.log_message(f"'{Path(path).name}' was removed")
+
+    def _on_file_rewatched(self, path: str) -> None:
+        self.log_message(f"'{Path(path).name}' was replaced, watching it again")
+
+    def _set_paths(self, paths: list[str], removed: list[str] | None = None) -> None:
+        """Add/remove paths to/from the watcher."""
+        if removed:
+            self._watcher.removePaths(removed)
+        if paths:
+            self._watcher.addPaths(paths)
+        if paths or removed:
+            self.evt_files_changed.emit(paths, removed or [])
+
+    def get_module_path_for_path(self, path: str) -> Path:
+        """Map path to module."""
+        entry = self.path_to_module_map.get(path)
+        if entry is not None:
+            return entry[1]
+        index = self.path_to_index_map.get(path, None)
+        if index is None:
+            raise ValueError("Path not found in module paths")
+        return self._get_root_for_path(index, path)
+
+    def get_module_name_for_path(self, path: str) -> str:
+        """Map path to dotted module name, using the index built during discovery if possible."""
+        entry = self.path_to_module_map.get(path)
+        if entry is not None and entry[0] is not None:
+            return entry[0]
+        return path_to_module(path, self.get_module_path_for_path(path))
+
+    def reload_py_files(self) -> None:
+        """Reload python files whose contents changed since they were last reloaded (or discovered).
+
+        Files are read, compared with their last digest and compiled in the worker thread, see `_on_reload_prepared`.
+        """
+        paths = sorted((path for path in self._watcher.files() if path.endswith(".py")), key=self._get_reload_order)
+        if not paths:
+            return
+        self.log_message(f"Reloading {len(paths)} python files...")
+        if self.reload_dependents:
+            paths = self._sort_by_imports(paths)
+        self._submit_reload(paths, self._get_digests(paths), cascade=False)
+
+    def reload_path(self, path: str) -> None:
+        """Reload file, even if its contents did not change, followed by its dependents (if enabled)."""
+        self._submit_reload([path], None, cascade=self.reload_dependents)
+
+    def reload_stylesheet_files(self) -> None:
+        """Reload all stylesheet files."""
+        self.log_message("Reloading all stylesheet files...")
+        self.evt_stylesheet.emit()
+
+    def on_reload_file(self, path: str) -> None:
+        """Queue changed file, which is reloaded together with other files that changed around the same time."""
+        self.reload_scheduler.schedule(path)
+
+    def _get_reload_order(self, path: str) -> tuple[bool, str]:
+        """Return sort key of path, ordering python modules by name (packages first) and stylesheets last."""
+        if path.endswith(".py"):
+            with suppress(ValueError):
+                return False, self.get_module_name_for_path(path)
+        return not path.endswith(".py"), path
+
+    def _reload_files(self, paths: list[str]) -> None:
+        """Reload batch of changed files, followed by the modules that import from them (if enabled).
+
+        Files are read and compiled in a worker thread first, see `_on_reload_prepared`.
+        """
+        if len(paths) > 1:
+            self.log_message(f"Reloading {len(paths)} changed files...")
+        if self.reload_dependents:
+            paths = self._sort_by_imports(paths)
+        self._submit_reload(paths, self._get_digests(paths), cascade=self.reload_dependents)
+
+    def _get_digests(self, paths: list[str]) -> dict[str, bytes | None] | None:
+        """Return digests that paths are compared with before they are reloaded (None to always reload them)."""
+        return {path: self.digest_cache.get(path) for path in paths} if self.skip_unchanged else None
+
+    def _submit_reload(
+        self, paths: list[str], digests: dict[str, bytes | None] | None, cascade: bool, dependents: bool = False
+    ) -> None:
+        """Prepare reload of paths in the worker thread.
+
+        If `cascade` is set, the modules that import from the reloaded modules are reloaded afterwards, and
+        `dependents` marks such a batch of dependent modules.
+        """
+        names = None
+        if self.reload_dependents:
+            names = {path: self.path_to_module_map.get(path, (None,))[0] for path in paths}
+        self._reload_pending += 1
+        _get_reload_pool().submit(
+            _prepare_reload, _get_reload_relay(), self._reload_token, paths, digests, names, cascade, dependents
+        )
+
+    def _on_reload_prepared(self, result: tuple[int, list[tuple[str, tuple]], bool, bool, float]) -> None:
+        """Reload files of a batch that was prepared in the worker thread.
+
+        The time spent in the worker thread and on the GUI thread is reported through `evt_reload_finished`.
+        """
+        token, prepared, cascade, dependents, prepare_duration = result
+        if token != self._reload_token:
+            return
+        self._reload_pending -= 1
+        start = time.perf_counter()
+        count = len(prepared)
+        unchanged = [path for path, state in prepared if not state[0]]
+        if len(unchanged) > 1:
+            self.digest_cache.skipped += len(unchanged)
+            self.log_message(f"Skipped {len(unchanged)} files that did not change (total={self.digest_cache.skipped})")
+            prepared = [(path, state) for path, state in prepared if state[0]]
+        reloaded = [path for path, state in prepared if self._reload_file(path, state, dependents)]
+        if cascade and reloaded:
+            self._reload_dependents(reloaded)
+        reload_duration = time.perf_counter() - start
+        self.last_reload_duration = prepare_duration + reload_duration
+        if count > 1:
+            self.log_message(
+                f"Reloaded {len(reloaded)} of {count} files in {self.last_reload_duration * 1000:.1f}ms"
+                f" (prepare {prepare_duration * 1000:.1f}ms, reload {reload_duration * 1000:.1f}ms)"
+            )
+        self.evt_reload_finished.emit(count, self.last_reload_duration)
+
+    def _sort_by_imports(self, paths: list[str]) -> list[str]:
+        """Sort paths so that modules are reloaded after the modules they import from."""
+        names: dict[str, str] = {}
+        for path in paths:
+            name = self.path_to_module_map.get(path, (None,))[0]
+            if name is not None and name in self.import_graph:
+                names[path] = name
+        order = {name: i for i, name in enumerate(self.import_graph.sort(names.values()))}
+        return sorted(paths, key=lambda path: order[names[path]] if path in names else len(order))
+
+    def _reload_dependents(self, paths: list[str]) -> None:
+        """Reload (already imported) modules that bind names from the modules at paths, in topological order."""
+        modules = [self.path_to_module_map[path][0] for path in paths if path in self.path_to_module_map]
+        dependents = [
+            module
+            for module in self.import_graph.get_dependents(module for module in modules if module)
+            if module in sys.modules
+        ]
+        if not dependents:
+            return
+        self.log_message(f"Reloading {len(dependents)} modules that import from the changed modules...")
+        paths = [path for path in map(self.import_graph.get_path, dependents) if path is not None]
+        self._submit_reload(paths, None, cascade=False, dependents=True)
+
+    def _update_imports(self, path: str, imports: list[str] | None = None) -> None:
+        """Update imports of a python file in the import graph, parsing them again unless they are given."""
+        entry = self.path_to_module_map.get(path)
+        if entry is not None and entry[0] is not None:
+            if imports is None:
+                imports = parse_file_imports(path, entry[0])
+            self.import_graph.set_imports(entry[0], path, imports)
+
+    def _reload_file(self, path: str, prepared: tuple | None = None, dependent: bool = False) -> bool:
+        """Reload file, returning True if it was a python file that was reloaded.
+
+        `prepared` holds the state of the file from the worker thread (changed, source, digest, error, imports and
+        timings), if it was prepared there. `dependent` is set for modules reloaded because they import from a
+        changed module.
+        """
+        if prepared is None:
+            changed, digest = self._check_changed(path)
+            source = error = imports = timings = None
+        else:
+            changed, source, digest, error, imports, timings = prepared
+        if not changed:
+            self.digest_cache.skipped += 1
+            self.log_message(f"'{Path(path).name}' did not change, skipped reload (total={self.digest_cache.skipped})")
+            return False
+        if error is not None:
+            self.log_message(f"failed to reload '{path}' Error={error}...")
+            return False
+        if path.endswith(".py"):
+            return self._reload_py(path, digest, source, imports, timings, dependent)
+        if path.endswith(".qss"):
+            self._reload_qss(path, digest)
+        return False
+
+    def _check_changed(self, path: str) -> tuple[bool, bytes | None]:
+        """Return whether the contents of path changed since it was last reloaded, together with its current digest."""
+        if not self.skip_unchanged:
+            return True, None
+        return self.digest_cache.check(path)
+
+    def _reload_py(
+        self,
+        path: str,
+        digest: bytes | None = None,
+        source: bytes | None = None,
+        imports: list[str] | None = None,
+        timings: dict[str, float] | None = None,
+        dependent: bool = False,
+    ) -> bool:
+        """Reload python module, using its contents (`source`) and imports if they were already read and compiled.
+
+        Time spent reading and compiling the file in the worker thread (`timings`) is added to the `ReloadReport`.
+
+        With `reload_dependents`, immutable module-level values (e.g. constants) are replaced too, and dependent
+        modules are always executed again (never partially reloaded), so that the names they bound with
+        `from module import name` are bound to the new values of the changed modules.
+        """
+        if self.skip_unchanged and digest is None:
+            digest = file_digest(path)
+        if self.reload_dependents:
+            self._update_imports(path, imports)
+        try:
+            module = self.get_module_name_for_path(path)
+            reload = Reload(
+                importlib.import_module(module),
+                partial=self.partial_reload and not dependent,
+                update_immutables=self.reload_dependents,
+            )
+        except Exception as e:
+            self.log_message(f"failed to reload '{path}' Error={e}...")
+            return False
+        report = reload.apply(source)
+        for phase, elapsed in (timings or {}).items():
+            report.timings[phase] += elapsed
+        if not report.ok:
+            self.log_message(f"failed to reload '{path}' Error={report.exception}...")
+            return False
+        self.log_message(f"'{module}' ({report.summary()})")
+        self.evt_pyfile.emit(module, report)
+        if self.skip_unchanged:
+            self.digest_cache.set(path, digest)
+        return True
+
+    def _reload_qss(self, path: str, digest: bytes | None = None) -> None:
+        self.evt_stylesheet.emit()
+        self.log_message(f"'{Path(path).name}' changed")
+        if self.skip_unchanged:
+            self.digest_cache.set(path, digest if digest is not None else file_digest(path))
+
+    def log_message(self, msg: str) -> None:
+        """Log message.
+
+        `log_func` (and `evt_message`) receive the `LogRecord`, which is only formatted (with its time) when converted
+        to `str`.
+        """
+        record = LogRecord(msg)
+        logger.debug("%s", record)
+        self.log_func(record)
+        self.evt_message.emit(record)
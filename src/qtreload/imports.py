@@ -0,0 +1,157 @@
+"""Static import graph of the watched modules."""
+
+from __future__ import annotations
+
+import ast
+import functools
+import heapq
+import typing as ty
+from pathlib import Path
+
+from qtreload.cache import ImportCache
+
+
+def parse_imports(source: str | bytes, module: str, is_package: bool = False) -> list[str]:
+    """Return modules that names are bound from at the top level of a module (`from x import y`).
+
+    Only `from` imports are considered, since modules imported with `import x` are updated in place when they are
+    reloaded. For every imported name, the submodule it could refer to (`x.y`) is included as well. Relative imports
+    are resolved against `module`. Imports inside functions are ignored, as they are executed on every call.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    package = module if is_package else module.rpartition(".")[0]
+    imports: set[str] = set()
+    stack: list[ast.AST] = list(tree.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split(".") if package else []
+                if node.level > len(parts):
+                    continue
+                parts = parts[: len(parts) - node.level + 1]
+                base = ".".join([*parts, base] if base else parts)
+            if not base:
+                continue
+            imports.add(base)
+            imports.update(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+            continue
+        stack.extend(ast.iter_child_nodes(node))
+    return sorted(imports)
+
+
+def parse_file_imports(path: str, module: str) -> list[str]:
+    """Return modules that names are bound from in a python file."""
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError:
+        return []
+    return parse_imports(source, module, is_package=Path(path).name == "__init__.py")
+
+
+def get_imports_for_paths(
+    names: ty.Mapping[str, str | None], module_path: Path, use_cache: bool = False
+) -> dict[str, list[str]]:
+    """Return imports of python files (mapping of path to module name) of a module directory.
+
+    If `use_cache` is True, imports are persisted in the user cache directory so that only files that changed since
+    the last call are parsed again.
+    """
+    cache = ImportCache.load(module_path) if use_cache else None
+    imports = {}
+    for path, name in names.items():
+        if name is None:
+            continue
+        if cache is None:
+            imports[path] = parse_file_imports(path, name)
+        else:
+            imports[path] = cache.get_imports(path, functools.partial(parse_file_imports, module=name))
+    if cache is not None:
+        cache.save()
+    return imports
+
+
+class ImportGraph:
+    """Graph of `from` imports between modules, used to find the modules that have to be reloaded with a module."""
+
+    def __init__(self) -> None:
+        self._imports: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._paths: dict[str, str] = {}
+
+    def __contains__(self, module: str) -> bool:
+        """Return True if module is part of the graph."""
+        return module in self._imports
+
+    def __len__(self) -> int:
+        """Return number of modules in the graph."""
+        return len(self._imports)
+
+    def get_path(self, module: str) -> str | None:
+        """Return path of module."""
+        return self._paths.get(module)
+
+    def get_imports(self, module: str) -> set[str]:
+        """Return modules that names are bound from in module."""
+        return set(self._imports.get(module, ()))
+
+    def set_imports(self, module: str, path: str, imports: ty.Iterable[str]) -> None:
+        """Set (or replace) the imports of module."""
+        self.remove(module)
+        imports = set(imports)
+        imports.discard(module)
+        self._imports[module] = imports
+        self._paths[module] = path
+        for name in imports:
+            self._dependents.setdefault(name, set()).add(module)
+
+    def remove(self, module: str) -> None:
+        """Remove module from the graph."""
+        self._paths.pop(module, None)
+        for name in self._imports.pop(module, ()):
+            dependents = self._dependents[name]
+            dependents.discard(module)
+            if not dependents:
+                del self._dependents[name]
+
+    def get_dependents(self, modules: ty.Iterable[str]) -> list[str]:
+        """Return modules that (directly or indirectly) bind names from any of `modules`, in topological order."""
+        modules = set(modules)
+        found: set[str] = set()
+        stack = list(modules)
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in found and dependent not in modules:
+                    found.add(dependent)
+                    stack.append(dependent)
+        return self.sort(found)
+
+    def sort(self, modules: ty.Iterable[str]) -> list[str]:
+        """Sort modules so that every module comes after the modules it imports from.
+
+        Ties are broken by name, so the order is deterministic. Modules that are part of an import cycle are added at
+        the end, in name order.
+        """
+        modules = set(modules)
+        pending = {module: len(self._imports.get(module, set()) & modules) for module in modules}
+        ready = [module for module, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            module = heapq.heappop(ready)
+            ordered.append(module)
+            del pending[module]
+            for dependent in self._dependents.get(module, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        heapq.heappush(ready, dependent)
+        ordered.extend(sorted(pending))
+        return ordered
@@ -0,0 +1,310 @@
+"""Native file watcher backend for Linux, using inotify through ctypes."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import itertools
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import typing as ty
+import weakref
+from contextlib import suppress
+
+from qtpy.QtCore import QObject, Signal  # type: ignore[attr-defined]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# events requested for every watched directory
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+# the directory itself is gone
+SELF_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+# events arriving within this many seconds of each other are delivered together...
+BATCH_INTERVAL = 0.05
+# ...unless the batch has been collecting for longer than this
+BATCH_MAX_DURATION = 0.5
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# (watch descriptor, mask, name)
+Event = tuple[int, int, str]
+
+_libc: ty.Any = None
+
+
+def _get_libc() -> ty.Any:
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    return _libc
+
+
+def is_available() -> bool:
+    """Return True if inotify can be used on this system."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_get_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+def _check(result: int) -> int:
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+def parse_events(data: bytes) -> list[Event]:
+    """Parse raw `inotify_event` structures."""
+    events = []
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset : offset + length].split(b"\0", 1)[0]
+        offset += length
+        events.append((wd, mask, os.fsdecode(name)))
+    return events
+
+
+def _read_available(fd: int) -> list[Event]:
+    """Read all events that are queued, without blocking."""
+    events: list[Event] = []
+    while True:
+        try:
+            data = os.read(fd, _READ_SIZE)
+        except BlockingIOError:
+            return events
+        if not data:
+            return events
+        events.extend(parse_events(data))
+
+
+class _InotifyRelay(QObject):
+    """Deliver events from reader threads to the GUI thread.
+
+    Reader threads only ever reference this (application-lifetime) object and never the watchers themselves, otherwise
+    the last reference to a watcher could be dropped, and the watcher destroyed, outside of the GUI thread.
+    """
+
+    evt_events = Signal(object)
+
+
+_relay: _InotifyRelay | None = None
+_watcher_keys = itertools.count(1)
+
+
+def _get_relay() -> _InotifyRelay:
+    """Get relay object, creating it on first use (must be called from the GUI thread)."""
+    global _relay
+    if _relay is None:
+        _relay = _InotifyRelay()
+    return _relay
+
+
+def _read_loop(fd: int, stop_fd: int, relay: _InotifyRelay, key: int) -> None:
+    """Read events in batches until `stop_fd` becomes readable (runs in a background thread)."""
+    try:
+        while True:
+            ready, _, _ = select.select([fd, stop_fd], [], [])
+            if stop_fd in ready:
+                return
+            events = _read_available(fd)
+            start = time.monotonic()
+            while time.monotonic() - start < BATCH_MAX_DURATION:
+                ready, _, _ = select.select([fd, stop_fd], [], [], BATCH_INTERVAL)
+                if fd not in ready:
+                    break
+                events.extend(_read_available(fd))
+            if events:
+                with suppress(RuntimeError):
+                    relay.evt_events.emit((key, events))
+            if stop_fd in ready:
+                return
+    finally:
+        os.close(fd)
+        os.close(stop_fd)
+
+
+def _stop_reader(write_fd: int) -> None:
+    with suppress(OSError):
+        os.write(write_fd, b"\0")
+    with suppress(OSError):
+        os.close(write_fd)
+
+
+class InotifyWatcher(QObject):
+    """Watch files and directories with inotify.
+
+    The API mirrors `QFileSystemWatcher`. Files are watched through their parent directories, so files that are
+    replaced (atomic saves), or deleted and created again, keep being watched, and in-place writes are reported for
+    files in watched directories too. Events are read in a background thread and delivered to the GUI thread in
+    batches, with each path reported at most once per batch.
+    """
+
+    fileChanged = Signal(str)
+    directoryChanged = Signal(str)
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        libc = _get_libc()
+        self._fd = _check(libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+        self._files: set[str] = set()
+        self._directories: set[str] = set()
+        # directory -> number of watched files in it (+1 if the directory itself is watched)
+        self._refs: dict[str, int] = {}
+        self._wd_to_dir: dict[int, str] = {}
+        self._dir_to_wd: dict[str, int] = {}
+
+        self._key = next(_watcher_keys)
+        relay = _get_relay()
+        relay.evt_events.connect(self._on_events)
+        stop_fd, write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=_read_loop, args=(self._fd, stop_fd, relay, self._key), name="qtreload-inotify", daemon=True
+        )
+        self._thread.start()
+        self._finalizer = weakref.finalize(self, _stop_reader, write_fd)
+
+    def close(self) -> None:
+        """Stop the reader thread and release all watches."""
+        self._finalizer()
+        self._thread.join()
+        self._files.clear()
+        self._directories.clear()
+        self._refs.clear()
+        self._wd_to_dir.clear()
+        self._dir_to_wd.clear()
+
+    def files(self) -> list[str]:
+        """Return list of watched files."""
+        return list(self._files)
+
+    def directories(self) -> list[str]:
+        """Return list of watched directories."""
+        return list(self._directories)
+
+    def addPaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Watch files and directories, returning the paths that could not be watched."""
+        failed = []
+        for path in paths:
+            if path in self._files or path in self._directories:
+                continue
+            is_dir = os.path.isdir(path)
+            if not is_dir and not os.path.isfile(path):
+                failed.append(path)
+                continue
+            directory = path if is_dir else os.path.dirname(path)
+            if not self._acquire(directory):
+                failed.append(path)
+                continue
+            (self._directories if is_dir else self._files).add(path)
+        return failed
+
+    def removePaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Stop watching files and directories, returning the paths that were not watched."""
+        failed = []
+        for path in paths:
+            if path in self._directories:
+                self._directories.remove(path)
+                self._release(path)
+            elif path in self._files:
+                self._files.remove(path)
+                self._release(os.path.dirname(path))
+            else:
+                failed.append(path)
+        return failed
+
+    def _acquire(self, directory: str) -> bool:
+        if directory not in self._dir_to_wd:
+            try:
+                wd = _check(_get_libc().inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK))
+            except OSError:
+                return False
+            self._wd_to_dir[wd] = directory
+            self._dir_to_wd[directory] = wd
+        self._refs[directory] = self._refs.get(directory, 0) + 1
+        return True
+
+    def _release(self, directory: str) -> None:
+        self._refs[directory] -= 1
+        if self._refs[directory] > 0:
+            return
+        del self._refs[directory]
+        wd = self._dir_to_wd.pop(directory, None)
+        if wd is not None:
+            del self._wd_to_dir[wd]
+            _get_libc().inotify_rm_watch(self._fd, wd)
+
+    def _forget_directory(self, wd: int) -> None:
+        """Drop descriptor of a directory that no longer exists (the kernel removed the watch already)."""
+        directory = self._wd_to_dir.pop(wd, None)
+        if directory is not None and self._dir_to_wd.get(directory) == wd:
+            del self._dir_to_wd[directory]
+
+    def _on_events(self, result: tuple[int, list[Event]]) -> None:
+        key, events = result
+        if key != self._key:
+            return
+        files: dict[str, None] = {}
+        directories: dict[str, None] = {}
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                files.update(dict.fromkeys(self._files))
+                directories.update(dict.fromkeys(self._directories))
+            else:
+                self._collect_changes(wd, mask, name, files, directories)
+        for path in files:
+            self.fileChanged.emit(path)
+        for directory in directories:
+            self.directoryChanged.emit(directory)
+
+    def _collect_changes(
+        self, wd: int, mask: int, name: str, files: dict[str, None], directories: dict[str, None]
+    ) -> None:
+        """Add watched paths affected by a single event to `files` and `directories`."""
+        directory = self._wd_to_dir.get(wd)
+        if directory is None:
+            return
+        if directory in self._directories:
+            directories[directory] = None
+        if name:
+            path = os.path.join(directory, name)
+            if path in self._files:
+                files[path] = None
+        elif mask & SELF_MASK:
+            files.update((path, None) for path in self._files if os.path.dirname(path) == directory)
+        if mask & IN_IGNORED:
+            self._forget_directory(wd)
@@ -3,12 +3,18 @@
 from __future__ import annotations
 
 import os
+from logging import getLogger
 
-from qtpy.QtWidgets import QWidget
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from qtpy.QtWidgets import QWidget
 
-from qtreload.qt_reload import QtReloadWidget
+    from qtreload.engine import ReloadEngine
+    from qtreload.qt_reload import QtReloadWidget
 
-# store reference to QtReloadWidget to prevent garbage collection
+logger = getLogger(__name__)
+
+# store reference to QtReloadWidget (or ReloadEngine) to prevent garbage collection
 _reload_ref = None
 
 
@@ -25,8 +31,13 @@ def _parse_modules(raw_modules: str) -> list[str]:
     return modules
 
 
-def install_hot_reload(parent: QWidget | None = None) -> QtReloadWidget | None:
-    """Install or update the singleton hot-reload widget for development use."""
+def install_hot_reload(parent: QWidget | None = None) -> QtReloadWidget | ReloadEngine | None:
+    """Install or update the singleton hot-reload widget for development use.
+
+    If `QTRELOAD_HEADLESS=1`, a `ReloadEngine` is installed instead, which reloads modules without showing anything.
+    Qt and the reload machinery are only imported once hot-reload is enabled, so calling this in production code costs
+    nothing.
+    """
     global _reload_ref
 
     run_reload = os.environ.get("QTRELOAD_HOT_RELOAD", "0") == "1"
@@ -36,7 +47,35 @@ def install_hot_reload(parent: QWidget | None = None) -> QtReloadWidget | None:
 
     modules = _parse_modules(os.environ.get("QTRELOAD_HOT_RELOAD_MODULES", ""))
     if _reload_ref is None:
-        _reload_ref = QtReloadWidget(modules, parent=parent)
+        import typing as ty
+
+        from qtreload.watcher import WATCHER_BACKENDS
+
+        use_cache = os.environ.get("QTRELOAD_HOT_RELOAD_CACHE", "0") == "1"
+        watcher_backend = os.environ.get("QTRELOAD_WATCHER_BACKEND", "qt")
+        if watcher_backend not in WATCHER_BACKENDS:
+            logger.warning(
+                "Invalid QTRELOAD_WATCHER_BACKEND '%s'. Expected one of %s, using 'qt' instead.",
+                watcher_backend,
+                WATCHER_BACKENDS,
+            )
+            watcher_backend = "qt"
+        reload_dependents = os.environ.get("QTRELOAD_RELOAD_DEPENDENTS", "0") == "1"
+        partial_reload = os.environ.get("QTRELOAD_PARTIAL_RELOAD", "0") == "1"
+        headless = os.environ.get("QTRELOAD_HEADLESS", "0") == "1"
+        reload_cls: type[ReloadEngine | QtReloadWidget]
+        if headless:
+            from qtreload.engine import ReloadEngine as reload_cls
+        else:
+            from qtreload.qt_reload import QtReloadWidget as reload_cls
+        _reload_ref = reload_cls(
+            modules,
+            parent=parent,
+            use_cache=use_cache,
+            watcher_backend=ty.cast('ty.Literal["qt", "inotify", "polling"]', watcher_backend),
+            reload_dependents=reload_dependents,
+            partial_reload=partial_reload,
+        )
     else:
         _reload_ref.replace_modules(modules)
     return _reload_ref
@@ -0,0 +1,118 @@
+"""Bounded log of the reload engine and widget."""
+
+from __future__ import annotations
+
+import itertools
+import time
+import typing as ty
+from collections import deque
+from datetime import datetime
+
+from qtpy.QtCore import QObject, QTimer
+
+if ty.TYPE_CHECKING:
+    from qtpy.QtWidgets import QPlainTextEdit
+
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+class LogRecord:
+    """Single log message, formatted only when it is displayed (or converted to `str`)."""
+
+    __slots__ = ("created", "message")
+
+    def __init__(self, message: str, created: float | None = None) -> None:
+        self.message = message
+        self.created = time.time() if created is None else created
+
+    def __repr__(self) -> str:
+        """Return representation of the record."""
+        return f"LogRecord({self.message!r}, created={self.created!r})"
+
+    def __str__(self) -> str:
+        """Return formatted record."""
+        return self.format()
+
+    def format(self) -> str:
+        """Return message prefixed by the time it was created."""
+        return f"{datetime.fromtimestamp(self.created).strftime(TIME_FMT)} - {self.message}"
+
+
+class LogBuffer:
+    """Ring buffer keeping the last `capacity` records, together with the records that were not displayed yet."""
+
+    def __init__(self, capacity: int = 5000) -> None:
+        self._records: deque[LogRecord] = deque(maxlen=capacity)
+        self._unflushed = 0
+        # number of records that were dropped because the buffer was full
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Return number of records."""
+        return len(self._records)
+
+    def __iter__(self) -> ty.Iterator[LogRecord]:
+        """Iterate over records, oldest first."""
+        return iter(self._records)
+
+    @property
+    def capacity(self) -> int:
+        """Return maximum number of records."""
+        return self._records.maxlen or 0
+
+    @property
+    def pending(self) -> int:
+        """Return number of records that were not displayed yet."""
+        return self._unflushed
+
+    def append(self, record: LogRecord) -> None:
+        """Add record, dropping the oldest one if the buffer is full."""
+        if len(self._records) == self._records.maxlen:
+            self.dropped += 1
+        self._records.append(record)
+        self._unflushed = min(self._unflushed + 1, len(self._records))
+
+    def take_pending(self) -> list[LogRecord]:
+        """Return records that were not displayed yet (at most `capacity`), marking them as displayed."""
+        count, self._unflushed = self._unflushed, 0
+        if not count:
+            return []
+        return list(itertools.islice(reversed(self._records), count))[::-1]
+
+    def clear(self) -> None:
+        """Drop all records."""
+        self._records.clear()
+        self._unflushed = 0
+
+
+class LogSink(QObject):
+    """Collect records in a `LogBuffer` and display them in a `QPlainTextEdit` in batches.
+
+    Records are rendered once every `interval` ms rather than one at a time, and the text edit keeps at most
+    `capacity` lines, so logging stays cheap no matter how long the widget lives.
+    """
+
+    def __init__(self, edit: QPlainTextEdit, capacity: int = 5000, interval: int = 100, parent: QObject | None = None):
+        super().__init__(parent)
+        self.buffer = LogBuffer(capacity)
+        self._edit = edit
+        self._edit.setReadOnly(True)
+        self._edit.setMaximumBlockCount(capacity)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    def append(self, record: LogRecord) -> None:
+        """Queue record to be displayed with the next batch."""
+        self.buffer.append(record)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Display queued records immediately."""
+        self._timer.stop()
+        records = self.buffer.take_pending()
+        if records:
+            self._edit.appendPlainText("\n".join(record.format() for record in records))
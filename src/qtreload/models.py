@@ -0,0 +1,150 @@
+"""Models of the watched files."""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import typing as ty
+
+from natsort import natsort_keygen
+from qtpy.QtCore import QAbstractListModel, QModelIndex, QObject, QSortFilterProxyModel, Qt
+
+# batches with more paths than this are merged into the list and the model is reset, rather than inserting every path
+# on its own (which moves all rows after it)
+MERGE_THRESHOLD = 64
+
+
+class FileListModel(QAbstractListModel):
+    """Naturally sorted list of watched files.
+
+    The sort key and lowercase form (used for filtering) of every path are computed once, when it is added. Small
+    batches of paths are inserted in place, larger ones are sorted on their own and merged with the existing paths.
+    """
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._natsort_key = natsort_keygen()
+        self._paths: list[str] = []
+        self._keys: list = []
+        self._lower: list[str] = []
+
+    @property
+    def paths(self) -> list[str]:
+        """Return paths, in natural order."""
+        return list(self._paths)
+
+    def rowCount(self, parent: QModelIndex | None = None) -> int:
+        """Return number of paths."""
+        return 0 if parent is not None and parent.isValid() else len(self._paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> ty.Any:
+        """Return path at index."""
+        if index.isValid() and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self._paths[index.row()]
+        return None
+
+    def lower(self, row: int) -> str:
+        """Return lowercase path at row."""
+        return self._lower[row]
+
+    @property
+    def lower_paths(self) -> list[str]:
+        """Return lowercase paths, in natural order."""
+        return list(self._lower)
+
+    def add_paths(self, paths: ty.Iterable[str]) -> None:
+        """Add paths, keeping the natural order."""
+        new = sorted((self._natsort_key(path), path) for path in paths)
+        if not new:
+            return
+        if len(new) <= MERGE_THRESHOLD:
+            for key, path in new:
+                row = bisect.bisect(self._keys, key)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._keys.insert(row, key)
+                self._paths.insert(row, path)
+                self._lower.insert(row, path.lower())
+                self.endInsertRows()
+            return
+        self.beginResetModel()
+        merged = list(heapq.merge(zip(self._keys, self._paths, strict=True), new))
+        self._keys = [key for key, _ in merged]
+        self._paths = [path for _, path in merged]
+        self._lower = [path.lower() for path in self._paths]
+        self.endResetModel()
+
+    def remove_paths(self, paths: ty.Iterable[str]) -> None:
+        """Remove paths."""
+        rows = []
+        for path in paths:
+            key = self._natsort_key(path)
+            row = bisect.bisect_left(self._keys, key)
+            # different paths can have the same key (e.g. `a1` and `a01`)
+            while row < len(self._paths) and self._keys[row] == key and self._paths[row] != path:
+                row += 1
+            if row < len(self._paths) and self._paths[row] == path:
+                rows.append(row)
+        if len(rows) <= MERGE_THRESHOLD:
+            for row in sorted(rows, reverse=True):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._keys[row], self._paths[row], self._lower[row]
+                self.endRemoveRows()
+            return
+        removed = set(rows)
+        self.beginResetModel()
+        keep = [row for row in range(len(self._paths)) if row not in removed]
+        self._keys = [self._keys[row] for row in keep]
+        self._paths = [self._paths[row] for row in keep]
+        self._lower = [self._lower[row] for row in keep]
+        self.endResetModel()
+
+    def clear(self) -> None:
+        """Remove all paths."""
+        self.beginResetModel()
+        self._keys, self._paths, self._lower = [], [], []
+        self.endResetModel()
+
+
+class FileFilterProxyModel(QSortFilterProxyModel):
+    """Show only paths that contain the filter text (case-insensitive), using the lowercase paths of the model.
+
+    Whether a path matches is computed once per filter text and kept in an index, which the proxy looks rows up in.
+    When the filter text is extended (e.g. while typing), only the paths that matched the previous text are checked
+    again. Paths added later are checked when they are first looked up.
+    """
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._text = ""
+        # lowercase path -> whether it contains the filter text
+        self._index: dict[str, bool] = {}
+
+    @property
+    def filter_text(self) -> str:
+        """Return current filter text."""
+        return self._text
+
+    def set_filter_text(self, text: str) -> None:
+        """Set filter text, filtering the paths again only if it changed."""
+        text = text.strip().lower()
+        if text == self._text:
+            return
+        model = ty.cast("FileListModel | None", self.sourceModel())
+        if text and model is not None:
+            # paths that did not contain the previous text cannot contain the new one
+            previous = self._index if self._text and self._text in text else {}
+            self._index = {path: previous.get(path, True) and text in path for path in model.lower_paths}
+        else:
+            self._index = {}
+        self._text = text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        """Return True if the path at row contains the filter text."""
+        if not self._text:
+            return True
+        path = ty.cast(FileListModel, self.sourceModel()).lower(source_row)
+        matched = self._index.get(path)
+        if matched is None:
+            matched = self._index[path] = self._text in path
+        return matched
@@ -17,6 +17,15 @@ things such as singletons or end up with a second representation of the same cla
 
 4. Reload hooks were changed
 
+5. Compiled code is cached in memory and in `__pycache__` (see `CodeCache`), so reloading a module that did not change
+does not compile it again.
+
+6. Optionally (`partial=True`), only the code of functions and methods whose bodies changed is replaced, without
+executing the module again (see `Reload._apply_partial`).
+
+7. What happened during a reload (time spent in every phase, what was added, patched or skipped and the exception, if
+there was one) is recorded in a `ReloadReport`.
+
 These changes make it more stable, especially in the common case (where in a debug session only the
 contents of a function are changed), besides providing flexibility for users that want to extend
 on it.
@@ -71,7 +80,8 @@ Current limitations
 
 
 - Attributes/constants are added, but not changed (so singletons and the application state is not
-  broken -- use provided hooks to workaround it).
+  broken -- use provided hooks to workaround it). Immutable module-level values (numbers, strings, tuples, ...)
+  are replaced if `update_immutables` is set.
 
 - Code using metaclasses may not always work.
 
@@ -80,7 +90,7 @@ Current limitations
 
 - Renamings are not handled correctly.
 
-- Dependent modules are not reloaded.
+- Dependent modules are not reloaded (`QtReloadWidget(..., reload_dependents=True)` reloads them after the module).
 
 - New __slots__ can't be added to existing classes.
 
@@ -101,7 +111,23 @@ target namespace.
 
 """
 
+from __future__ import annotations
+
+import ast
+import bisect
+import difflib
+import functools
+import hashlib
+import importlib.util
+import marshal
+import os
+import sys
+import threading
+import time
 import types
+import typing as ty
+import weakref
+from collections import OrderedDict
 
 NO_DEBUG = 0
 LEVEL1 = 1
@@ -110,25 +136,166 @@ LEVEL2 = 2
 DEBUG = NO_DEBUG
 
 
+# =======================================================================================================================
+# CodeCache
+# =======================================================================================================================
+class CodeCache:
+    """Cache of compiled module code, so that reloading a module does not always compile it again.
+
+    Code objects are kept in memory (least recently used ones are dropped once there are more than `maxsize`),
+    keyed by (path, source hash). On a miss, the `__pycache__` file of the module (the same file the
+    import system uses) is tried before compiling, and newly compiled code is written there, unless writing bytecode
+    is disabled (`sys.dont_write_bytecode`) or the directory is not writable.
+
+    Timestamp-based pyc files only store the modification time in seconds, which is not precise enough when a file is
+    saved several times in a row, so they are only used if they were written after the source was last modified.
+    Written pyc files are hash-based (checked), so they remain valid for the import system as well.
+
+    The cache can be used from several threads, e.g. to compile a changed module in a worker thread before reloading it.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._codes: OrderedDict[tuple[str, bytes], types.CodeType] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.pyc_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+
+    def get_code(self, file: str, data: bytes | None = None) -> types.CodeType:
+        """Return code object of a python file, optionally using its already read contents.
+
+        Raises `SyntaxError` (or `ValueError`) if the file cannot be compiled.
+        """
+        st = None
+        if data is None:
+            with open(file, "rb") as f:
+                data = f.read()
+                st = os.fstat(f.fileno())
+        source_hash = importlib.util.source_hash(data)
+        key = (file, source_hash)
+        with self._lock:
+            code = self._codes.get(key)
+            if code is not None:
+                self._codes.move_to_end(key)
+                self.hits += 1
+                return code
+
+        try:
+            pyc_file = importlib.util.cache_from_source(file)
+        except (NotImplementedError, ValueError):
+            pyc_file = None
+        code = self._read_pyc(pyc_file, file, st, source_hash) if pyc_file else None
+        from_pyc = code is not None
+        if code is None:
+            code = compile(data, file, "exec", dont_inherit=True)
+            if pyc_file and not sys.dont_write_bytecode:
+                self._write_pyc(pyc_file, code, source_hash)
+
+        with self._lock:
+            if from_pyc:
+                self.pyc_hits += 1
+            else:
+                self.misses += 1
+            # older versions of the file are no longer needed
+            for old_key in [old_key for old_key in self._codes if old_key[0] == file]:
+                del self._codes[old_key]
+            self._codes[key] = code
+            while len(self._codes) > self.maxsize:
+                self._codes.popitem(last=False)
+        return code
+
+    @staticmethod
+    def _read_pyc(pyc_file: str, file: str, st: os.stat_result | None, source_hash: bytes) -> types.CodeType | None:
+        """Read code from pyc file, returning None if it is missing or does not match the source.
+
+        Timestamp-based pyc files can only be checked against the file on disk (`st`), so they are not used for
+        contents that were read before.
+        """
+        try:
+            with open(pyc_file, "rb") as f:
+                data = f.read()
+                pyc_mtime = os.fstat(f.fileno()).st_mtime_ns
+        except OSError:
+            return None
+        if len(data) < 16 or data[:4] != importlib.util.MAGIC_NUMBER:
+            return None
+        flags = int.from_bytes(data[4:8], "little")
+        if flags & 0b1:
+            # hash-based pyc
+            if data[8:16] != source_hash:
+                return None
+        elif (
+            st is None
+            or pyc_mtime <= st.st_mtime_ns
+            or int.from_bytes(data[8:12], "little") != int(st.st_mtime) & 0xFFFFFFFF
+            or int.from_bytes(data[12:16], "little") != st.st_size & 0xFFFFFFFF
+        ):
+            return None
+        try:
+            code = marshal.loads(data[16:])
+        except (EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(code, types.CodeType) or code.co_filename != file:
+            return None
+        return code
+
+    @staticmethod
+    def _write_pyc(pyc_file: str, code: types.CodeType, source_hash: bytes) -> None:
+        """Write checked hash-based pyc file."""
+        data = bytearray(importlib.util.MAGIC_NUMBER)
+        data.extend((0b11).to_bytes(4, "little"))
+        data.extend(source_hash)
+        data.extend(marshal.dumps(code))
+        tmp_file = f"{pyc_file}.{id(data)}"
+        try:
+            os.makedirs(os.path.dirname(pyc_file), exist_ok=True)
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, pyc_file)
+        except OSError:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+
+
+code_cache = CodeCache()
+
+
 # We must redefine it in Py3k if it's not already there
-def execfile(file, glob=None, loc=None):
+def execfile(
+    file: str,
+    glob: dict[str, ty.Any] | None = None,
+    loc: ty.Mapping[str, ty.Any] | None = None,
+    use_cache: bool = True,
+) -> None:
     if glob is None:
-        import sys
-
-        glob = sys._getframe().f_back.f_globals
+        glob = sys._getframe(1).f_globals
     if loc is None:
         loc = glob
 
-    import tokenize
+    if use_cache:
+        code = code_cache.get_code(file)
+    else:
+        import tokenize
 
-    with tokenize.open(file) as stream:
-        contents = stream.read()
+        with tokenize.open(file) as stream:
+            contents = stream.read()
+        code = compile(contents + "\n", file, "exec")
 
     # execute the script (note: it's important to compile first to have the filename set in debug mode)
-    exec(compile(contents + "\n", file, "exec"), glob, loc)
+    exec(code, glob, loc)
 
 
-def write_err(*args):
+def write_err(*args: object) -> None:
     #     py_db = get_global_debugger()
     py_db = None
     if py_db is not None:
@@ -143,90 +310,398 @@ def write_err(*args):
             py_db.writer.add_command(cmd)
 
 
-def notify_info0(*args):
+def notify_info0(*args: object) -> None:
     write_err(*args)
 
 
-def notify_info(*args):
+def notify_info(*args: object) -> None:
     if DEBUG >= LEVEL1:
         write_err(*args)
 
 
-def notify_info2(*args):
+def notify_info2(*args: object) -> None:
     if DEBUG >= LEVEL2:
         write_err(*args)
 
 
-def notify_error(*args):
+def notify_error(*args: object) -> None:
     write_err(*args)
 
 
 # =======================================================================================================================
 # code_objects_equal
 # =======================================================================================================================
-def code_objects_equal(code0, code1):
-    for d in dir(code0):
-        if d.startswith("_") or "line" in d or d in ("replace", "co_positions", "co_qualname"):
-            continue
-        if getattr(code0, d) != getattr(code1, d):
-            return False
-    return True
+# attributes of code objects that make up their fingerprint (line numbers, positions and qualified names are ignored)
+_CODE_ATTRS = tuple(
+    d
+    for d in dir(types.CodeType)
+    if d.startswith("co_")
+    and "line" not in d
+    and d not in ("co_lnotab", "co_qualname", "co_consts")
+    and not callable(getattr(types.CodeType, d))
+)
+
+# fingerprints by id of the code object, dropped once the code object is garbage collected
+_fingerprints: dict[int, tuple[weakref.ref[types.CodeType], bytes]] = {}
+
+
+def _forget_fingerprint(key: int) -> None:
+    _fingerprints.pop(key, None)
+
+
+def code_fingerprint(code: types.CodeType) -> bytes:
+    """Return structural fingerprint (digest) of a code object.
+
+    The fingerprint covers the same attributes `code_objects_equal` always compared, with nested code objects (in
+    `co_consts`) replaced by their own fingerprint. It is computed once per code object and cached for as long as the
+    code object is alive, so comparing an unchanged function against its previous version is a single comparison.
+    """
+    key = id(code)
+    entry = _fingerprints.get(key)
+    if entry is not None and entry[0]() is code:
+        return entry[1]
+
+    consts = tuple(code_fingerprint(const) if isinstance(const, types.CodeType) else const for const in code.co_consts)
+    values = (consts, *(getattr(code, d) for d in _CODE_ATTRS))
+    try:
+        data = marshal.dumps(values)
+    except ValueError:
+        data = repr(values).encode("utf-8", "backslashreplace")
+    fingerprint = hashlib.blake2b(data, digest_size=16).digest()
+    try:
+        ref = weakref.ref(code, lambda _: _forget_fingerprint(key))
+    except TypeError:
+        return fingerprint
+    _fingerprints[key] = (ref, fingerprint)
+    return fingerprint
+
+
+def code_objects_equal(code0: types.CodeType, code1: types.CodeType) -> bool:
+    return code0 is code1 or code_fingerprint(code0) == code_fingerprint(code1)
+
+
+# =======================================================================================================================
+# partial reload
+# =======================================================================================================================
+# (line, column) of a position in the source
+Position = tuple[int, int]
+FunctionNode = ast.FunctionDef | ast.AsyncFunctionDef
+# path of a function (e.g. `("Class", "method")`), start (first decorator), start of body and end
+Span = tuple[tuple[str, ...], Position, Position, Position]
+# lines, function spans and `__future__` imports of a module
+SourceIndex = tuple[list[bytes], list[Span], list[ast.stmt]]
+
+# source of every module at the time it was last reloaded with `partial=True` (together with its index, once known),
+# used to find what changed since
+_sources: dict[str, tuple[bytes, SourceIndex | None]] = {}
+
+
+def remember_source(filename: str, source: bytes) -> None:
+    """Record the source a module was loaded from, unless it was reloaded with `partial=True` since.
+
+    This lets the first change of a module be applied as a partial reload, instead of only the ones after it.
+    """
+    _sources.setdefault(filename, (source, None))
+
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+# decorators that can be applied again to functions whose code was replaced
+_PARTIAL_DECORATORS = ("staticmethod", "classmethod")
+_CLASS_DEFAULTS: dict[str, ty.Any] = {"type_params": []} if "type_params" in ast.ClassDef._fields else {}
+
+
+def _decode(source: bytes) -> str | None:
+    """Return source as text, or None if it cannot be decoded."""
+    try:
+        return importlib.util.decode_source(source)
+    except (SyntaxError, UnicodeDecodeError):
+        return None
+
+
+def _lines(text: str) -> list[bytes]:
+    """Return lines of text, utf-8 encoded as ast offsets are."""
+    return text.encode("utf-8").splitlines(keepends=True)
+
+
+def _start(node: FunctionNode) -> Position:
+    first: ast.expr | FunctionNode = node.decorator_list[0] if node.decorator_list else node
+    return first.lineno, first.col_offset
+
+
+def _span(path: tuple[str, ...], node: FunctionNode) -> Span:
+    """Return path, start (first decorator), start of body and end of a function as (line, column)."""
+    body = node.body[0]
+    end = (ty.cast(int, node.end_lineno), ty.cast(int, node.end_col_offset))
+    return path, _start(node), (body.lineno, body.col_offset), end
+
+
+def _index_source(source: bytes) -> SourceIndex | None:
+    """Return lines of source, spans of its functions and methods and its `__future__` imports, or None.
+
+    Functions nested in functions are part of the span of the outer function.
+    """
+    text = _decode(source)
+    if text is None:
+        return None
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    spans: list[Span] = []
+    stack: list[tuple[tuple[str, ...], list[ast.stmt]]] = [((), tree.body)]
+    while stack:
+        prefix, body = stack.pop()
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                stack.append(((*prefix, node.name), node.body))
+            elif isinstance(node, _FUNCTION_TYPES):
+                spans.append(_span((*prefix, node.name), node))
+    spans.sort(key=lambda span: span[1])
+    future: list[ast.stmt] = [
+        node for node in tree.body if isinstance(node, ast.ImportFrom) and node.module == "__future__"
+    ]
+    return _lines(text), spans, future
+
+
+def _segment(lines: list[bytes], start: Position, end: Position) -> bytes:
+    """Return source between two (line, column) positions."""
+    (l0, c0), (l1, c1) = start, end
+    if l0 == l1:
+        return lines[l0 - 1][c0:c1]
+    return lines[l0 - 1][c0:] + b"".join(lines[l0 : l1 - 1]) + lines[l1 - 1][:c1]
+
+
+def _diff_lines(old: list[bytes], new: list[bytes]) -> list[tuple[int, int, int, int]]:
+    """Return `(i1, i2, j1, j2)` of every range of lines `old[i1:i2]` that was replaced by `new[j1:j2]`."""
+    n = min(len(old), len(new))
+    prefix = 0
+    while prefix < n and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    # only the (usually small) range between the common prefix and suffix has to be matched
+    matcher = difflib.SequenceMatcher(None, old[prefix : len(old) - suffix], new[prefix : len(new) - suffix], False)
+    return [
+        (i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def _parse_definition(
+    lines: list[bytes], start: int, end: int, line_offset: int, indented: bool
+) -> FunctionNode | None:
+    """Parse lines `start` to `end` (1-based) of source, which must contain a single function definition."""
+    text = b"".join(lines[start - 1 : end]).decode("utf-8")
+    if indented:
+        # keep the indentation, so that column offsets stay the same
+        text = "if 1:\n" + text
+        line_offset -= 1
+    try:
+        body = ast.parse(text).body
+    except (SyntaxError, ValueError):
+        return None
+    if indented:
+        if len(body) != 1 or not isinstance(body[0], ast.If):
+            return None
+        body = body[0].body
+    node = body[0] if len(body) == 1 else None
+    if not isinstance(node, _FUNCTION_TYPES):
+        return None
+    return ast.increment_lineno(node, line_offset)
+
+
+def _find_code(code: types.CodeType, path: tuple[str, ...]) -> types.CodeType | None:
+    """Return code object of the (unique) definition at path (e.g. `("Class", "method")`), or None."""
+    for name in path:
+        matches = [const for const in code.co_consts if isinstance(const, types.CodeType) and const.co_name == name]
+        if len(matches) != 1:
+            return None
+        code = matches[0]
+    return code
+
+
+def _compile_definition(
+    future: list[ast.stmt], path: tuple[str, ...], node: FunctionNode, filename: str
+) -> types.CodeType | None:
+    """Compile a single function on its own, returning its code object.
+
+    The function is wrapped in (empty) classes named after the classes it is defined in, so that its qualified name,
+    private name mangling and `__class__` cell are the same as when compiling the whole module.
+    """
+    wrapped: ast.stmt = node
+    for name in reversed(path[:-1]):
+        wrapped = ast.copy_location(
+            ast.ClassDef(name=name, bases=[], keywords=[], body=[wrapped], decorator_list=[], **_CLASS_DEFAULTS), node
+        )
+    code = compile(ast.Module(body=[*future, wrapped], type_ignores=[]), filename, "exec", dont_inherit=True)
+    return _find_code(code, path)
+
+
+def _find_function(namespace: ty.Mapping[str, ty.Any], path: tuple[str, ...]) -> types.FunctionType | None:
+    """Return the live function object defined at path, or None."""
+    for name in path[:-1]:
+        cls = namespace.get(name)
+        if not isinstance(cls, type):
+            return None
+        namespace = cls.__dict__
+    obj = namespace.get(path[-1])
+    if isinstance(obj, (staticmethod, classmethod)):
+        obj = obj.__func__
+    if not isinstance(obj, types.FunctionType) or obj.__code__.co_name != path[-1]:
+        return None
+    return obj
+
+
+# =======================================================================================================================
+# ReloadReport
+# =======================================================================================================================
+class ReloadReport:
+    """Outcome of reloading a module.
+
+    The time (seconds) spent in every phase is kept in `timings`: reading the file, compiling it (almost free if the
+    code was cached), executing the new module code, updating the existing objects in place and running the
+    `__xreload_after_reload_update__` hooks.
+    """
+
+    PHASES = ("read", "compile", "exec", "update", "callbacks")
+
+    def __init__(self, mod_name: str | None = None, mod_filename: str | None = None) -> None:
+        self.mod_name = mod_name
+        self.mod_filename = mod_filename
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+        self.found_change = False
+        # set when only the code of changed functions was replaced
+        self.partial = False
+        # number of functions that were compared with their new version, and how many of them were updated
+        self.functions_compared = 0
+        self.functions_patched = 0
+        # number of classes that were updated in place
+        self.classes_updated = 0
+        # names (qualified by their class) that were added, and that were skipped because their type changed
+        self.added: list[str] = []
+        self.skipped: list[str] = []
+        # module-level immutable values that were replaced (only with `update_immutables`)
+        self.updated: list[str] = []
+        self.exception: BaseException | None = None
+
+    def __repr__(self) -> str:
+        return f"ReloadReport({self.mod_name!r}, {self.summary()})"
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the module was reloaded without errors."""
+        return self.exception is None
+
+    @property
+    def duration(self) -> float:
+        """Return total time spent reloading the module (seconds)."""
+        return sum(self.timings.values())
+
+    def summary(self) -> str:
+        """Return a one line description of the reload."""
+        parts = [
+            "partial" if self.partial else "full",
+            f"changed={self.found_change}",
+            f"patched {self.functions_patched} of {self.functions_compared} functions",
+            f"updated {self.classes_updated} classes",
+        ]
+        if self.added:
+            parts.append(f"added {len(self.added)} names")
+        if self.updated:
+            parts.append(f"updated {', '.join(self.updated)}")
+        if self.skipped:
+            parts.append(f"skipped {', '.join(self.skipped)} (type changed)")
+        if self.exception is not None:
+            parts.append(f"error={self.exception!r}")
+        timings = ", ".join(f"{phase} {elapsed * 1000:.1f}ms" for phase, elapsed in self.timings.items())
+        return f"{', '.join(parts)}; {timings}"
 
 
 # =======================================================================================================================
 # xreload
 # =======================================================================================================================
-def xreload(mod):
+def xreload(
+    mod: types.ModuleType, partial: bool = False, report: bool = False, update_immutables: bool = False
+) -> bool | ReloadReport:
     """Reload a module in place, updating classes, methods and functions.
 
     mod: a module object
+    partial: only replace code of functions whose bodies changed, if nothing else changed
+    report: return the `ReloadReport` of the reload
+    update_immutables: replace module-level immutable values (numbers, strings, tuples, ...) whose value changed
 
-    Returns a boolean indicating whether a change was done.
+    Returns a boolean indicating whether a change was done (or the `ReloadReport`, if `report` is set).
     """
-    r = Reload(mod)
+    r = Reload(mod, partial=partial, update_immutables=update_immutables)
     r.apply()
-    found_change = r.found_change
-    r = None
+    result = r.report if report else r.found_change
+    del r
     # pydevd_dont_trace.clear_trace_filter_cache()
-    return found_change
+    return result
 
 
-# This isn't actually used... Initially I planned to reload variables which are immutable on the
-# namespace, but this can destroy places where we're saving state, which may not be what we want,
-# so, we're being conservative and giving the user hooks if he wants to do a reload.
-#
-# immutable_types = [int, str, float, tuple] #That should be common to all Python versions
-#
-# for name in 'long basestr unicode frozenset'.split():
-#     try:
-#         immutable_types.append(__builtins__[name])
-#     except:
-#         pass #Just ignore: not all python versions are created equal.
-# immutable_types = tuple(immutable_types)
+# Module-level variables of these types are only replaced if `update_immutables` is set: replacing them can destroy
+# places where we're saving state, which may not be what we want, so by default we're being conservative and giving
+# the user hooks if he wants to do a reload.
+IMMUTABLE_TYPES = (int, float, complex, bool, str, bytes, tuple, frozenset, type(None))
 
 
 # =======================================================================================================================
 # Reload
 # =======================================================================================================================
 class Reload:
-    def __init__(self, mod, mod_name=None, mod_filename=None):
+    def __init__(
+        self,
+        mod: types.ModuleType,
+        mod_name: str | None = None,
+        mod_filename: str | None = None,
+        partial: bool = False,
+        update_immutables: bool = False,
+    ) -> None:
         self.mod = mod
+        self.partial = partial
+        self.update_immutables = update_immutables
+        # set when only the code of changed functions was replaced
+        self.partial_applied = False
+        self.mod_name: str | None
         if mod_name:
             self.mod_name = mod_name
         else:
             self.mod_name = mod.__name__ if mod is not None else None
 
+        self.mod_filename: str | None
         if mod_filename:
             self.mod_filename = mod_filename
         else:
             self.mod_filename = mod.__file__ if mod is not None else None
 
         self.found_change = False
+        # number of functions that were compared with their new version, and how many of them were updated
+        self.compared = 0
+        self.patched = 0
+        self.report = ReloadReport(self.mod_name, self.mod_filename)
+
+    def apply(self, source: bytes | None = None) -> ReloadReport:
+        """Reload the module, optionally from its already read contents (`source`), e.g. compiled in a worker thread.
 
-    def apply(self):
+        Returns the `ReloadReport` (also available as `report`).
+        """
         mod = self.mod
-        self._on_finish_callbacks = []
+        report = self.report
+        self._on_finish_callbacks: list[ty.Callable[[], object]] = []
         try:
+            if not self.mod_filename:
+                raise ValueError(f"Module {self.mod_name!r} has no file to reload from")
+            if source is None:
+                start = time.perf_counter()
+                with open(self.mod_filename, "rb") as f:
+                    source = f.read()
+                report.timings["read"] = time.perf_counter() - start
+            if self.partial and self._apply_partial(source):
+                return report
+
             # Get the module namespace (dict) early; this is part of the type check
             modns = mod.__dict__
 
@@ -245,6 +720,11 @@ class Reload:
                 except NameError:
                     raise  # Ok if not there.
 
+            # needed to resolve relative imports (and `__path__` to import submodules of packages)
+            for name in ("__package__", "__spec__", "__path__", "__loader__"):
+                if name in modns:
+                    new_namespace[name] = modns[name]
+
             if self.mod_name:
                 new_namespace["__name__"] = self.mod_name
                 if new_namespace["__name__"] == "__main__":
@@ -253,8 +733,15 @@ class Reload:
                     # on a reload.
                     new_namespace["__name__"] = "__main_reloaded__"
 
-            execfile(self.mod_filename, new_namespace, new_namespace)
+            start = time.perf_counter()
+            code = code_cache.get_code(self.mod_filename, source)
+            report.timings["compile"] = time.perf_counter() - start
+            start = time.perf_counter()
+            exec(code, new_namespace, new_namespace)
+            report.timings["exec"] = time.perf_counter() - start
+
             # Now we get to the hard part
+            start = time.perf_counter()
             oldnames = set(modns)
             newnames = set(new_namespace)
 
@@ -262,6 +749,7 @@ class Reload:
             for name in newnames - oldnames:
                 notify_info0("Added:", name, "to namespace")
                 self.found_change = True
+                report.added.append(name)
                 modns[name] = new_namespace[name]
 
             # Update in-place what we can
@@ -269,36 +757,125 @@ class Reload:
                 self._update(modns, name, modns[name], new_namespace[name])
 
             self._handle_namespace(modns)
+            report.timings["update"] = time.perf_counter() - start
 
-            for c in self._on_finish_callbacks:
-                c()
-            del self._on_finish_callbacks[:]
+            self._run_callbacks()
+            if self.partial:
+                _sources[self.mod_filename] = (source, None)
         except Exception as e:
+            report.exception = e
             print(f"Error reloading module: {e}")
             # pydev_log.exception()
-
-    def _handle_namespace(self, namespace, is_class_namespace=False):
-        on_finish = None
+        finally:
+            report.found_change = self.found_change
+            report.functions_compared = self.compared
+            report.functions_patched = self.patched
+            report.partial = self.partial_applied
+        return report
+
+    def _run_callbacks(self) -> None:
+        start = time.perf_counter()
+        for c in self._on_finish_callbacks:
+            c()
+        del self._on_finish_callbacks[:]
+        self.report.timings["callbacks"] = time.perf_counter() - start
+
+    def _apply_partial(self, source: bytes) -> bool:
+        """Replace the code of functions and methods whose bodies changed since the last reload.
+
+        The module is not executed again, so module-level side effects (registering plugins, building lookup tables,
+        ...) are not repeated. Returns False if this is not possible, e.g. if the module was not reloaded before or
+        anything other than function bodies changed, in which case the whole module has to be reloaded.
+        """
+        if not self.mod_filename:
+            return False
+        entry = _sources.get(self.mod_filename)
+        if entry is None:
+            return False
+        old_source, index = entry
+        if old_source == source:
+            return True
+        begin = time.perf_counter()
+        index = index or _index_source(old_source)
+        text = _decode(source)
+        if index is None or text is None:
+            return False
+        new_lines = _lines(text)
+        old_lines, spans, future = index
+
+        # find the function every changed range of lines belongs to
+        starts = [span[1][0] for span in spans]
+        changed: dict[int, list[int]] = {}
+        for i1, i2, j1, j2 in _diff_lines(old_lines, new_lines):
+            first, last = (i1, i1) if i1 == i2 else (i1 + 1, i2)
+            i = bisect.bisect_right(starts, first) - 1
+            if i < 0 or last > spans[i][3][0]:
+                return False
+            changed.setdefault(i, []).append((j2 - j1) - (i2 - i1))
+
+        updates: list[tuple[types.FunctionType, types.CodeType, str | None]] = []
+        new_spans: list[Span] = []
+        offset = 0
+        for i, (path, start, body, end) in enumerate(spans):
+            if i not in changed:
+                start, body, end = ((line + offset, column) for line, column in (start, body, end))
+                new_spans.append((path, start, body, end))
+                continue
+            new_end = end[0] + offset + sum(changed[i])
+            node = _parse_definition(new_lines, start[0] + offset, new_end, start[0] + offset - 1, start[1] > 0)
+            offset = new_end - end[0]
+            if (
+                node is None
+                or node.name != path[-1]
+                or _start(node)[1] != start[1]
+                or _segment(old_lines, start, body) != _segment(new_lines, _start(node), _span(path, node)[2])
+                or not all(isinstance(d, ast.Name) and d.id in _PARTIAL_DECORATORS for d in node.decorator_list)
+            ):
+                return False
+            func = _find_function(self.mod.__dict__, path)
+            if func is None:
+                return False
+            try:
+                new_code = _compile_definition(future, path, node, self.mod_filename)
+            except (SyntaxError, ValueError):
+                # e.g. `nonlocal` of a name that is not defined, reported by the full reload
+                return False
+            if new_code is None or func.__code__.co_freevars != new_code.co_freevars:
+                return False
+            updates.append((func, new_code, ast.get_docstring(node, clean=sys.version_info >= (3, 13))))
+            new_spans.append(_span(path, node))
+        self.report.timings["compile"] = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for func, new_code, doc in updates:
+            notify_info0("Updated function code:", func)
+            func.__code__ = new_code
+            func.__doc__ = doc
+        self.compared = self.patched = len(updates)
+        self.found_change = bool(updates)
+        self.partial_applied = True
+        self._handle_namespace(self.mod.__dict__)
+        self.report.timings["update"] = time.perf_counter() - begin
+        self._run_callbacks()
+        _sources[self.mod_filename] = (source, (new_lines, new_spans, future))
+        return True
+
+    def _handle_namespace(self, namespace: ty.Any, is_class_namespace: bool = False) -> None:
+        # If a client wants to know about it, give him a chance.
         if is_class_namespace:
             xreload_after_update = getattr(namespace, "__xreload_after_reload_update__", None)
             if xreload_after_update is not None:
                 self.found_change = True
-
-                def on_finish():
-                    return xreload_after_update()
+                self._on_finish_callbacks.append(xreload_after_update)
 
         elif "__xreload_after_reload_update__" in namespace:
             xreload_after_update = namespace["__xreload_after_reload_update__"]
             self.found_change = True
+            self._on_finish_callbacks.append(functools.partial(xreload_after_update, namespace))
 
-            def on_finish():
-                return xreload_after_update(namespace)
-
-        if on_finish is not None:
-            # If a client wants to know about it, give him a chance.
-            self._on_finish_callbacks.append(on_finish)
-
-    def _update(self, namespace, name, oldobj, newobj, is_class_namespace=False):
+    def _update(
+        self, namespace: ty.Any, name: str, oldobj: ty.Any, newobj: ty.Any, is_class_namespace: bool = False
+    ) -> None:
         """Update oldobj, if possible in place, with newobj.
 
         If oldobj is immutable, this simply returns newobj.
@@ -318,6 +895,8 @@ class Reload:
                 # Cop-out: if the type changed, give up
                 if name not in ("__builtins__",):
                     notify_error(f"Type of: {name} (old: {type(oldobj)} != new: {type(newobj)}) changed... Skipping.")
+                    qualname = getattr(namespace, "__qualname__", None) if is_class_namespace else None
+                    self.report.skipped.append(f"{qualname}.{name}" if qualname else name)
                 return
 
             if isinstance(newobj, types.FunctionType):
@@ -336,15 +915,7 @@ class Reload:
                 self._update_staticmethod(oldobj, newobj)
                 return
 
-            if hasattr(types, "ClassType"):
-                classtype = (
-                    types.ClassType,
-                    type,
-                )  # object is not instance of types.ClassType.
-            else:
-                classtype = type
-
-            if isinstance(newobj, classtype):
+            if isinstance(newobj, type):
                 self._update_class(oldobj, newobj)
                 return
 
@@ -357,6 +928,14 @@ class Reload:
                 self._update_class(oldobj, newobj)
                 return
 
+            if self.update_immutables and not is_class_namespace and isinstance(newobj, IMMUTABLE_TYPES):
+                if oldobj != newobj:
+                    notify_info0("Updated value:", name)
+                    self.found_change = True
+                    self.report.updated.append(name)
+                    namespace[name] = newobj
+                return
+
             if namespace is not None:
                 # Check for the `__xreload_old_new__` protocol (don't even compare things
                 # as even doing a comparison may break things -- see: https://github.com/microsoft/debugpy/issues/615).
@@ -377,7 +956,7 @@ class Reload:
             print(f"Exception found when updating {name}. Proceeding for other items.. Error: {e}")
 
     # All of the following functions have the same signature as _update()
-    def _update_function(self, oldfunc, newfunc):
+    def _update_function(self, oldfunc: ty.Any, newfunc: ty.Any) -> ty.Any:
         """Update a function object."""
         oldfunc.__doc__ = newfunc.__doc__
         oldfunc.__dict__.update(newfunc.__dict__)
@@ -391,10 +970,12 @@ class Reload:
 
         old_code = getattr(oldfunc, attr_name)
         new_code = getattr(newfunc, attr_name)
+        self.compared += 1
         if not code_objects_equal(old_code, new_code):
             notify_info0("Updated function code:", oldfunc)
             setattr(oldfunc, attr_name, new_code)
             self.found_change = True
+            self.patched += 1
 
         try:
             oldfunc.__defaults__ = newfunc.__defaults__
@@ -403,16 +984,16 @@ class Reload:
 
         return oldfunc
 
-    def _update_method(self, oldmeth, newmeth):
+    def _update_method(self, oldmeth: ty.Any, newmeth: ty.Any) -> ty.Any:
         """Update a method object."""
         # XXX What if im_func is not a function?
         if hasattr(oldmeth, "im_func") and hasattr(newmeth, "im_func"):
-            self._update(None, None, oldmeth.im_func, newmeth.im_func)
+            self._update(None, "", oldmeth.im_func, newmeth.im_func)
         elif hasattr(oldmeth, "__func__") and hasattr(newmeth, "__func__"):
-            self._update(None, None, oldmeth.__func__, newmeth.__func__)
+            self._update(None, "", oldmeth.__func__, newmeth.__func__)
         return oldmeth
 
-    def _update_class(self, oldclass, newclass):
+    def _update_class(self, oldclass: ty.Any, newclass: ty.Any) -> None:
         """Update a class object."""
         olddict = oldclass.__dict__
         newdict = newclass.__dict__
@@ -420,10 +1001,12 @@ class Reload:
         oldnames = set(olddict)
         newnames = set(newdict)
 
+        self.report.classes_updated += 1
         for name in newnames - oldnames:
             setattr(oldclass, name, newdict[name])
             notify_info0("Added:", name, "to", oldclass)
             self.found_change = True
+            self.report.added.append(f"{oldclass.__qualname__}.{name}")
 
         # Note: not removing old things...
         # for name in oldnames - newnames:
@@ -446,20 +1029,20 @@ class Reload:
 
         self._handle_namespace(oldclass, is_class_namespace=True)
 
-    def _update_classmethod(self, oldcm, newcm):
+    def _update_classmethod(self, oldcm: ty.Any, newcm: ty.Any) -> None:
         """Update a classmethod update."""
         # While we can't modify the classmethod object itself (it has no
         # mutable attributes), we *can* extract the underlying function
         # (by calling __get__(), which returns a method object) and update
         # it in-place.  We don't have the class available to pass to
         # __get__() but any object except None will do.
-        self._update(None, None, oldcm.__get__(0), newcm.__get__(0))
+        self._update(None, "", oldcm.__get__(0), newcm.__get__(0))
 
-    def _update_staticmethod(self, oldsm, newsm):
+    def _update_staticmethod(self, oldsm: ty.Any, newsm: ty.Any) -> None:
         """Update a staticmethod update."""
         # While we can't modify the staticmethod object itself (it has no
         # mutable attributes), we *can* extract the underlying function
         # (by calling __get__(), which returns it) and update it in-place.
         # We don't have the class available to pass to __get__() but any
         # object except None will do.
-        self._update(None, None, oldsm.__get__(0), newsm.__get__(0))
+        self._update(None, "", oldsm.__get__(0), newsm.__get__(0))
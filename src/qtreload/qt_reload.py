@@ -2,15 +2,11 @@
 
 from __future__ import annotations
 
-import importlib
 import typing as ty
 from contextlib import suppress
-from datetime import datetime
-from logging import getLogger
 from pathlib import Path
 
-from natsort import natsorted
-from qtpy.QtCore import QFileSystemWatcher, QModelIndex, Qt, Signal
+from qtpy.QtCore import QModelIndex, Qt, QTimer, Signal
 from qtpy.QtWidgets import (
     QAbstractItemView,
     QApplication,
@@ -19,31 +15,20 @@ from qtpy.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListView,
     QListWidget,
     QMainWindow,
+    QPlainTextEdit,
     QPushButton,
     QTabWidget,
-    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
-from superqt.utils import qthrottled
 
-from qtreload.pydevd_reload import xreload
-from qtreload.utilities import get_import_path, get_module_paths, path_to_module
-
-logger = getLogger(__name__)
-
-
-TIME_FMT = "%Y-%m-%d %H:%M:%S"
-
-PY_PATTERN = ("**/*.py",)
-PY_IGNORE_PATTERN = (
-    "**/__init__.py",
-    "**/_version.py",
-    "**/test_*.py",
-)
-STYLESHEET_PATTERN = ("**/*.qss",)
+from qtreload.engine import PY_IGNORE_PATTERN, PY_PATTERN, STYLESHEET_PATTERN, ReloadEngine
+from qtreload.log import LogRecord, LogSink
+from qtreload.models import FileFilterProxyModel, FileListModel
+from qtreload.utilities import PRUNE_PATTERN
 
 
 def get_main_window() -> QMainWindow | None:
@@ -57,10 +42,16 @@ def get_main_window() -> QMainWindow | None:
 
 
 class QtReloadWidget(QWidget):
-    """Reload Widget."""
+    """Reload Widget.
 
-    evt_pyfile = Signal(str)
+    The widget is a view of a `ReloadEngine` (available as `engine`), which does all the discovery, watching and
+    reloading.
+    """
+
+    # name of the reloaded module and its `ReloadReport`
+    evt_pyfile = Signal(str, object)
     evt_stylesheet = Signal()
+    evt_discovery_finished = Signal()
 
     def __init__(
         self,
@@ -70,24 +61,53 @@ class QtReloadWidget(QWidget):
         py_pattern: tuple[str, ...] = PY_PATTERN,
         ignore_py_pattern: tuple[str, ...] = PY_IGNORE_PATTERN,
         stylesheet_pattern: tuple[str, ...] = STYLESHEET_PATTERN,
-        log_func: ty.Callable[[str], None] | None = None,
+        log_func: ty.Callable[[LogRecord], None] | None = None,
+        use_cache: bool = False,
+        watch_mode: ty.Literal["files", "directories"] = "files",
+        prune_pattern: tuple[str, ...] = PRUNE_PATTERN,
+        use_gitignore: bool = False,
+        watcher_backend: ty.Literal["qt", "inotify", "polling"] = "qt",
+        skip_unchanged: bool = True,
+        reload_delay: int = 500,
+        reload_max_wait: int = 5000,
+        reload_dependents: bool = False,
+        partial_reload: bool = False,
+        log_capacity: int = 5000,
     ) -> None:
         super().__init__(parent=parent)
-
         if log_func is None:
 
-            def log_func(_: str) -> None:
+            def log_func(_: LogRecord) -> None:
                 return None
 
         self.log_func = log_func
-        # pattern information
-        self.py_pattern = py_pattern
-        self.ignore_py_pattern = ignore_py_pattern
-        self.stylesheet_pattern = stylesheet_pattern
+        # only the last `log_capacity` messages are kept, and they are displayed in batches
+        self._log_edit = QPlainTextEdit(self)
+        self.log_sink = LogSink(self._log_edit, log_capacity, parent=self)
         self.widgets = []
 
-        # setup file watcher
-        self._watcher = QFileSystemWatcher()
+        self.engine = ReloadEngine(
+            modules,
+            parent=self,
+            auto_connect=False,
+            py_pattern=py_pattern,
+            ignore_py_pattern=ignore_py_pattern,
+            stylesheet_pattern=stylesheet_pattern,
+            log_func=self._on_log_record,
+            use_cache=use_cache,
+            watch_mode=watch_mode,
+            prune_pattern=prune_pattern,
+            use_gitignore=use_gitignore,
+            watcher_backend=watcher_backend,
+            skip_unchanged=skip_unchanged,
+            reload_delay=reload_delay,
+            reload_max_wait=reload_max_wait,
+            reload_dependents=reload_dependents,
+            partial_reload=partial_reload,
+        )
+        self.engine.evt_pyfile.connect(self.evt_pyfile)
+        self.engine.evt_stylesheet.connect(self.evt_stylesheet)
+        self.engine.evt_discovery_finished.connect(self.evt_discovery_finished)
 
         self._add_module_text = QLineEdit(self)
         self._add_module_text.editingFinished.connect(self.on_add_module)
@@ -121,6 +141,19 @@ class QtReloadWidget(QWidget):
         )
         self._py_ignore_pattern_text.editingFinished.connect(self.on_py_pattern_changed)
 
+        self._prune_pattern_text = QLineEdit(self)
+        self._prune_pattern_text.setText(", ".join(prune_pattern))
+        self._prune_pattern_text.setToolTip(
+            "Directories that are skipped entirely during discovery. Patterns without '/' match the directory name at"
+            " any depth. Use comma to separate. Spaces will be stripped."
+        )
+        self._prune_pattern_text.editingFinished.connect(self.on_py_pattern_changed)
+
+        self._use_gitignore = QCheckBox("Honor .gitignore files")
+        self._use_gitignore.setChecked(use_gitignore)
+        self._use_gitignore.setToolTip("Skip files and directories excluded by .gitignore files in the module.")
+        self._use_gitignore.stateChanged.connect(self.on_py_pattern_changed)
+
         self._stylesheet_pattern_text = QLineEdit(self)
         self._stylesheet_pattern_text.setText(", ".join(stylesheet_pattern))
         self._stylesheet_pattern_text.setToolTip(
@@ -142,16 +175,23 @@ class QtReloadWidget(QWidget):
         self._enable_widget_borders.setToolTip("Show borders around each widget in the app.")
         self._enable_widget_borders.stateChanged.connect(self.on_toggle_widget_borders)
 
-        self._log_edit = QTextEdit(self)
-        self._log_edit.setReadOnly(True)
-
         self._file_filter = QLineEdit(self)
         self._file_filter.setPlaceholderText("Filter files...")
         self._file_filter.setToolTip("Start typing to filter files in the list...")
-        self._file_filter.textChanged.connect(self.on_filter_changed)
         self._file_filter.editingFinished.connect(self.on_filter_changed)
-
-        self._files_list = QListWidget(self)
+        # filter once typing paused, rather than on every keystroke
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self.on_filter_changed)
+        self._file_filter.textChanged.connect(lambda _: self._filter_timer.start())
+
+        self._files_model = FileListModel(self)
+        self._files_proxy = FileFilterProxyModel(self)
+        self._files_proxy.setSourceModel(self._files_model)
+        self._files_list = QListView(self)
+        self._files_list.setUniformItemSizes(True)
+        self._files_list.setModel(self._files_proxy)
         self._files_list.doubleClicked.connect(self.on_double_click)
 
         files_tab = QWidget()
@@ -186,6 +226,9 @@ class QtReloadWidget(QWidget):
         layout.addWidget(self._py_pattern_text)
         layout.addWidget(QLabel("Python ignore pattern (comma separated)"))
         layout.addWidget(self._py_ignore_pattern_text)
+        layout.addWidget(QLabel("Directory prune pattern (comma separated)"))
+        layout.addWidget(self._prune_pattern_text)
+        layout.addWidget(self._use_gitignore)
         layout.addWidget(QLabel("Stylesheet pattern (comma separated)"))
         layout.addWidget(self._stylesheet_pattern_text)
         layout.addLayout(reload_btn_layout)
@@ -197,87 +240,76 @@ class QtReloadWidget(QWidget):
         main_layout.addLayout(layout)
         main_layout.addWidget(tabs, stretch=True)
 
-        # setup modules
-        modules_, paths = [], []
-        for module in modules:
-            if module in modules_:
-                continue
-            path = get_import_path(module)
-            if path:
-                modules_.append(module)
-                paths.append(path)
-                self._modules_list.addItem(module)
-                self.log_message(f"Watching for '{module}' changes in '{path}'")
-        self._modules = modules_
-        self._module_paths = paths
-        self.path_to_index_map: dict[str, int] = {}
-        if self._module_paths and auto_connect:
+        self._update_modules_list()
+        self.engine.evt_modules_changed.connect(self._update_modules_list)
+        self.engine.evt_files_changed.connect(self._on_files_changed)
+        if self.engine.modules and auto_connect:
             self.setup_paths()
 
+    @property
+    def is_discovering(self) -> bool:
+        """Return True while files are being discovered in the background."""
+        return self.engine.is_discovering
+
+    @property
+    def is_reloading(self) -> bool:
+        """Return True while changed files are being compiled in the background."""
+        return self.engine.is_reloading
+
     def register_widget(self, widget: QWidget) -> None:
         """Register a QWidget as a child widget."""
         self.widgets.append(widget)
 
     def replace_modules(self, modules: ty.Iterable[str]) -> None:
         """Replace the watched module list and refresh watched paths."""
-        deduplicated_modules: list[str] = []
-        deduplicated_paths: list[Path] = []
+        self.engine.replace_modules(modules)
+
+    def setup_paths(self, clear: bool = False, connect: bool = True) -> None:
+        """Setup paths."""
+        self.engine.setup_paths(clear=clear, connect=connect)
+
+    def get_module_path_for_path(self, path: str) -> Path:
+        """Map path to module."""
+        return self.engine.get_module_path_for_path(path)
+
+    def get_module_name_for_path(self, path: str) -> str:
+        """Map path to dotted module name."""
+        return self.engine.get_module_name_for_path(path)
+
+    def _update_modules_list(self) -> None:
         self._modules_list.clear()
+        self._modules_list.addItems(self.engine.modules)
 
-        for module in modules:
-            if module in deduplicated_modules:
-                continue
-            path = get_import_path(module)
-            if path is None:
-                self.log_message(f"Could not find path for the module '{module}'")
-                continue
-            deduplicated_modules.append(module)
-            deduplicated_paths.append(path)
-            self._modules_list.addItem(module)
-            self.log_message(f"Watching for '{module}' changes in '{path}'")
-
-        self._modules = deduplicated_modules
-        self._module_paths = deduplicated_paths
-        self.on_refresh_filelist()
+    def _on_files_changed(self, added: list[str], removed: list[str]) -> None:
+        """Update file list."""
+        self._files_model.remove_paths(removed)
+        self._files_model.add_paths(added)
 
     def on_double_click(self, index: QModelIndex) -> None:
         """Reload the module associated with the selected file."""
-        item = self._files_list.item(index.row())
-        self._reload_py(item.text())
+        self.engine.reload_path(index.data())
 
     def on_py_pattern_changed(self) -> None:
         """Update python pattern."""
         py_pattern = tuple(self._py_pattern_text.text().split(","))
-        self.py_pattern = tuple(py.strip() for py in py_pattern)
         ignore_py_pattern = tuple(self._py_ignore_pattern_text.text().split(","))
-        self.ignore_py_pattern = tuple(py.strip() for py in ignore_py_pattern)
-        self.on_refresh_filelist()
+        prune_pattern = tuple(self._prune_pattern_text.text().split(","))
+        self.engine.set_patterns(
+            py_pattern=tuple(py.strip() for py in py_pattern),
+            ignore_py_pattern=tuple(py.strip() for py in ignore_py_pattern),
+            prune_pattern=tuple(py.strip() for py in prune_pattern),
+            use_gitignore=self._use_gitignore.isChecked(),
+        )
 
     def on_stylesheet_pattern_changed(self) -> None:
         """Update stylesheet pattern."""
         stylesheet_pattern = tuple(self._stylesheet_pattern_text.text().split(","))
-        self.stylesheet_pattern = tuple(py.strip() for py in stylesheet_pattern)
-        self.on_refresh_filelist()
+        self.engine.set_patterns(stylesheet_pattern=tuple(py.strip() for py in stylesheet_pattern))
 
     def on_add_module(self) -> None:
         """Add new module to the list."""
-        module = self._add_module_text.text()
-        if not module:
-            self.log_message(f"The specified module '{module}' does not exist.")
-            return
-        if module in self._modules:
-            self.log_message(f"The module '{module}' is already in the list.")
-            return
-        path = get_import_path(module)
-        if not path:
-            self.log_message(f"Could not find path for the module '{module}'")
-            return
-        self.log_message(f"Watching for '{module}' changes in '{path}'")
-        self._modules.append(module)
-        self._module_paths.append(path)
-        self._modules_list.addItem(module)
-        self._add_module_text.clear()
-        self.on_refresh_filelist()
+        if self.engine.add_module(self._add_module_text.text()):
+            self._add_module_text.clear()
 
     def on_remove_module(self) -> None:
         """Remove module(s) from the list."""
@@ -285,98 +317,24 @@ class QtReloadWidget(QWidget):
         if not items:
             self.log_message("No modules selected.")
             return
-        indices = [self._modules_list.row(item) for item in items]
-        modules = [item.text() for item in items]
-        for index in sorted(indices, reverse=True):
-            self._modules_list.takeItem(index)
-            self._module_paths.pop(index)
-        for module in modules:
-            self._modules.remove(module)
-        self.on_refresh_filelist()
+        self.engine.remove_modules(item.text() for item in items)
 
     def on_refresh_filelist(self) -> None:
         """Refresh file list."""
-        self.setup_paths(clear=True, connect=False)
-
-    def setup_paths(self, clear: bool = False, connect: bool = True) -> None:
-        """Setup paths."""
-        if clear:
-            self._remove_filenames()
-        self._add_filenames()
-        if connect:
-            self._watcher.fileChanged.connect(self.on_reload_file)
+        self.engine.refresh()
 
     def on_filter_changed(self, text: str | None = None) -> None:
-        """Filter files in the list."""
-        text = self._file_filter.text().strip()
-        for row in range(self._files_list.count()):
-            item = self._files_list.item(row)
-            item.setHidden(text not in item.text() if text else False)
-
-    def _remove_filenames(self) -> None:
-        """Clear existing filenames."""
-        files = self._watcher.files()
-        if files:
-            self._watcher.removePaths(files)
-        directories = self._watcher.directories()
-        if directories:
-            self._watcher.removePaths(directories)
-        self.log_message(f"Removed {len(files)} files and {len(directories)} directories from watcher.")
-
-    def _add_filenames(self) -> None:
-        """Set paths."""
-        all_paths = []
-        mapping = {}
-        for i, module in enumerate(self._modules):
-            module_path = get_import_path(module)
-            if module_path:
-                paths = self._get_file_paths(module)
-                all_paths += paths
-                for _path in paths:
-                    mapping[_path] = i
-        self._set_paths(all_paths)
-        self.path_to_index_map = mapping
-
-    def _get_file_paths(self, module: str) -> list[str]:
-        """Get file paths."""
-        py_paths, qss_paths = get_module_paths(
-            module,
-            py_pattern=self.py_pattern,
-            ignore_py_pattern=self.ignore_py_pattern,
-            stylesheet_pattern=self.stylesheet_pattern,
-            log_func=self.log_func,
-        )
-        py = len(py_paths)
-        qss = len(qss_paths)
-        self.log_message(f"Found {py} python files and {qss} qss files '{module}'")
-        paths = py_paths + qss_paths
-        return [str(p) for p in paths]
-
-    def _set_paths(self, paths: list[str]) -> None:
-        self.log_message(f"Added {len(paths)} paths to watcher")
-        if paths:
-            self._watcher.addPaths(paths)
-        self._files_list.clear()
-        for path in natsorted(paths):
-            self._files_list.addItem(path)
-
-    def get_module_path_for_path(self, path: str) -> Path:
-        """Map path to module."""
-        index = self.path_to_index_map.get(path, None)
-        if index is None:
-            raise ValueError("Path not found in module paths")
-        return self._module_paths[index]
+        """Filter files in the list (case-insensitive)."""
+        self._filter_timer.stop()
+        self._files_proxy.set_filter_text(self._file_filter.text())
 
     def on_reload_py_files(self) -> None:
-        """Reload python files."""
-        for path in self._watcher.files():
-            if path.endswith(".py"):
-                self._reload_py(path)
+        """Reload python files whose contents changed since they were last reloaded (or discovered)."""
+        self.engine.reload_py_files()
 
     def on_reload_stylesheet_files(self) -> None:
         """Reload all stylesheet files."""
-        self.log_message("Reloading all stylesheet files...")
-        self.evt_stylesheet.emit()
+        self.engine.reload_stylesheet_files()
 
     def on_toggle_widget_borders(self, state: int) -> None:
         """Toggle widget borders."""
@@ -400,38 +358,18 @@ class QtReloadWidget(QWidget):
                 widget.setStyleSheet(stylesheet)
         self.log_message(f"Toggled widget borders (state={state})")
 
-    @qthrottled(timeout=500, leading=False)
     def on_reload_file(self, path: str) -> None:
-        """Reload all modules."""
-        self._reload_file(path)
-
-    def _reload_file(self, path: str) -> None:
-        if path.endswith(".py"):
-            self._reload_py(path)
-        elif path.endswith(".qss"):
-            self._reload_qss(path)
-
-    def _reload_py(self, path: str) -> None:
-        try:
-            module = path_to_module(path, self.get_module_path_for_path(path))
-            res = xreload(importlib.import_module(module))
-            self.log_message(f"'{module}' (changed={res})")
-            self.evt_pyfile.emit(module)
-        except Exception as e:
-            self.log_message(f"failed to reload '{path}' Error={e}...")
-
-    def _reload_qss(self, path: str) -> None:
-        self.evt_stylesheet.emit()
-        self.log_message(f"'{Path(path).name}' changed")
+        """Queue changed file, which is reloaded together with other files that changed around the same time."""
+        self.engine.on_reload_file(path)
+
+    def _on_log_record(self, record: LogRecord) -> None:
+        with suppress(RuntimeError):
+            self.log_sink.append(record)
+        self.log_func(record)
 
     def log_message(self, msg: str) -> None:
         """Log message."""
-        now = datetime.now().strftime(TIME_FMT)
-        msg = f"{now} - {msg}"
-        with suppress(Exception):
-            self._log_edit.append(msg)
-        logger.debug(msg)
-        self.log_func(msg)
+        self.engine.log_message(msg)
 
 
 class QtDevPopup(QDialog):
@@ -0,0 +1,111 @@
+"""Coalescing reload queue."""
+
+from __future__ import annotations
+
+import time
+import typing as ty
+from logging import getLogger
+
+from qtpy.QtCore import QObject, QTimer, Signal  # type: ignore[attr-defined]
+
+logger = getLogger(__name__)
+
+
+class ReloadScheduler(QObject):
+    """Collect distinct changed paths and hand them over in a single batch once no change arrived for `delay` ms.
+
+    Unlike a throttle, no path is ever dropped: saving several files at once (e.g. "save all" in an IDE) reloads every
+    one of them. Paths of a batch are ordered by `sort_key`, so that the reload order does not depend on the order in
+    which the events arrived. Changes that keep arriving (e.g. a tool rewriting files in a loop) would keep restarting
+    the quiet window, so queued paths are handed over at the latest `max_wait` ms after the first of them arrived
+    (`max_wait=0` waits indefinitely).
+
+    The size of every batch and the time (seconds) `callback` took to handle it are reported through
+    `evt_batch_finished`. Callbacks that hand the batch over to a worker report the time of the actual reload
+    themselves, see `ReloadEngine.evt_reload_finished`.
+    """
+
+    evt_batch_finished = Signal(int, float)
+
+    def __init__(
+        self,
+        callback: ty.Callable[[list[str]], None],
+        delay: int = 500,
+        sort_key: ty.Callable[[str], ty.Any] | None = None,
+        parent: QObject | None = None,
+        max_wait: int = 5000,
+    ):
+        super().__init__(parent)
+        self._callback = callback
+        self._sort_key = sort_key
+        # dict keeps paths unique while preserving the order in which they arrived
+        self._pending: dict[str, None] = {}
+        self.last_batch_size = 0
+        self.last_batch_duration = 0.0
+        self.max_queue_depth = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self.flush)
+        # started by the first queued path and not restarted by the following ones
+        self._max_timer = QTimer(self)
+        self._max_timer.setSingleShot(True)
+        self._max_timer.setInterval(max_wait)
+        self._max_timer.timeout.connect(self.flush)
+
+    @property
+    def delay(self) -> int:
+        """Return quiet window (ms)."""
+        return self._timer.interval()
+
+    @delay.setter
+    def delay(self, delay: int) -> None:
+        self._timer.setInterval(delay)
+
+    @property
+    def max_wait(self) -> int:
+        """Return longest time (ms) a queued path waits for the quiet window."""
+        return self._max_timer.interval()
+
+    @max_wait.setter
+    def max_wait(self, max_wait: int) -> None:
+        self._max_timer.setInterval(max_wait)
+
+    @property
+    def queue_depth(self) -> int:
+        """Return number of paths waiting to be reloaded."""
+        return len(self._pending)
+
+    def schedule(self, path: str) -> None:
+        """Queue path, restarting the quiet window."""
+        if not self._pending and self.max_wait > 0:
+            self._max_timer.start()
+        self._pending[path] = None
+        self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+        self._timer.start()
+
+    def cancel(self) -> None:
+        """Drop all queued paths."""
+        self._timer.stop()
+        self._max_timer.stop()
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Reload queued paths immediately."""
+        self._timer.stop()
+        self._max_timer.stop()
+        if not self._pending:
+            return
+        paths = list(self._pending)
+        self._pending.clear()
+        if self._sort_key is not None:
+            paths.sort(key=self._sort_key)
+        start = time.perf_counter()
+        try:
+            self._callback(paths)
+        finally:
+            self.last_batch_size = len(paths)
+            self.last_batch_duration = time.perf_counter() - start
+            logger.debug("Reloaded batch of %d paths in %.1fms", len(paths), self.last_batch_duration * 1000)
+            self.evt_batch_finished.emit(self.last_batch_size, self.last_batch_duration)
@@ -3,65 +3,400 @@
 from __future__ import annotations
 
 import importlib.util
+import os
+import re
 import sys
 import typing as ty
 from importlib.machinery import ModuleSpec
 from pathlib import Path
 
+from qtreload.cache import DiscoveryCache
+
 IS_WIN = sys.platform == "win32"
 
+# directories that are never descended into during discovery (patterns without '/' match the name at any depth)
+PRUNE_PATTERN = (
+    "__pycache__",
+    ".git",
+    ".hg",
+    ".svn",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "node_modules",
+    "build",
+    "dist",
+    "*.egg-info",
+)
+# pruned directories that are walked anyway if they are packages (e.g. `mypkg/build/__init__.py`)
+PRUNE_UNLESS_PACKAGE = ("build", "dist")
+
+# wildcard, single character or character class (e.g. '[!ab]') in a glob pattern
+_GLOB_TOKEN = re.compile(r"\*|\?|\[!?\]?[^\]]*\]")
+
 
 def noop(msg: str) -> None:
     """No operation."""
     pass
 
 
-def _get_paths_for_pattern(path: Path, patterns: tuple[str, ...], log_func: ty.Callable = noop) -> list[Path]:
-    paths = []
-    for pattern in patterns:
+def _translate_part(part: str) -> str:
+    """Translate a single path component of a glob pattern into a regular expression."""
+    res, position = [], 0
+    for match in _GLOB_TOKEN.finditer(part):
+        res.append(re.escape(part[position : match.start()]))
+        wildcard = match.group()
+        if wildcard == "*":
+            res.append("[^/]*")
+        elif wildcard == "?":
+            res.append("[^/]")
+        else:
+            chars = wildcard[1:-1].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            elif chars.startswith("^"):
+                chars = "\\" + chars
+            res.append(f"[{chars}]")
+        position = match.end()
+    res.append(re.escape(part[position:]))
+    return "".join(res)
+
+
+def _translate_pattern(pattern: str) -> str:
+    """Translate a `Path.glob` pattern into a regular expression matching relative POSIX paths.
+
+    `**` matches any number of directories; a trailing `**` matches every file below that point.
+    """
+    if not pattern or pattern.startswith(("/", "\\")) or Path(pattern).is_absolute():
+        raise ValueError(f"Unacceptable pattern: '{pattern}'")
+    parts = [part for part in pattern.replace("\\", "/").split("/") if part and part != "."]
+    if not parts:
+        raise ValueError(f"Unacceptable pattern: '{pattern}'")
+    res = []
+    for index, part in enumerate(parts):
+        is_last = index == len(parts) - 1
+        if part == "**":
+            res.append(".*" if is_last else "(?:.+/)?")
+        else:
+            res.append(_translate_part(part) + ("" if is_last else "/"))
+    return "".join(res)
+
+
+class PatternSet:
+    """Set of glob patterns compiled into a single regular expression."""
+
+    def __init__(self, patterns: ty.Iterable[str], log_func: ty.Callable = noop):
+        self.patterns = tuple(patterns)
+        regexes = []
+        for pattern in self.patterns:
+            try:
+                regexes.append(f"(?:{_translate_pattern(pattern)})")
+            except ValueError:
+                log_func(f"Pattern '{pattern}' is not valid.")
+        flags = re.IGNORECASE if IS_WIN else 0
+        self._regex = re.compile("|".join(regexes), flags) if regexes else None
+
+    def __bool__(self) -> bool:
+        """Return True if at least one pattern is valid."""
+        return self._regex is not None
+
+    def match(self, relative_path: str) -> bool:
+        """Check whether the relative POSIX path matches any of the patterns."""
+        return self._regex is not None and self._regex.fullmatch(relative_path) is not None
+
+
+def compile_prune_pattern(prune_pattern: tuple[str, ...], log_func: ty.Callable = noop) -> PatternSet:
+    """Compile prune patterns, where patterns without '/' match the directory name at any depth."""
+    patterns = []
+    for pattern in prune_pattern:
+        pattern = pattern.rstrip("/")
+        if pattern:
+            patterns.append(pattern if "/" in pattern else f"**/{pattern}")
+    return PatternSet(patterns, log_func)
+
+
+def is_pruned(prune: PatternSet, relative_path: str, directory: str) -> bool:
+    """Check whether a directory matching the prune patterns should be skipped.
+
+    Directories named like build output (`PRUNE_UNLESS_PACKAGE`) are only skipped if they are not packages.
+    """
+    if not prune.match(relative_path):
+        return False
+    name = os.path.basename(directory)
+    return name not in PRUNE_UNLESS_PACKAGE or not os.path.isfile(os.path.join(directory, "__init__.py"))
+
+
+class GitIgnore:
+    """Rules of a single `.gitignore` file, applied to paths below the directory it is in.
+
+    Supports the commonly used subset of the syntax: comments, negation (`!`), directory-only rules (trailing `/`),
+    anchored rules (containing `/`) and `*`, `?`, `[...]` and `**` wildcards. As in git, the last matching rule wins.
+    """
+
+    def __init__(self, prefix: str, lines: ty.Iterable[str]):
+        self.prefix = prefix
+        self.rules: list[tuple[re.Pattern, bool, bool]] = []
+        flags = re.IGNORECASE if IS_WIN else 0
+        for line in lines:
+            line = line.rstrip("\r\n").rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            line = line.removeprefix("\\")
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            pattern = line.lstrip("/") if "/" in line else f"**/{line}"
+            try:
+                self.rules.append((re.compile(_translate_pattern(pattern), flags), negate, dir_only))
+            except ValueError:
+                continue
+
+    @classmethod
+    def from_file(cls, path: str, prefix: str) -> GitIgnore:
+        """Load rules from a `.gitignore` file."""
         try:
-            files = list(path.glob(pattern))
-            paths.extend(files)
-        except ValueError:
-            log_func(f"Pattern '{pattern}' is not valid.")
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return cls(prefix, f.readlines())
+        except OSError:
+            return cls(prefix, [])
 
-    # remove duplicate entries
-    paths = list(set(paths))
-    return paths
+    def match(self, relative_path: str, is_dir: bool) -> bool | None:
+        """Return True/False if the path is ignored/re-included by these rules, or None if no rule applies."""
+        if not relative_path.startswith(self.prefix):
+            return None
+        relative_path = relative_path[len(self.prefix) :]
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if (is_dir or not dir_only) and regex.fullmatch(relative_path):
+                result = not negate
+        return result
 
 
-def _resolve_spec_root(spec: ModuleSpec) -> Path | None:
-    """Resolve the root directory for a module spec."""
+def _is_git_ignored(relative_path: str, is_dir: bool, gitignores: tuple[GitIgnore, ...]) -> bool:
+    """Check path against `.gitignore` files, inner files taking precedence over outer ones."""
+    ignored = False
+    for gitignore in gitignores:
+        result = gitignore.match(relative_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _add_gitignore(
+    gitignores: tuple[GitIgnore, ...], directory: str, prefix: str, files: list[str], use_gitignore: bool
+) -> tuple[GitIgnore, ...]:
+    """Add rules of the directory's `.gitignore` file (if it has one) to the rules of its parents."""
+    if not use_gitignore or ".gitignore" not in files:
+        return gitignores
+    return (*gitignores, GitIgnore.from_file(os.path.join(directory, ".gitignore"), prefix))
+
+
+def _scan_directory(path: str) -> tuple[list[str], list[str]]:
+    """Return names of files and (non-symlinked) sub-directories in a directory."""
+    files, directories = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, directories
+
+
+def _list_directory(directory: str, prefix: str, cache: DiscoveryCache | None) -> tuple[list[str], list[str]]:
+    """Return names of files and sub-directories, taking them from the cache if available."""
+    if cache is None:
+        return _scan_directory(directory)
+    return cache.listdir(directory, prefix, _scan_directory)
+
+
+def walk_module_paths(
+    module_path: Path,
+    py_pattern: tuple[str, ...] = ("**/*.py",),
+    ignore_py_pattern: tuple[str, ...] = ("**/__init__.py", "**/test_*.py"),
+    stylesheet_pattern: tuple[str, ...] = ("**/*.qss",),
+    log_func: ty.Callable = noop,
+    cache: DiscoveryCache | None = None,
+    prune_pattern: tuple[str, ...] = PRUNE_PATTERN,
+    use_gitignore: bool = False,
+) -> tuple[list[Path], list[Path]]:
+    """Walk the module directory once and return python and stylesheet paths.
+
+    All pattern sets are compiled ahead of time and every file is checked against them during a single
+    `os.scandir` walk, rather than running a recursive glob for every pattern. If `cache` is provided, listings of
+    directories whose modification time did not change are taken from it instead of being scanned again.
+
+    Directories matching `prune_pattern`, virtual environments and, if `use_gitignore` is True, anything excluded by
+    `.gitignore` files found below the module directory are skipped without being walked.
+    """
+    include = PatternSet(py_pattern, log_func)
+    ignore = PatternSet(ignore_py_pattern, log_func)
+    stylesheet = PatternSet(stylesheet_pattern, log_func)
+    prune = compile_prune_pattern(prune_pattern, log_func)
+
+    py_paths: list[Path] = []
+    qss_paths: list[Path] = []
+    if not include and not stylesheet:
+        return py_paths, qss_paths
+
+    stack: list[tuple[str, str, tuple[GitIgnore, ...]]] = [(str(module_path), "", ())]
+    while stack:
+        directory, prefix, gitignores = stack.pop()
+        files, directories = _list_directory(directory, prefix, cache)
+        if prune and prefix and "pyvenv.cfg" in files:
+            continue
+        gitignores = _add_gitignore(gitignores, directory, prefix, files, use_gitignore)
+        for name in files:
+            relative_path = prefix + name
+            if _is_git_ignored(relative_path, False, gitignores):
+                continue
+            if include.match(relative_path) and not ignore.match(relative_path):
+                py_paths.append(Path(directory, name))
+            if stylesheet.match(relative_path):
+                qss_paths.append(Path(directory, name))
+        for name in directories:
+            relative_path = prefix + name
+            path = os.path.join(directory, name)
+            if not is_pruned(prune, relative_path, path) and not _is_git_ignored(relative_path, True, gitignores):
+                stack.append((path, f"{relative_path}/", gitignores))
+    return py_paths, qss_paths
+
+
+def _resolve_spec_roots(spec: ModuleSpec) -> list[Path]:
+    """Resolve all root directories for a module spec.
+
+    Namespace packages (PEP 420) can be split across several directories, in which case all of them are returned.
+    """
     if spec.origin is not None:
-        return Path(spec.origin).parent
+        return [Path(spec.origin).parent]
+    return list(dict.fromkeys(Path(location) for location in spec.submodule_search_locations or ()))
 
-    search_locations = spec.submodule_search_locations
-    if not search_locations:
-        return None
 
-    search_paths = [Path(location) for location in search_locations]
-    if len(search_paths) != 1:
+def _resolve_spec_root(spec: ModuleSpec) -> Path | None:
+    """Resolve the root directory for a module spec, returning None if there is more than one."""
+    roots = _resolve_spec_roots(spec)
+    return roots[0] if len(roots) == 1 else None
+
+
+def _find_spec(module: str) -> ModuleSpec | None:
+    """Find module spec without importing any of the parent packages.
+
+    `importlib.util.find_spec` imports the parent package of dotted names (executing its `__init__`). Instead, the
+    parent spec is located first and its search locations are passed to the meta path finders directly.
+    """
+    parent, _, _ = module.rpartition(".")
+    if not parent or module in sys.modules:
+        return importlib.util.find_spec(module)
+
+    if parent in sys.modules:
+        search_locations = getattr(sys.modules[parent], "__path__", None)
+    else:
+        parent_spec = _find_spec(parent)
+        search_locations = parent_spec.submodule_search_locations if parent_spec else None
+    if search_locations is None:
         return None
-    return search_paths[0]
+    for finder in sys.meta_path:
+        find_spec = getattr(finder, "find_spec", None)
+        if find_spec is None:
+            continue
+        spec: ModuleSpec | None = find_spec(module, list(search_locations))
+        if spec is not None:
+            return spec
+    return None
 
 
-def get_import_path(module: str) -> Path | None:
-    """Get the module path."""
+def _get_spec(module: str) -> ModuleSpec | None:
     try:
-        spec = importlib.util.find_spec(module)
-    except ValueError as e:
+        return _find_spec(module)
+    except (ImportError, ValueError) as e:
         raise ValueError(f"Module '{module}' not found.") from e
+
+
+def get_import_path(module: str) -> Path | None:
+    """Get the module path."""
+    spec = _get_spec(module)
     if spec is None:
         return None
     return _resolve_spec_root(spec)
 
 
+def get_import_paths(module: str) -> list[Path]:
+    """Get all module paths, which can be more than one for namespace packages."""
+    spec = _get_spec(module)
+    if spec is None:
+        return []
+    return _resolve_spec_roots(spec)
+
+
+# module name -> resolved module directories, only valid for as long as 'sys.path' does not change
+_module_root_cache: dict[str, tuple[Path, ...]] = {}
+# module name -> package that files in the module directories belong to, cached alongside the directories
+_module_package_cache: dict[str, str] = {}
+_module_root_cache_key: list[str] = []
+
+
+def get_module_roots(module: str) -> tuple[Path, ...]:
+    """Get the resolved module directories, memoized until `sys.path` changes.
+
+    Modules that could not be found are not cached, so that they can be found once they are created.
+    """
+    if _module_root_cache_key != sys.path:
+        clear_module_root_cache()
+        _module_root_cache_key[:] = sys.path
+    roots = _module_root_cache.get(module)
+    if roots is None:
+        spec = _get_spec(module)
+        if spec is None:
+            return ()
+        roots = tuple(dict.fromkeys(path.resolve() for path in _resolve_spec_roots(spec)))
+        if not roots:
+            return roots
+        _module_root_cache[module] = roots
+        # plain modules are watched through the directory they are in, which is the directory of their parent package
+        is_package = spec.submodule_search_locations is not None
+        _module_package_cache[module] = module if is_package else module.rpartition(".")[0]
+    return roots
+
+
+def get_module_package(module: str) -> str:
+    """Get the package the files in the module directories belong to.
+
+    This is the module itself for packages and its parent package (or an empty string) for plain modules.
+    """
+    get_module_roots(module)
+    return _module_package_cache.get(module, module)
+
+
+def get_module_root(module: str) -> Path | None:
+    """Get the resolved module directory, returning None if the module is not found or has multiple directories."""
+    roots = get_module_roots(module)
+    return roots[0] if len(roots) == 1 else None
+
+
+def clear_module_root_cache() -> None:
+    """Clear cache of module directories."""
+    _module_root_cache.clear()
+    _module_package_cache.clear()
+
+
 def get_path_for_module(module: str) -> Path:
     """Get the path for a module."""
-    module_path = get_import_path(module)
+    module_path = get_module_root(module)
     if module_path is None:
         raise ValueError(f"Module '{module}' not found.")
-    return module_path.resolve()
+    return module_path
 
 
 def get_module_paths(
@@ -70,12 +405,61 @@ def get_module_paths(
     ignore_py_pattern: tuple[str, ...] = ("**/__init__.py", "**/test_*.py"),
     stylesheet_pattern: tuple[str, ...] = ("**/*.qss",),
     log_func: ty.Callable = noop,
+    use_cache: bool = False,
+    prune_pattern: tuple[str, ...] = PRUNE_PATTERN,
+    use_gitignore: bool = False,
 ) -> tuple[list[Path], list[Path]]:
-    """Get module paths."""
-    module_path = get_path_for_module(module)
-    module_paths = get_py_module_paths(module_path, py_pattern, ignore_py_pattern, log_func)
-    stylesheet_paths = get_stylesheet_paths(module_path, stylesheet_pattern, log_func)
-    return module_paths, stylesheet_paths
+    """Get module paths.
+
+    If `use_cache` is True, directory listings are persisted in the user cache directory so that the next call only
+    rescans directories that changed in the meantime. Files of namespace packages are collected from all of their
+    directories.
+    """
+    roots = get_module_roots(module)
+    if not roots:
+        raise ValueError(f"Module '{module}' not found.")
+    py_paths: list[Path] = []
+    qss_paths: list[Path] = []
+    for module_path in roots:
+        py, qss = get_module_paths_for_path(
+            module_path,
+            py_pattern,
+            ignore_py_pattern,
+            stylesheet_pattern,
+            log_func,
+            use_cache,
+            prune_pattern=prune_pattern,
+            use_gitignore=use_gitignore,
+        )
+        py_paths.extend(py)
+        qss_paths.extend(qss)
+    return py_paths, qss_paths
+
+
+def get_module_paths_for_path(
+    module_path: Path,
+    py_pattern: tuple[str, ...] = ("**/*.py",),
+    ignore_py_pattern: tuple[str, ...] = ("**/__init__.py", "**/test_*.py"),
+    stylesheet_pattern: tuple[str, ...] = ("**/*.qss",),
+    log_func: ty.Callable = noop,
+    use_cache: bool = False,
+    prune_pattern: tuple[str, ...] = PRUNE_PATTERN,
+    use_gitignore: bool = False,
+) -> tuple[list[Path], list[Path]]:
+    """Get module paths for an already resolved module directory."""
+    patterns = (py_pattern, ignore_py_pattern, stylesheet_pattern)
+    if not use_cache:
+        return walk_module_paths(
+            module_path, *patterns, log_func, prune_pattern=prune_pattern, use_gitignore=use_gitignore
+        )
+
+    cache = DiscoveryCache.load(module_path, (*patterns, prune_pattern, ("gitignore",) if use_gitignore else ()))
+    paths = walk_module_paths(
+        module_path, *patterns, log_func, cache, prune_pattern=prune_pattern, use_gitignore=use_gitignore
+    )
+    cache.save()
+    log_func(f"Discovery cache for '{module_path}': {cache.hits} directories reused, {cache.misses} rescanned")
+    return paths
 
 
 def get_py_module_paths(
@@ -85,12 +469,7 @@ def get_py_module_paths(
     log_func: ty.Callable = noop,
 ) -> list[Path]:
     """Get module for python paths."""
-    # first, get all module paths
-    module_paths = _get_paths_for_pattern(module_path, py_pattern)
-    # second, get all 'ignored' paths
-    ignore_paths = _get_paths_for_pattern(module_path, ignore_py_pattern, log_func)
-    # remove ignored paths from module paths
-    module_paths = [path for path in module_paths if path not in ignore_paths]
+    module_paths, _ = walk_module_paths(module_path, py_pattern, ignore_py_pattern, (), log_func)
     return module_paths
 
 
@@ -98,11 +477,26 @@ def get_stylesheet_paths(
     module_path: Path, stylesheet_pattern: tuple[str, ...] = ("**/*.qss",), log_func: ty.Callable = noop
 ) -> list[Path]:
     """Get module paths."""
-    # third, get all stylesheet paths
-    stylesheet_paths = _get_paths_for_pattern(module_path, stylesheet_pattern, log_func)
+    _, stylesheet_paths = walk_module_paths(module_path, (), (), stylesheet_pattern, log_func)
     return stylesheet_paths
 
 
+def get_module_name(package: str, module_path: Path | str, path: str) -> str | None:
+    """Return dotted module name of a python file discovered in `module_path`, the directory of `package`.
+
+    Unlike `path_to_module`, this does not touch the filesystem, as discovered paths are already relative to the
+    resolved module directory. Returns None for paths that are not python files inside the module directory. See
+    `get_module_package` for the package of a watched module.
+    """
+    root = str(module_path).rstrip(os.sep) + os.sep
+    if not path.startswith(root) or not path.endswith(".py"):
+        return None
+    parts = path[len(root) : -3].split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join([package, *parts] if package else parts)
+
+
 def path_to_module(path: str, module_path: Path) -> str:
     """Turn a module path into a module name."""
     module_root = module_path.parent.resolve()
@@ -0,0 +1,591 @@
+"""File watchers."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+import typing as ty
+import weakref
+from contextlib import suppress
+from logging import getLogger
+
+from qtpy.QtCore import QFileSystemWatcher, QObject, QTimer, Signal  # type: ignore[attr-defined]
+
+from qtreload import inotify
+
+logger = getLogger(__name__)
+
+WATCHER_BACKENDS = ("qt", "inotify", "polling")
+
+# pause between batches of the polling backend, and factor by which its interval grows while nothing changes
+POLL_TICK_INTERVAL = 0.01
+POLL_BACKOFF = 1.5
+
+# delays (ms) after which a file that disappeared from the `qt` backend is watched again, if it exists by then
+REWATCH_DELAYS = (25, 50, 100, 200, 400, 800, 1600)
+
+# (modification time, size) of a file
+Stat = tuple[int, int]
+
+
+class WatcherBackend(ty.Protocol):
+    """Interface of file watcher backends, matching the relevant subset of `QFileSystemWatcher`."""
+
+    # bound `Signal(str)`
+    fileChanged: ty.Any
+    directoryChanged: ty.Any
+
+    def files(self) -> list[str]:
+        """Return list of watched files."""
+
+    def directories(self) -> list[str]:
+        """Return list of watched directories."""
+
+    def addPaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Watch files and directories, returning the paths that could not be watched."""
+
+    def removePaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Stop watching files and directories, returning the paths that were not watched."""
+
+
+def create_watcher(backend: str = "qt", parent: QObject | None = None) -> WatcherBackend:
+    """Create file watcher backend.
+
+    Available backends are `qt` (`QFileSystemWatcher` that keeps watching atomically saved files), `inotify` (Linux
+    only, falls back to `qt` elsewhere) and `polling` (for network or container-mounted filesystems that do not deliver
+    change notifications).
+    """
+    if backend not in WATCHER_BACKENDS:
+        raise ValueError(f"Invalid watcher backend '{backend}'. Expected one of {WATCHER_BACKENDS}.")
+    if backend == "inotify":
+        if inotify.is_available():
+            return inotify.InotifyWatcher(parent)
+        logger.warning("The inotify watcher backend is not available, using 'qt' backend instead.")
+    if backend == "polling":
+        return PollingWatcher(parent)
+    return QtFileWatcher(parent)
+
+
+def _always(_: str) -> bool:
+    return True
+
+
+def scan_snapshot(directory: str) -> tuple[dict[str, Stat], list[str]]:
+    """Return `(mtime, size)` of every file in a directory, together with the names of its sub-directories."""
+    files: dict[str, Stat] = {}
+    directories: list[str] = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.name)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, directories
+
+
+class DirectorySnapshot:
+    """In-memory `(mtime, size)` snapshot of the files in a set of directories.
+
+    Diffing a directory against its previous snapshot turns a single directory-level notification into file-level
+    modified/added/deleted events.
+    """
+
+    def __init__(self, accept: ty.Callable[[str], bool] = _always):
+        self.accept = accept
+        # files that were registered or accepted, per directory
+        self.tracked: dict[str, set[str]] = {}
+        self._files: dict[str, dict[str, Stat]] = {}
+        self._directories: dict[str, set[str]] = {}
+
+    def __contains__(self, directory: str) -> bool:
+        """Return True if directory is part of the snapshot."""
+        return directory in self._files
+
+    def directories(self) -> list[str]:
+        """Return list of snapshot directories."""
+        return list(self._files)
+
+    def files(self) -> list[str]:
+        """Return list of tracked files."""
+        return [os.path.join(directory, name) for directory, names in self.tracked.items() for name in names]
+
+    def add_directory(self, directory: str) -> tuple[list[str], list[str]]:
+        """Take snapshot of directory, returning paths of files and sub-directories it contains."""
+        files, directories = scan_snapshot(directory)
+        self._files[directory] = files
+        self._directories[directory] = set(directories)
+        self.tracked.setdefault(directory, set())
+        file_paths = [os.path.join(directory, name) for name in files]
+        directory_paths = [os.path.join(directory, name) for name in directories]
+        return file_paths, directory_paths
+
+    def remove_directory(self, directory: str) -> None:
+        """Forget directory."""
+        self._files.pop(directory, None)
+        self._directories.pop(directory, None)
+        self.tracked.pop(directory, None)
+
+    def track(self, path: str) -> str | None:
+        """Track file, returning its directory if it was not part of the snapshot yet."""
+        directory, name = os.path.split(path)
+        is_new = directory not in self._files
+        if is_new:
+            self.add_directory(directory)
+        self.tracked[directory].add(name)
+        return directory if is_new else None
+
+    def untrack(self, path: str) -> str | None:
+        """Stop tracking file, returning its directory if no other file in it is tracked.
+
+        Files that were already reported as deleted are no longer tracked, so their directory stays in the snapshot
+        and files created there later are still noticed.
+        """
+        directory, name = os.path.split(path)
+        names = self.tracked.get(directory)
+        if names is None or name not in names:
+            return None
+        names.remove(name)
+        return directory if not names else None
+
+    def diff(self, directory: str) -> tuple[list[str], list[str], list[str], list[str]]:
+        """Rescan directory and return `(modified, added, deleted, new_directories)` since the last snapshot."""
+        if directory not in self._files:
+            return [], [], [], []
+        previous = self._files[directory]
+        previous_directories = self._directories[directory]
+        files, directories = scan_snapshot(directory)
+        self._files[directory] = files
+        self._directories[directory] = set(directories)
+        tracked = self.tracked[directory]
+
+        modified, added, deleted = [], [], []
+        for name, stat in files.items():
+            path = os.path.join(directory, name)
+            if name in tracked:
+                if previous.get(name) != stat:
+                    modified.append(path)
+            elif name not in previous and self.accept(path):
+                tracked.add(name)
+                added.append(path)
+        for name in [name for name in tracked if name not in files]:
+            tracked.discard(name)
+            deleted.append(os.path.join(directory, name))
+        new_directories = [os.path.join(directory, name) for name in directories if name not in previous_directories]
+        return modified, added, deleted, new_directories
+
+
+class DirectoryWatcher(QObject):
+    """Watch directories instead of individual files.
+
+    The API mirrors `QFileSystemWatcher`, but only the directories containing the watched files are registered with
+    the operating system. This keeps the number of OS watches (e.g. inotify watches on Linux) small and lets newly
+    created files be reported through `fileAdded` without refreshing the file list.
+
+    Files created in new sub-directories (if accepted by `accept_directory`) are reported too, and files accepted by
+    `accept` are tracked from then on.
+
+    `QFileSystemWatcher` does not report in-place writes to files inside a watched directory (only files being
+    created, removed or renamed), so the `qt` backend is replaced by `inotify` where it is available and by `polling`
+    elsewhere. Both report every write. The backend in use is available as `backend`.
+    """
+
+    fileChanged = Signal(str)
+    fileAdded = Signal(str)
+    fileRemoved = Signal(str)
+
+    def __init__(
+        self,
+        accept: ty.Callable[[str], bool] = _always,
+        accept_directory: ty.Callable[[str], bool] = _always,
+        parent: QObject | None = None,
+        backend: str = "qt",
+    ):
+        super().__init__(parent)
+        self._accept_directory = accept_directory
+        self._snapshot = DirectorySnapshot(accept)
+        if backend in ("qt", "inotify"):
+            backend = "inotify" if inotify.is_available() else "polling"
+        self.backend = backend
+        self._watcher = create_watcher(backend, self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+    def files(self) -> list[str]:
+        """Return list of watched files."""
+        return self._snapshot.files()
+
+    def directories(self) -> list[str]:
+        """Return list of watched directories."""
+        return self._watcher.directories()
+
+    def addPaths(self, paths: ty.Iterable[str]) -> None:
+        """Watch files (by watching their directories)."""
+        directories = [directory for path in paths if (directory := self._snapshot.track(path))]
+        if directories:
+            self._watcher.addPaths(directories)
+
+    def removePaths(self, paths: ty.Iterable[str]) -> None:
+        """Stop watching files (or directories)."""
+        directories = []
+        for path in paths:
+            if path in self._snapshot:
+                directories.append(path)
+            elif directory := self._snapshot.untrack(path):
+                directories.append(directory)
+        for directory in directories:
+            self._snapshot.remove_directory(directory)
+        if directories:
+            self._watcher.removePaths(directories)
+
+    def _watch_new_directory(self, directory: str) -> None:
+        """Start watching newly created directory and report its files."""
+        if not self._accept_directory(directory):
+            return
+        paths, directories = self._snapshot.add_directory(directory)
+        self._watcher.addPaths([directory])
+        for path in paths:
+            if self._snapshot.accept(path):
+                self._snapshot.track(path)
+                self.fileAdded.emit(path)
+        for sub_directory in directories:
+            self._watch_new_directory(sub_directory)
+
+    def _on_directory_changed(self, directory: str) -> None:
+        modified, added, deleted, new_directories = self._snapshot.diff(directory)
+        for path in deleted:
+            self.fileRemoved.emit(path)
+        for path in added:
+            self.fileAdded.emit(path)
+        for path in modified:
+            self.fileChanged.emit(path)
+        for new_directory in new_directories:
+            self._watch_new_directory(new_directory)
+        if not os.path.isdir(directory):
+            self.removePaths([directory])
+
+
+class QtFileWatcher(QFileSystemWatcher):
+    """`QFileSystemWatcher` that keeps watching files replaced by atomic saves.
+
+    Many editors save by writing a temporary file and renaming it over the original, after which `QFileSystemWatcher`
+    stops watching the path. Whenever a watched file changes, it is registered again, and if it does not exist (yet),
+    this is retried after each of `REWATCH_DELAYS`. Once it is back, `fileChanged` is emitted again, since its contents
+    were replaced. Only the affected file is touched, so the rest of the watch list is left alone.
+
+    Every file that was watched again is reported through `fileRewatched`.
+    """
+
+    fileRewatched = Signal(str)
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        # files that should be watched, whether or not `QFileSystemWatcher` still does
+        self._expected: set[str] = set()
+        # path -> (attempt, monotonic time of the next attempt)
+        self._retries: dict[str, tuple[int, float]] = {}
+        self.rewatched = 0
+
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._on_retry)
+        self.fileChanged.connect(self._on_file_changed)
+
+    def addPaths(self, paths: ty.Iterable[str]) -> list[str]:  # type: ignore[override]
+        """Watch files and directories, returning the paths that could not be watched."""
+        paths = list(paths)
+        failed = super().addPaths(paths) if paths else []
+        self._expected.update(paths)
+        # paths that are already watched are reported as failed too
+        self._expected.difference_update(path for path in failed if not os.path.exists(path))
+        return failed
+
+    def removePaths(self, paths: ty.Iterable[str]) -> list[str]:  # type: ignore[override]
+        """Stop watching files and directories, returning the paths that were not watched."""
+        paths = list(paths)
+        failed = super().removePaths(paths) if paths else []
+        # files waiting to be watched again are no longer watched by `QFileSystemWatcher`, but count as removed
+        pending = {path for path in paths if self._retries.pop(path, None) is not None}
+        self._expected.difference_update(paths)
+        return [path for path in failed if path not in pending]
+
+    def _on_file_changed(self, path: str) -> None:
+        if path not in self._expected or path in self._retries:
+            return
+        if os.path.isfile(path):
+            # adding the path only succeeds if the file was replaced, as files that are still watched are rejected
+            if not super().addPaths([path]):
+                self._on_rewatched(path)
+            return
+        self._retries[path] = (0, time.monotonic() + REWATCH_DELAYS[0] / 1000)
+        self._schedule_retry()
+
+    def _on_rewatched(self, path: str) -> None:
+        self.rewatched += 1
+        logger.debug("Watching '%s' again after it was replaced", path)
+        self.fileRewatched.emit(path)
+
+    def _schedule_retry(self) -> None:
+        if not self._retries:
+            return
+        due = min(due for _, due in self._retries.values())
+        self._retry_timer.start(max(0, int((due - time.monotonic()) * 1000)))
+
+    def _on_retry(self) -> None:
+        now = time.monotonic()
+        for path, (attempt, due) in list(self._retries.items()):
+            if due > now:
+                continue
+            if os.path.isfile(path):
+                del self._retries[path]
+                super().addPaths([path])
+                self._on_rewatched(path)
+                # the change was reported while the file was missing, so report it again now that it is back
+                self.fileChanged.emit(path)
+            elif attempt + 1 < len(REWATCH_DELAYS):
+                self._retries[path] = (attempt + 1, now + REWATCH_DELAYS[attempt + 1] / 1000)
+            else:
+                # the file was deleted for good
+                del self._retries[path]
+                self._expected.discard(path)
+                logger.debug("Stopped watching '%s' as it no longer exists", path)
+        self._schedule_retry()
+
+
+class _PollingRelay(QObject):
+    """Deliver polling results from worker threads to the GUI thread.
+
+    Worker threads only ever reference this (application-lifetime) object and never the watchers themselves, otherwise
+    the last reference to a watcher could be dropped, and the watcher destroyed, outside of the GUI thread.
+    """
+
+    evt_polled = Signal(object)
+
+
+_polling_relay: _PollingRelay | None = None
+_polling_keys = itertools.count(1)
+
+
+def _get_polling_relay() -> _PollingRelay:
+    """Get relay object, creating it on first use (must be called from the GUI thread)."""
+    global _polling_relay
+    if _polling_relay is None:
+        _polling_relay = _PollingRelay()
+    return _polling_relay
+
+
+class _PollingState:
+    """Watched paths and settings shared between a polling watcher and its worker thread."""
+
+    def __init__(self, min_interval: float, max_interval: float, max_entries: int):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.files: set[str] = set()
+        self.directories: set[str] = set()
+        # incremented whenever the watched paths change
+        self.version = 0
+        self.stop = threading.Event()
+        self.wake = threading.Event()
+
+    def update(self, files: set[str], directories: set[str]) -> None:
+        with self.lock:
+            self.files = files
+            self.directories = directories
+            self.version += 1
+        self.wake.set()
+
+    def get(self) -> tuple[int, set[str], set[str]]:
+        with self.lock:
+            return self.version, self.files, self.directories
+
+
+class _Poller:
+    """Stat watched directories in batches of at most `max_entries` entries (runs in a worker thread)."""
+
+    def __init__(self, state: _PollingState):
+        self.state = state
+        self.version = -1
+        self.files: set[str] = set()
+        self.directories: set[str] = set()
+        self.targets: set[str] = set()
+        self.snapshots: dict[str, tuple[dict[str, Stat], set[str]]] = {}
+        # directories still to be scanned in the current cycle
+        self.pending: list[str] = []
+        self.cycle_start = 0.0
+        self.cycle_entries = 0
+
+    def refresh(self) -> None:
+        """Pick up changes to the watched paths, scanning new directories first to take their baseline snapshot."""
+        version, files, directories = self.state.get()
+        if version == self.version:
+            return
+        self.version, self.files, self.directories = version, files, directories
+        self.targets = directories | {os.path.dirname(path) for path in files}
+        for directory in [directory for directory in self.snapshots if directory not in self.targets]:
+            del self.snapshots[directory]
+        self.pending.extend(directory for directory in self.targets if directory not in self.snapshots)
+
+    def tick(self) -> tuple[list[str], list[str], tuple[float, int] | None]:
+        """Scan the next batch of directories, returning changed files and directories, and cycle timing if done."""
+        if not self.pending:
+            self.pending = sorted(self.targets, reverse=True)
+            self.cycle_start = time.perf_counter()
+            self.cycle_entries = 0
+        files: list[str] = []
+        directories: list[str] = []
+        entries = 0
+        while self.pending and entries < self.state.max_entries:
+            directory = self.pending.pop()
+            if directory not in self.targets:
+                continue
+            current, sub_directories = scan_snapshot(directory)
+            entries += len(current) + len(sub_directories) + 1
+            previous = self.snapshots.get(directory)
+            self.snapshots[directory] = (current, set(sub_directories))
+            if previous is None or previous == self.snapshots[directory]:
+                continue
+            if directory in self.directories:
+                directories.append(directory)
+            for name in previous[0].keys() | current.keys():
+                path = os.path.join(directory, name)
+                if path in self.files and previous[0].get(name) != current.get(name):
+                    files.append(path)
+        self.cycle_entries += entries
+        cycle = None
+        if not self.pending:
+            cycle = (time.perf_counter() - self.cycle_start, self.cycle_entries)
+        return files, directories, cycle
+
+
+def _poll_loop(state: _PollingState, relay: _PollingRelay, key: int) -> None:
+    """Poll watched paths until stopped, backing off while nothing changes (runs in a worker thread)."""
+    poller = _Poller(state)
+    interval = state.min_interval
+    changed = False
+    while not state.stop.is_set():
+        poller.refresh()
+        if not poller.targets:
+            # nothing to watch, sleep until paths are added
+            state.wake.wait()
+            state.wake.clear()
+            continue
+        files, directories, cycle = poller.tick()
+        changed = changed or bool(files or directories)
+        if files or directories or cycle:
+            with suppress(RuntimeError):
+                relay.evt_polled.emit((key, files, directories, cycle))
+        if cycle is None:
+            # more directories to scan in this cycle, pause briefly to limit CPU usage
+            state.stop.wait(POLL_TICK_INTERVAL)
+            continue
+        interval = state.min_interval if changed else min(interval * POLL_BACKOFF, state.max_interval)
+        changed = False
+        state.wake.wait(interval)
+        state.wake.clear()
+
+
+def _stop_poller(state: _PollingState) -> None:
+    state.stop.set()
+    state.wake.set()
+
+
+class PollingWatcher(QObject):
+    """Watch files and directories by periodically comparing their `(mtime, size)`.
+
+    The API mirrors `QFileSystemWatcher`, but no notifications from the operating system are needed, which makes it
+    work on network (NFS, SSHFS) and container-mounted filesystems. Files are checked through their parent directories
+    using `os.scandir` in a worker thread. At most `max_entries_per_tick` entries are checked at a time, with a short
+    pause in between, to limit CPU usage. The interval between full cycles starts at `min_interval` and grows up to
+    `max_interval` while nothing changes, and drops back right after a change.
+
+    The duration of every cycle is reported through `cycleFinished` (seconds, number of entries).
+    """
+
+    fileChanged = Signal(str)
+    directoryChanged = Signal(str)
+    cycleFinished = Signal(float, int)
+
+    def __init__(
+        self,
+        parent: QObject | None = None,
+        min_interval: float = 0.1,
+        max_interval: float = 2.0,
+        max_entries_per_tick: int = 2000,
+    ):
+        super().__init__(parent)
+        self._files: set[str] = set()
+        self._directories: set[str] = set()
+        self.last_cycle_duration = 0.0
+
+        self._key = next(_polling_keys)
+        self._state = _PollingState(min_interval, max_interval, max_entries_per_tick)
+        relay = _get_polling_relay()
+        relay.evt_polled.connect(self._on_polled)
+        self._thread = threading.Thread(
+            target=_poll_loop, args=(self._state, relay, self._key), name="qtreload-polling", daemon=True
+        )
+        self._thread.start()
+        self._finalizer = weakref.finalize(self, _stop_poller, self._state)
+
+    def close(self) -> None:
+        """Stop the worker thread."""
+        self._finalizer()
+        self._thread.join()
+
+    def files(self) -> list[str]:
+        """Return list of watched files."""
+        return list(self._files)
+
+    def directories(self) -> list[str]:
+        """Return list of watched directories."""
+        return list(self._directories)
+
+    def addPaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Watch files and directories, returning the paths that could not be watched."""
+        failed = []
+        for path in paths:
+            if os.path.isdir(path):
+                self._directories.add(path)
+            elif os.path.isfile(path):
+                self._files.add(path)
+            else:
+                failed.append(path)
+        self._state.update(set(self._files), set(self._directories))
+        return failed
+
+    def removePaths(self, paths: ty.Iterable[str]) -> list[str]:
+        """Stop watching files and directories, returning the paths that were not watched."""
+        failed = []
+        for path in paths:
+            if path in self._directories:
+                self._directories.remove(path)
+            elif path in self._files:
+                self._files.remove(path)
+            else:
+                failed.append(path)
+        self._state.update(set(self._files), set(self._directories))
+        return failed
+
+    def _on_polled(self, result: tuple[int, list[str], list[str], tuple[float, int] | None]) -> None:
+        key, files, directories, cycle = result
+        if key != self._key:
+            return
+        for path in files:
+            if path in self._files:
+                self.fileChanged.emit(path)
+        for directory in directories:
+            if directory in self._directories:
+                self.directoryChanged.emit(directory)
+        if cycle is not None:
+            self.last_cycle_duration, entries = cycle
+            logger.debug("Polled %d entries in %.1fms", entries, self.last_cycle_duration * 1000)
+            self.cycleFinished.emit(*cycle)
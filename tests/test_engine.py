@@ -0,0 +1,130 @@
+import importlib
+
+from qtreload.engine import ReloadEngine
+
+
+def test_engine_headless(qtbot, tmp_path, monkeypatch):
+    """Test engine discovers and reloads files without constructing any widgets."""
+    from qtpy.QtWidgets import QApplication
+
+    package = tmp_path / "headless_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("def value():\n    return 1\n")
+    (package / "style.qss").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("headless_pkg.one")
+    paths = [str(package / "one.py"), str(package / "style.qss")]
+
+    widgets = len(QApplication.allWidgets())
+    records, changes = [], []
+    engine = ReloadEngine(["headless_pkg", "does_not_exist"], log_func=records.append)
+    engine.evt_files_changed.connect(lambda added, removed: changes.append((sorted(added), sorted(removed))))
+    assert engine.modules == ["headless_pkg"]
+    assert "Could not find path for the module 'does_not_exist'" in [record.message for record in records]
+    with qtbot.waitSignal(engine.evt_discovery_finished):
+        pass
+    assert sorted(engine.files) == paths
+    assert changes == [(paths, [])]
+
+    (package / "one.py").write_text("def value():\n    return 2\n")
+    with qtbot.waitSignal(engine.evt_pyfile) as blocker:
+        engine._reload_files([str(package / "one.py")])
+    assert blocker.args[0] == "headless_pkg.one"
+    assert blocker.args[1].ok
+    assert module.value() == 2
+    with qtbot.waitSignal(engine.evt_stylesheet):
+        engine.reload_stylesheet_files()
+
+    engine.remove_modules(["headless_pkg"])
+    assert engine.files == []
+    assert changes[-1] == ([], paths)
+    assert len(QApplication.allWidgets()) == widgets
+
+
+def test_engine_plain_submodule(qtbot, tmp_path, monkeypatch):
+    """Test files discovered for a plain (non-package) submodule are named relative to its parent package."""
+    package = tmp_path / "plain_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "mod.py").write_text("def value():\n    return 1\n")
+    (package / "other.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("plain_pkg.mod")
+
+    engine = ReloadEngine(["plain_pkg.mod"])
+    with qtbot.waitSignal(engine.evt_discovery_finished):
+        pass
+    assert engine.get_module_name_for_path(str(package / "mod.py")) == "plain_pkg.mod"
+    assert engine.get_module_name_for_path(str(package / "other.py")) == "plain_pkg.other"
+
+    (package / "mod.py").write_text("def value():\n    return 2\n")
+    with qtbot.waitSignal(engine.evt_pyfile) as blocker:
+        engine._reload_files([str(package / "mod.py")])
+    assert blocker.args[0] == "plain_pkg.mod"
+    assert module.value() == 2
+
+
+def test_reload_scheduler_max_wait(qtbot):
+    """Test queued paths are handed over after `max_wait` even if changes keep restarting the quiet window."""
+    import time
+
+    from qtreload.scheduler import ReloadScheduler
+
+    batches = []
+    scheduler = ReloadScheduler(batches.append, delay=200, max_wait=300)
+    start = time.perf_counter()
+    index = 0
+    while not batches and time.perf_counter() - start < 2:
+        scheduler.schedule(f"path_{index % 3}")
+        index += 1
+        qtbot.wait(20)
+    assert batches == [["path_0", "path_1", "path_2"]]
+    assert time.perf_counter() - start < 1
+    assert scheduler.queue_depth == 0
+    scheduler.cancel()
+
+
+def test_engine_first_change_partial(qtbot, tmp_path, monkeypatch):
+    """Test the first change of a method is applied as a partial reload, using the source read during discovery."""
+    package = tmp_path / "first_partial_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    source = "TOKEN = object()\n\n\nclass Widget:\n    def value(self):\n        return 1\n"
+    (package / "one.py").write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("first_partial_pkg.one")
+    token, widget = module.TOKEN, module.Widget()
+
+    engine = ReloadEngine(["first_partial_pkg"], partial_reload=True)
+    with qtbot.waitSignal(engine.evt_discovery_finished):
+        pass
+
+    (package / "one.py").write_text(source.replace("return 1", "return 2"))
+    with qtbot.waitSignal(engine.evt_pyfile) as blocker:
+        engine._reload_files([str(package / "one.py")])
+    assert blocker.args[1].partial
+    assert widget.value() == 2
+    assert module.TOKEN is token
+
+
+def test_engine_discovery_error(qtbot, tmp_path, monkeypatch, caplog):
+    """Test unexpected discovery errors are not reported as missing files, but discovery still finishes."""
+    from qtreload import engine as engine_module
+
+    package = tmp_path / "discovery_error_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def get_module_paths_for_path(*args, **kwargs):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(engine_module, "get_module_paths_for_path", get_module_paths_for_path)
+    records = []
+    engine = ReloadEngine(["discovery_error_pkg"], log_func=records.append)
+    with qtbot.waitSignal(engine.evt_discovery_finished):
+        pass
+    assert engine.files == []
+    assert not any("Failed to discover" in record.message for record in records)
+    qtbot.waitUntil(lambda: "TypeError: bug" in caplog.text)
@@ -0,0 +1,114 @@
+import pytest
+from qtreload.imports import ImportGraph, get_imports_for_paths, parse_imports
+
+SOURCE = """
+import os
+from typing import Any
+from . import sibling
+from .helpers import helper, CONSTANT
+from ..core import *
+
+try:
+    from pkg.optional import feature
+except ImportError:
+    pass
+
+
+def func():
+    from pkg.lazy import thing
+"""
+
+
+@pytest.mark.parametrize(
+    "module, is_package, expected",
+    [
+        (
+            "pkg.sub.mod",
+            False,
+            [
+                "pkg.core",
+                "pkg.optional",
+                "pkg.optional.feature",
+                "pkg.sub",
+                "pkg.sub.helpers",
+                "pkg.sub.helpers.CONSTANT",
+                "pkg.sub.helpers.helper",
+                "pkg.sub.sibling",
+                "typing",
+                "typing.Any",
+            ],
+        ),
+        (
+            "pkg.sub",
+            True,
+            [
+                "pkg.core",
+                "pkg.optional",
+                "pkg.optional.feature",
+                "pkg.sub",
+                "pkg.sub.helpers",
+                "pkg.sub.helpers.CONSTANT",
+                "pkg.sub.helpers.helper",
+                "pkg.sub.sibling",
+                "typing",
+                "typing.Any",
+            ],
+        ),
+    ],
+)
+def test_parse_imports(module, is_package, expected):
+    """Test only top-level `from` imports are collected and relative imports are resolved."""
+    assert parse_imports(SOURCE, module, is_package) == expected
+
+
+def test_parse_imports_invalid():
+    """Test invalid sources and relative imports beyond the top-level package are ignored."""
+    assert parse_imports("def (:", "pkg.mod") == []
+    assert parse_imports("from ... import x", "pkg.mod") == []
+
+
+def test_import_graph():
+    """Test dependents are found transitively and ordered after the modules they import from."""
+    graph = ImportGraph()
+    graph.set_imports("pkg.a", "a.py", [])
+    graph.set_imports("pkg.b", "b.py", ["pkg.a", "pkg.a.func"])
+    graph.set_imports("pkg.c", "c.py", ["pkg.b"])
+    graph.set_imports("pkg.d", "d.py", ["pkg.a", "pkg.c"])
+    graph.set_imports("pkg.e", "e.py", ["os"])
+
+    assert graph.get_dependents(["pkg.a"]) == ["pkg.b", "pkg.c", "pkg.d"]
+    assert graph.get_dependents(["pkg.c"]) == ["pkg.d"]
+    assert graph.get_dependents(["pkg.e"]) == []
+    assert graph.sort(["pkg.d", "pkg.c", "pkg.b", "pkg.a"]) == ["pkg.a", "pkg.b", "pkg.c", "pkg.d"]
+    assert graph.get_path("pkg.c") == "c.py"
+
+    # imports are replaced incrementally
+    graph.set_imports("pkg.c", "c.py", [])
+    assert graph.get_dependents(["pkg.b"]) == []
+    graph.remove("pkg.d")
+    assert graph.get_dependents(["pkg.a"]) == ["pkg.b"]
+    assert "pkg.d" not in graph
+
+    # cycles are added at the end
+    graph.set_imports("pkg.a", "a.py", ["pkg.b"])
+    assert graph.sort(["pkg.a", "pkg.b", "pkg.e"]) == ["pkg.e", "pkg.a", "pkg.b"]
+
+
+def test_get_imports_for_paths_with_cache(tmp_path, monkeypatch):
+    """Test imports of unchanged files are taken from the cache."""
+    from qtreload.cache import ImportCache
+
+    monkeypatch.setenv("QTRELOAD_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("qtreload.cache.RACY_INTERVAL_NS", -1)
+    root = tmp_path / "pkg"
+    root.mkdir()
+    (root / "one.py").write_text("from pkg.two import x\n")
+    (root / "two.py").write_text("x = 1\n")
+    names = {str(root / "one.py"): "pkg.one", str(root / "two.py"): "pkg.two", str(root / "style.qss"): None}
+
+    expected = {str(root / "one.py"): ["pkg.two", "pkg.two.x"], str(root / "two.py"): []}
+    assert get_imports_for_paths(names, root, use_cache=True) == expected
+    cache = ImportCache.load(root)
+    assert get_imports_for_paths(names, root) == expected
+    assert cache.get_imports(str(root / "one.py"), lambda path: []) == ["pkg.two", "pkg.two.x"]
+    assert (cache.hits, cache.misses) == (1, 0)
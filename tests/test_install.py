@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# modules that must not be imported unless hot-reload is enabled
+HEAVY_MODULES = (
+    "qtpy",
+    "PyQt5",
+    "PyQt6",
+    "PySide2",
+    "PySide6",
+    "superqt",
+    "natsort",
+    "qtreload.engine",
+    "qtreload.qt_reload",
+    "qtreload.pydevd_reload",
+    "qtreload.utilities",
+    "qtreload.watcher",
+)
+
+
+def _get_import_times(code: str) -> dict[str, int]:
+    """Run code with `-X importtime` in a fresh interpreter and return cumulative import time (us) of every module."""
+    env = {**os.environ, "QTRELOAD_HOT_RELOAD": "0"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import qtreload",
+        "from qtreload import install_hot_reload; assert install_hot_reload() is None",
+    ],
+)
+def test_disabled_hot_reload_import_time(code):
+    """Test importing qtreload and installing disabled hot-reload does not import Qt or the reload machinery."""
+    times = _get_import_times(code)
+    assert "qtreload" in times
+    heavy = [name for name in times if name.split(".")[0] in HEAVY_MODULES or name in HEAVY_MODULES]
+    assert heavy == [], f"Imported {heavy} (qtreload took {times['qtreload']} us)"
+
+
+def test_invalid_watcher_backend(qtbot, monkeypatch, caplog):
+    """Test an invalid watcher backend falls back to the default one instead of failing to start."""
+    from qtreload import install
+
+    monkeypatch.setenv("QTRELOAD_HOT_RELOAD", "1")
+    monkeypatch.setenv("QTRELOAD_HEADLESS", "1")
+    monkeypatch.setenv("QTRELOAD_WATCHER_BACKEND", "inotfy")
+    monkeypatch.setattr(install, "_reload_ref", None)
+
+    engine = install.install_hot_reload()
+    assert engine is not None
+    assert engine.watcher_backend == "qt"
+    assert "Invalid QTRELOAD_WATCHER_BACKEND 'inotfy'" in caplog.text
+    monkeypatch.setattr(install, "_reload_ref", None)
@@ -0,0 +1,216 @@
+import importlib.util
+import sys
+
+from qtreload.pydevd_reload import CodeCache, xreload
+
+
+def test_code_cache(tmp_path, monkeypatch):
+    """Test code objects are reused until the file changes and shared through the pyc file."""
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    path = tmp_path / "cached_module.py"
+    path.write_text("x = 1\n")
+
+    cache = CodeCache()
+    code = cache.get_code(str(path))
+    assert (cache.hits, cache.pyc_hits, cache.misses) == (0, 0, 1)
+    assert cache.get_code(str(path)) is code
+    assert cache.hits == 1
+    assert (tmp_path / "__pycache__").is_dir()
+
+    # a new cache reads the pyc file written by the previous one
+    other = CodeCache()
+    namespace = {}
+    exec(other.get_code(str(path)), namespace)
+    assert namespace["x"] == 1
+    assert other.pyc_hits == 1
+
+    path.write_text("x = 22\n")
+    namespace = {}
+    exec(cache.get_code(str(path)), namespace)
+    assert namespace["x"] == 22
+    assert cache.misses == 2
+    assert len(cache) == 1
+
+
+def test_code_cache_lru(tmp_path, monkeypatch):
+    """Test least recently used code objects are dropped and pyc files are not written if disabled."""
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    cache = CodeCache(maxsize=2)
+    for i in range(3):
+        (tmp_path / f"module_{i}.py").write_text(f"x = {i}\n")
+        cache.get_code(str(tmp_path / f"module_{i}.py"))
+    assert len(cache) == 2
+    assert not (tmp_path / "__pycache__").exists()
+
+
+def test_xreload_uses_code_cache(tmp_path, monkeypatch):
+    """Test xreload picks up changes to a module."""
+    path = tmp_path / "xreload_cached_module.py"
+    path.write_text("def func():\n    return 1\n")
+    spec = importlib.util.spec_from_file_location("xreload_cached_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    func = module.func
+
+    path.write_text("def func():\n    return 2\n")
+    assert xreload(module)
+    assert func() == 2
+
+
+def test_code_cache_same_size_change(tmp_path, monkeypatch):
+    """Test changes that keep the size (and possibly the mtime in seconds) of a file are not missed."""
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    path = tmp_path / "same_size_module.py"
+    path.write_text("x = 1\n")
+    CodeCache().get_code(str(path))
+
+    path.write_text("x = 2\n")
+    namespace = {}
+    exec(CodeCache().get_code(str(path)), namespace)
+    assert namespace["x"] == 2
+
+
+def test_code_objects_equal():
+    """Test fingerprints ignore line numbers but not changes to nested code objects."""
+    from qtreload.pydevd_reload import code_fingerprint, code_objects_equal
+
+    source = "def func(x):\n    def inner():\n        return x + 1\n    return inner\n"
+
+    def get_code(text):
+        return next(const for const in compile(text, "module.py", "exec").co_consts if hasattr(const, "co_code"))
+
+    code = get_code(source)
+    assert code_fingerprint(code) is code_fingerprint(code)
+    assert code_objects_equal(code, get_code("\n\n" + source))
+    assert not code_objects_equal(code, get_code(source.replace("x + 1", "x + 2")))
+    assert not code_objects_equal(code, get_code(source.replace("func(x)", "func(x, y=1)")))
+
+
+def test_reload_counts_functions(tmp_path):
+    """Test the number of compared and patched functions is reported."""
+    from qtreload.pydevd_reload import Reload
+
+    path = tmp_path / "counted_module.py"
+    path.write_text("def one():\n    return 1\n\n\nclass Two:\n    def two(self):\n        return 2\n")
+    spec = importlib.util.spec_from_file_location("counted_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    path.write_text("\n\ndef one():\n    return 1\n\n\nclass Two:\n    def two(self):\n        return 3\n")
+    reload = Reload(module)
+    reload.apply()
+    assert (reload.compared, reload.patched) == (2, 1)
+    assert module.Two().two() == 3
+
+
+def test_partial_reload(tmp_path):
+    """Test only changed function bodies are replaced, without executing the module again."""
+    from qtreload.pydevd_reload import Reload
+
+    path = tmp_path / "partial_module.py"
+    source = (
+        "with open(__file__ + '.log', 'a') as f:\n    f.write('1')\n\n\n"
+        "def func():\n    return 1\n\n\n"
+        "class Widget:\n"
+        "    @staticmethod\n    def method():\n        return 1\n"
+    )
+    path.write_text(source)
+    spec = importlib.util.spec_from_file_location("partial_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    log = tmp_path / "partial_module.py.log"
+
+    # the first reload executes the module to remember its source
+    reload = Reload(module, partial=True)
+    reload.apply()
+    assert not reload.partial_applied
+    assert log.read_text() == "11"
+
+    path.write_text(source.replace("return 1\n\n\n", "return 2\n\n\n").replace("        return 1", "        return 3"))
+    reload = Reload(module, partial=True)
+    reload.apply()
+    assert reload.partial_applied
+    assert (reload.patched, reload.found_change) == (2, True)
+    assert (module.func(), module.Widget.method()) == (2, 3)
+    assert log.read_text() == "11"
+
+    # lines added to a function move the functions after it
+    edited = source.replace("return 1\n\n\n", "x = 4\n    return x\n\n\n")
+    path.write_text(edited.replace("        return 1", "        return 5"))
+    reload = Reload(module, partial=True)
+    reload.apply()
+    assert reload.partial_applied
+    assert (module.func(), module.Widget.method()) == (4, 5)
+    assert log.read_text() == "11"
+
+    # changes outside of function bodies execute the module again
+    path.write_text(source.replace("write('1')", "write('2')"))
+    reload = Reload(module, partial=True)
+    reload.apply()
+    assert not reload.partial_applied
+    assert log.read_text() == "112"
+    assert module.func() == 1
+
+
+def test_reload_from_source(tmp_path):
+    """Test modules can be reloaded from contents that were read (and compiled) before."""
+    from qtreload.pydevd_reload import Reload, code_cache
+
+    path = tmp_path / "source_module.py"
+    path.write_text("def func():\n    return 1\n")
+    spec = importlib.util.spec_from_file_location("source_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    source = b"def func():\n    return 2\n"
+    code_cache.get_code(str(path), source)
+    hits = code_cache.hits
+    path.write_text("def func(:\n")
+    Reload(module).apply(source)
+    assert module.func() == 2
+    assert code_cache.hits == hits + 1
+
+
+def test_reload_report(tmp_path):
+    """Test reloads are described by a report with per-phase timings."""
+    path = tmp_path / "report_module.py"
+    path.write_text("VALUE = 1\n\n\nclass Widget:\n    def method(self):\n        return 1\n")
+    spec = importlib.util.spec_from_file_location("report_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    path.write_text("VALUE = '1'\nADDED = 2\n\n\nclass Widget:\n    def method(self):\n        return 2\n\n    x = 1\n")
+    report = xreload(module, report=True)
+    assert report.ok
+    assert set(report.timings) == {"read", "compile", "exec", "update", "callbacks"}
+    assert report.duration == sum(report.timings.values())
+    assert (report.functions_compared, report.functions_patched, report.classes_updated) == (1, 1, 1)
+    assert sorted(report.added) == ["ADDED", "Widget.x"]
+    assert report.skipped == ["VALUE"]
+    assert module.Widget().method() == 2
+
+    path.write_text("raise RuntimeError('broken')\n")
+    report = xreload(module, report=True)
+    assert not report.ok
+    assert isinstance(report.exception, RuntimeError)
+    assert "error=" in report.summary()
+
+
+def test_reload_update_immutables(tmp_path):
+    """Test immutable module-level values are only replaced if requested."""
+    path = tmp_path / "immutable_module.py"
+    path.write_text("VALUE = 1\nNAME = 'a'\nITEMS = [1]\n")
+    spec = importlib.util.spec_from_file_location("immutable_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    path.write_text("VALUE = 2\nNAME = 'a'\nITEMS = [2]\n")
+    report = xreload(module, report=True)
+    assert report.updated == []
+    assert module.VALUE == 1
+
+    report = xreload(module, report=True, update_immutables=True)
+    assert report.updated == ["VALUE"]
+    assert report.found_change
+    assert (module.VALUE, module.NAME, module.ITEMS) == (2, "a", [1])
+    assert "updated VALUE" in report.summary()
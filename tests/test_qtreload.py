@@ -1,6 +1,8 @@
 import os
 
-from qtreload.utilities import path_to_module
+import pytest
+from natsort import natsorted
+from qtreload.utilities import get_module_paths, path_to_module
 
 
 def test_widget(qtbot):
@@ -10,10 +12,11 @@ def test_widget(qtbot):
     widget = QtReloadWidget(["qtreload"])
     qtbot.addWidget(widget)
     assert widget is not None
-    assert len(widget.path_to_index_map) > 0, "Expected more than 1 path"
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert len(widget.engine.path_to_index_map) > 0, "Expected more than 1 path"
 
     # make sure we can retrieve each module properly
-    for path in widget.path_to_index_map.keys():
+    for path in widget.engine.path_to_index_map.keys():
         module = path_to_module(path, widget.get_module_path_for_path(path))
         assert module, "Module should not be empty"
 
@@ -31,20 +34,410 @@ def test_install_hot_reload(qtbot):
     widget = install_hot_reload(None)
     qtbot.addWidget(widget)
     assert widget is not None
-    assert len(widget.path_to_index_map) > 0, "Expected more than 1 path"
-    assert len(widget._module_paths) == 1, "Expected 2 modules"
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert len(widget.engine.path_to_index_map) > 0, "Expected more than 1 path"
+    assert len(widget.engine._module_paths) == 1, "Expected 2 modules"
 
     # make sure we can retrieve each module properly
-    for path in widget.path_to_index_map.keys():
+    for path in widget.engine.path_to_index_map.keys():
         module = path_to_module(path, widget.get_module_path_for_path(path))
         assert module, "Module should not be empty"
-        paths = widget._get_file_paths(module)
-        assert len(paths) > 0, "Expected more than 1 path"
+        py_paths, qss_paths = get_module_paths(module)
+        assert len(py_paths) + len(qss_paths) > 0, "Expected more than 1 path"
 
     os.environ["QTRELOAD_HOT_RELOAD_MODULES"] = "qtreload,qtreload,does_not_exist"
     widget = install_hot_reload(None)
     assert widget is not None
-    assert widget._modules == ["qtreload"]
+    assert widget.engine._modules == ["qtreload"]
 
     os.environ["QTRELOAD_HOT_RELOAD"] = "0"
     assert install_hot_reload(None) is None
+
+
+def test_widget_parallel_discovery(qtbot):
+    """Test files of multiple modules are discovered in the background and merged on the GUI thread."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    widget = QtReloadWidget(["qtreload", "natsort"])
+    qtbot.addWidget(widget)
+    assert widget.is_discovering
+    with qtbot.waitSignal(widget.evt_discovery_finished):
+        pass
+    assert set(widget.engine.path_to_index_map.values()) == {0, 1}
+    assert widget._files_model.rowCount() == len(widget.engine.path_to_index_map)
+    paths = widget._files_model.paths
+    assert paths == natsorted(paths)
+
+    # refreshing discards results of the previous discovery
+    widget.on_refresh_filelist()
+    widget.on_refresh_filelist()
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert widget._files_model.rowCount() == len(widget.engine.path_to_index_map)
+
+
+def test_widget_incremental_refresh(qtbot, tmp_path, monkeypatch):
+    """Test refresh only adds/removes paths that changed."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "incremental_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("")
+    (package / "two.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["incremental_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert sorted(widget.engine._watcher.files()) == [str(package / "one.py"), str(package / "two.py")]
+
+    (package / "three.py").write_text("")
+    (package / "two.py").unlink()
+    added, removed = [], []
+    monkeypatch.setattr(widget.engine._watcher, "addPaths", lambda paths: added.extend(paths))
+    monkeypatch.setattr(widget.engine._watcher, "removePaths", lambda paths: removed.extend(paths))
+    widget.on_refresh_filelist()
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert added == [str(package / "three.py")]
+    assert removed == [str(package / "two.py")]
+    assert sorted(widget.engine.path_to_index_map) == [str(package / "one.py"), str(package / "three.py")]
+    assert widget._files_model.paths == [
+        str(package / "one.py"),
+        str(package / "three.py"),
+    ]
+
+    # removing the module removes all of its paths
+    widget._modules_list.item(0).setSelected(True)
+    widget.on_remove_module()
+    assert widget.engine.path_to_index_map == {}
+    assert widget._files_model.rowCount() == 0
+
+
+def test_widget_directory_mode(qtbot, tmp_path, monkeypatch):
+    """Test directory watch mode picks up newly created modules."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "directory_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["directory_pkg"], watch_mode="directories")
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert widget.engine._watcher.directories() == [str(package)]
+
+    (package / "two.py").write_text("")
+    (package / "test_two.py").write_text("")
+    qtbot.waitUntil(lambda: str(package / "two.py") in widget.engine.path_to_index_map)
+    assert str(package / "test_two.py") not in widget.engine.path_to_index_map
+    assert widget._files_model.rowCount() == 2
+
+    (package / "two.py").unlink()
+    qtbot.waitUntil(lambda: str(package / "two.py") not in widget.engine.path_to_index_map)
+    assert widget._files_model.rowCount() == 1
+
+    # files written in place are reloaded too
+    with qtbot.waitSignal(widget.engine.reload_scheduler.evt_batch_finished) as blocker:
+        (package / "one.py").write_text("x = 1")
+    assert blocker.args[0] == 1
+
+
+def test_widget_invalid_watch_mode(qtbot):
+    """Test invalid watch mode."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    with pytest.raises(ValueError, match="Invalid watch mode"):
+        QtReloadWidget([], watch_mode="nope")
+    with pytest.raises(ValueError, match="Invalid watcher backend"):
+        QtReloadWidget([], watcher_backend="nope")
+
+
+def test_widget_path_to_module_map(qtbot, tmp_path, monkeypatch):
+    """Test module names are indexed during discovery and kept in sync."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "indexed_pkg"
+    (package / "sub").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("")
+    (package / "sub" / "__init__.py").write_text("")
+    (package / "sub" / "two.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["indexed_pkg.sub", "indexed_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert widget.get_module_name_for_path(str(package / "one.py")) == "indexed_pkg.one"
+    assert widget.get_module_name_for_path(str(package / "sub" / "two.py")) == "indexed_pkg.sub.two"
+
+    (package / "one.py").unlink()
+    widget.on_refresh_filelist()
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert str(package / "one.py") not in widget.engine.path_to_module_map
+
+    # paths shared by modules are re-assigned to the remaining module
+    widget._modules_list.item(1).setSelected(True)
+    widget.on_remove_module()
+    assert widget.engine.path_to_module_map[str(package / "sub" / "two.py")] == ("indexed_pkg.sub.two", package / "sub")
+
+
+def test_widget_namespace_package(qtbot, tmp_path, monkeypatch):
+    """Test namespace packages split across several directories are watched."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    roots = []
+    for i in range(3):
+        root = tmp_path / f"site{i}" / "widget_ns_pkg"
+        (root / f"plugin{i}").mkdir(parents=True)
+        (root / f"plugin{i}" / "core.py").write_text("")
+        monkeypatch.syspath_prepend(str(root.parent))
+        roots.append(root.resolve())
+
+    widget = QtReloadWidget(["widget_ns_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert len(widget.engine._module_paths) == 1
+    assert sorted(widget.engine._module_paths[0]) == sorted(roots)
+    assert set(widget.engine.path_to_index_map.values()) == {0}
+    for i, root in enumerate(roots):
+        path = str(root / f"plugin{i}" / "core.py")
+        assert widget.get_module_name_for_path(path) == f"widget_ns_pkg.plugin{i}.core"
+        assert widget.get_module_path_for_path(path) == root
+
+
+def test_widget_skip_unchanged(qtbot, tmp_path, monkeypatch):
+    """Test reloads of files whose contents did not change are skipped."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "unchanged_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("x = 1")
+    (package / "two.py").write_text("x = 2")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["unchanged_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert len(widget.engine.digest_cache) == 2
+
+    reloaded = []
+    monkeypatch.setattr(widget.engine, "_reload_py", lambda path, *args: reloaded.append(path))
+    (package / "one.py").write_text("x = 1")
+    widget.engine._reload_file(str(package / "one.py"))
+    assert reloaded == []
+    assert widget.engine.digest_cache.skipped == 1
+
+    (package / "two.py").write_text("x = 3")
+    with qtbot.waitSignal(widget.engine.evt_reload_finished) as blocker:
+        widget.on_reload_py_files()
+    assert blocker.args[0] == 2
+    assert reloaded == [str(package / "two.py")]
+    assert widget.engine.digest_cache.skipped == 2
+
+
+def test_widget_reload_path(qtbot, tmp_path, monkeypatch):
+    """Test double-clicking a file reloads it in the background and reports the time of the whole reload."""
+    import importlib
+
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "reload_path_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("def value():\n    return 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("reload_path_pkg.one")
+
+    widget = QtReloadWidget(["reload_path_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+
+    reports = []
+    widget.evt_pyfile.connect(lambda name, report: reports.append(report))
+    (package / "one.py").write_text("def value():\n    return 2\n")
+    index = widget._files_model.index(widget._files_model.paths.index(str(package / "one.py")))
+    with qtbot.waitSignal(widget.engine.evt_reload_finished) as blocker:
+        widget.on_double_click(index)
+        assert widget.engine.is_reloading
+    assert module.value() == 2
+    assert blocker.args[0] == 1
+    assert blocker.args[1] >= reports[0].duration > 0
+    assert widget.engine.last_reload_duration == blocker.args[1]
+
+
+def test_widget_refresh_digests_new_files(qtbot, tmp_path, monkeypatch):
+    """Test refresh only computes digests of files that were not watched yet."""
+    import qtreload.engine
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "refresh_digest_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("x = 1")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["refresh_digest_pkg"])
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    digest = widget.engine.digest_cache.get(str(package / "one.py"))
+    assert digest is not None
+
+    digested = []
+    file_digest = qtreload.engine.file_digest
+    monkeypatch.setattr(qtreload.engine, "file_digest", lambda path: digested.append(path) or file_digest(path))
+    (package / "two.py").write_text("x = 2")
+    widget.on_refresh_filelist()
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert digested == [str(package / "two.py")]
+    assert widget.engine.digest_cache.get(str(package / "one.py")) == digest
+    assert len(widget.engine.digest_cache) == 2
+
+
+def test_widget_reload_batch(qtbot, tmp_path, monkeypatch):
+    """Test files changed within the quiet window are all reloaded, in module order."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "batch_pkg"
+    (package / "sub").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("")
+    (package / "two.py").write_text("")
+    (package / "sub" / "__init__.py").write_text("")
+    (package / "sub" / "three.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    widget = QtReloadWidget(["batch_pkg"], reload_delay=50, skip_unchanged=False)
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+
+    reloaded = []
+    monkeypatch.setattr(widget.engine, "_reload_file", lambda path, *args: reloaded.append(path))
+    paths = [str(package / "two.py"), str(package / "sub" / "three.py"), str(package / "one.py")]
+    with qtbot.waitSignal(widget.engine.reload_scheduler.evt_batch_finished) as blocker:
+        for path in [*paths, paths[0]]:
+            widget.on_reload_file(path)
+        assert widget.engine.reload_scheduler.queue_depth == 3
+    assert blocker.args[0] == 3
+    qtbot.waitUntil(lambda: not widget.is_reloading)
+    assert reloaded == [str(package / "one.py"), str(package / "sub" / "three.py"), str(package / "two.py")]
+    assert widget.engine.reload_scheduler.queue_depth == 0
+
+
+def test_widget_reload_dependents(qtbot, tmp_path, monkeypatch):
+    """Test modules that import from a changed module see its new values after it was reloaded."""
+    import importlib
+
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "cascade_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("CONST = 1\n\n\ndef helper():\n    return 1\n")
+    (package / "b.py").write_text("from cascade_pkg.a import CONST, helper\n\n\ndef get():\n    return CONST\n")
+    (package / "c.py").write_text("from .b import CONST as VALUE\n")
+    (package / "d.py").write_text("import cascade_pkg.a\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    modules = {name: importlib.import_module(f"cascade_pkg.{name}") for name in ("a", "b", "c", "d")}
+
+    widget = QtReloadWidget(["cascade_pkg"], reload_dependents=True, partial_reload=True)
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+    assert len(widget.engine.import_graph) == 4
+
+    reports = {}
+    widget.evt_pyfile.connect(reports.__setitem__)
+    (package / "a.py").write_text("CONST = 2\n\n\ndef helper():\n    return 2\n")
+    widget.engine._reload_files([str(package / "a.py")])
+    qtbot.waitUntil(lambda: not widget.is_reloading)
+    assert sorted(reports) == ["cascade_pkg.a", "cascade_pkg.b", "cascade_pkg.c"]
+    assert reports["cascade_pkg.a"].updated == ["CONST"]
+    assert reports["cascade_pkg.a"].timings["read"] > 0
+    assert modules["a"].CONST == 2
+    assert (modules["b"].CONST, modules["b"].get(), modules["b"].helper()) == (2, 2, 2)
+    assert modules["c"].VALUE == 2
+    assert modules["d"].cascade_pkg.a.CONST == 2
+
+
+def test_widget_reload_syntax_error(qtbot, tmp_path, monkeypatch):
+    """Test changed files are compiled in the background and broken files never reach the GUI thread."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    package = tmp_path / "broken_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "one.py").write_text("x = 1\n")
+    (package / "two.py").write_text("x = 2\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    messages = []
+    widget = QtReloadWidget(["broken_pkg"], log_func=messages.append)
+    qtbot.addWidget(widget)
+    qtbot.waitUntil(lambda: not widget.is_discovering)
+
+    reloaded = []
+    monkeypatch.setattr(
+        widget.engine, "_reload_py", lambda path, digest, source, *args: reloaded.append((path, source))
+    )
+    (package / "one.py").write_text("x = (\n")
+    (package / "two.py").write_text("x = 3\n")
+    widget.engine._reload_files([str(package / "one.py"), str(package / "two.py")])
+    assert widget.is_reloading
+    qtbot.waitUntil(lambda: not widget.is_reloading)
+    assert reloaded == [(str(package / "two.py"), b"x = 3\n")]
+    assert any("SyntaxError" in record.message and "one.py" in record.message for record in messages)
+
+
+def test_widget_log(qtbot):
+    """Test log messages are displayed in batches and only the last ones are kept."""
+    from qtreload.qt_reload import QtReloadWidget
+
+    records = []
+    widget = QtReloadWidget([], log_func=records.append, log_capacity=10)
+    qtbot.addWidget(widget)
+    for i in range(25):
+        widget.log_message(f"message {i}")
+    assert widget.log_sink.buffer.pending == 10
+    assert widget._log_edit.toPlainText() == ""
+    qtbot.waitUntil(lambda: widget.log_sink.buffer.pending == 0)
+    lines = widget._log_edit.toPlainText().splitlines()
+    assert len(lines) == 10
+    assert lines[-1].endswith(" - message 24")
+    assert str(records[-1]) == lines[-1]
+
+
+def test_file_list_model(qtbot):
+    """Test file list stays naturally sorted and is filtered through its lowercase index."""
+    from qtreload.models import MERGE_THRESHOLD, FileFilterProxyModel, FileListModel
+
+    model = FileListModel()
+    proxy = FileFilterProxyModel()
+    proxy.setSourceModel(model)
+    model.add_paths(["/pkg/file10.py", "/pkg/File2.py"])
+    model.add_paths([f"/pkg/sub/module{i}.py" for i in range(MERGE_THRESHOLD + 1)])
+    model.add_paths(["/pkg/file1.py"])
+    paths = model.paths
+    assert paths == natsorted(paths)
+    assert paths[:3] == ["/pkg/File2.py", "/pkg/file1.py", "/pkg/file10.py"]
+
+    proxy.set_filter_text(" FILE ")
+    assert proxy.rowCount() == 3
+    model.add_paths(["/pkg/file3.py", "/pkg/other.py"])
+    assert proxy.rowCount() == 4
+    model.remove_paths(["/pkg/file1.py", *(f"/pkg/sub/module{i}.py" for i in range(MERGE_THRESHOLD + 1))])
+    assert proxy.rowCount() == 3
+    assert model.rowCount() == 4
+
+    # matches are indexed once per filter text, for the current paths of the model
+    proxy.set_filter_text("file1")
+    assert proxy.rowCount() == 1
+    assert proxy._index == {
+        "/pkg/file2.py": False,
+        "/pkg/file10.py": True,
+        "/pkg/file3.py": False,
+        "/pkg/other.py": False,
+    }
+    proxy.set_filter_text("")
+    assert proxy.rowCount() == 4
@@ -3,7 +3,14 @@ from pathlib import Path
 from unittest.mock import patch
 
 import pytest
-from qtreload.utilities import get_import_path, path_to_module, IS_WIN, get_module_paths
+from qtreload.utilities import (
+    IS_WIN,
+    get_import_path,
+    get_import_paths,
+    get_module_name,
+    get_module_paths,
+    path_to_module,
+)
 
 if IS_WIN:
     to_test = [
@@ -105,9 +112,324 @@ def test_get_import_path_namespace_package_multiple_locations():
     assert path is None
 
 
+def test_get_import_paths_namespace_package_multiple_locations():
+    """Test all roots of namespace packages are returned."""
+    spec = importlib.machinery.ModuleSpec("namespace_pkg", loader=None, is_package=True)
+    spec.origin = None
+    spec.submodule_search_locations = ["/tmp/one", "/tmp/two", "/tmp/one"]
+
+    with patch("qtreload.utilities.importlib.util.find_spec", return_value=spec):
+        paths = get_import_paths("namespace_pkg")
+
+    assert paths == [Path("/tmp/one"), Path("/tmp/two")]
+
+
+def _make_namespace_package(tmp_path: Path, monkeypatch, name: str, count: int) -> list[Path]:
+    roots = []
+    for i in range(count):
+        root = tmp_path / f"site{i}" / name
+        (root / f"plugin{i}").mkdir(parents=True)
+        (root / f"plugin{i}" / "__init__.py").write_text("")
+        (root / f"plugin{i}" / "core.py").write_text("")
+        monkeypatch.syspath_prepend(str(root.parent))
+        roots.append(root.resolve())
+    return roots
+
+
+def test_get_module_paths_namespace_package(tmp_path, monkeypatch):
+    """Test files are collected from every directory of a namespace package."""
+    from qtreload.utilities import get_module_roots
+
+    roots = _make_namespace_package(tmp_path, monkeypatch, "split_ns_pkg", 3)
+    assert sorted(get_module_roots("split_ns_pkg")) == sorted(roots)
+    assert get_import_path("split_ns_pkg") is None
+
+    py_paths, _ = get_module_paths("split_ns_pkg")
+    assert sorted(py_paths) == sorted(root / f"plugin{i}" / "core.py" for i, root in enumerate(roots))
+    assert (
+        get_module_name("split_ns_pkg", roots[2], str(roots[2] / "plugin2" / "core.py")) == "split_ns_pkg.plugin2.core"
+    )
+
+
 def test_path_to_module_keeps_src_in_package_name():
     """Test package names containing 'src' are preserved."""
     path = Path("/tmp/project/src_tools/helpers.py")
     module_path = Path("/tmp/project/src_tools")
 
     assert path_to_module(str(path), module_path) == "src_tools.helpers"
+
+
+@pytest.mark.parametrize(
+    "relative, expected",
+    [
+        ("helpers.py", "pkg.helpers"),
+        ("__init__.py", "pkg"),
+        ("sub/__init__.py", "pkg.sub"),
+        ("sub/core.py", "pkg.sub.core"),
+        ("style.qss", None),
+    ],
+)
+def test_get_module_name(tmp_path, relative, expected):
+    """Test module name is derived from path without touching the filesystem."""
+    module_path = tmp_path / "pkg"
+    assert get_module_name("pkg", module_path, str(module_path / relative)) == expected
+    assert get_module_name("pkg", module_path, str(tmp_path / "other" / relative)) is None
+    if expected and not relative.endswith("__init__.py"):
+        assert path_to_module(str(module_path / relative), module_path) == expected
+
+
+def test_get_module_package(tmp_path, monkeypatch):
+    """Test plain modules belong to their parent package, while packages are their own."""
+    from qtreload.utilities import get_module_package
+
+    package = tmp_path / "module_package_pkg"
+    (package / "sub").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "sub" / "__init__.py").write_text("")
+    (package / "mod.py").write_text("")
+    (tmp_path / "module_package_top.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert get_module_package("module_package_pkg") == "module_package_pkg"
+    assert get_module_package("module_package_pkg.sub") == "module_package_pkg.sub"
+    assert get_module_package("module_package_pkg.mod") == "module_package_pkg"
+    assert get_module_package("module_package_top") == ""
+    assert get_module_name("", tmp_path, str(tmp_path / "module_package_top.py")) == "module_package_top"
+
+
+def _make_tree(root: Path) -> None:
+    for relative_path in [
+        "pkg/__init__.py",
+        "pkg/core.py",
+        "pkg/test_core.py",
+        "pkg/style.qss",
+        "pkg/sub/__init__.py",
+        "pkg/sub/widgets.py",
+        "pkg/sub/theme.qss",
+        "pkg/sub/deep/a1.py",
+        "pkg/sub/deep/b2.py",
+        "pkg/.hidden/x.py",
+        "pkg/readme.txt",
+    ]:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+@pytest.mark.parametrize(
+    "py_pattern, ignore_py_pattern, stylesheet_pattern",
+    [
+        (("**/*.py",), ("**/__init__.py", "**/test_*.py"), ("**/*.qss",)),
+        (("*.py", "sub/*.py"), ("**/[ab]?.py",), ("sub/**/*.qss",)),
+        (("**/deep/*.py",), (), ()),
+    ],
+)
+def test_walk_module_paths_matches_glob(tmp_path, py_pattern, ignore_py_pattern, stylesheet_pattern):
+    """Test single-pass walker returns the same paths as the glob-based discovery."""
+    from qtreload.utilities import walk_module_paths
+
+    def _glob(patterns):
+        return {path for pattern in patterns for path in root.glob(pattern)}
+
+    _make_tree(tmp_path)
+    root = tmp_path / "pkg"
+    py_paths, qss_paths = walk_module_paths(root, py_pattern, ignore_py_pattern, stylesheet_pattern)
+
+    expected_py = _glob(py_pattern) - _glob(ignore_py_pattern)
+    expected_qss = _glob(stylesheet_pattern)
+    assert sorted(py_paths) == sorted(expected_py)
+    assert sorted(qss_paths) == sorted(expected_qss)
+
+
+def test_walk_module_paths_invalid_pattern(tmp_path):
+    """Test invalid patterns are reported and skipped."""
+    from qtreload.utilities import walk_module_paths
+
+    _make_tree(tmp_path)
+    messages = []
+    py_paths, _ = walk_module_paths(tmp_path / "pkg", ("", "*.py"), (), (), log_func=messages.append)
+    assert messages == ["Pattern '' is not valid."]
+    assert sorted(path.name for path in py_paths) == ["__init__.py", "core.py", "test_core.py"]
+
+
+def test_walk_module_paths_with_cache(tmp_path):
+    """Test cached listings are reused and only changed directories are rescanned."""
+    import os
+
+    from qtreload.cache import DiscoveryCache
+    from qtreload.utilities import walk_module_paths
+
+    _make_tree(tmp_path)
+    root = tmp_path / "pkg"
+    # make directories look old enough to be trusted
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, ns=(1_000_000_000, 1_000_000_000))
+    patterns = (("**/*.py",), ("**/__init__.py",), ("**/*.qss",))
+    cache_dir = tmp_path / "cache"
+
+    cache = DiscoveryCache.load(root, patterns, cache_dir)
+    expected = walk_module_paths(root, *patterns, cache=cache)
+    cache.save()
+    assert cache.misses == 4
+    assert cache.path.exists()
+
+    cache = DiscoveryCache.load(root, patterns, cache_dir)
+    assert sorted(walk_module_paths(root, *patterns, cache=cache)[0]) == sorted(expected[0])
+    assert (cache.hits, cache.misses) == (4, 0)
+
+    # adding a file changes the directory mtime
+    (root / "sub" / "new.py").write_text("")
+    cache = DiscoveryCache.load(root, patterns, cache_dir)
+    py_paths, _ = walk_module_paths(root, *patterns, cache=cache)
+    assert root / "sub" / "new.py" in py_paths
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    # different patterns invalidate the cache
+    cache = DiscoveryCache.load(root, (("*.py",), (), ()), cache_dir)
+    assert cache.directories == {}
+
+
+def test_get_module_paths_use_cache(tmp_path, monkeypatch):
+    """Test discovery with cache returns the same paths."""
+    monkeypatch.setenv("QTRELOAD_CACHE_DIR", str(tmp_path))
+    expected = get_module_paths("qtreload")
+    assert sorted(get_module_paths("qtreload", use_cache=True)[0]) == sorted(expected[0])
+    assert sorted(get_module_paths("qtreload", use_cache=True)[0]) == sorted(expected[0])
+    assert list(tmp_path.glob("discovery-*.json"))
+
+
+def test_walk_module_paths_prune(tmp_path):
+    """Test pruned directories and virtual environments are not walked."""
+    from qtreload.utilities import walk_module_paths
+
+    _make_tree(tmp_path)
+    root = tmp_path / "pkg"
+    for relative_path in ["__pycache__/core.py", "build/lib/core.py", "env/pyvenv.cfg", "env/lib/site.py"]:
+        (root / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative_path).write_text("")
+
+    py_paths, _ = walk_module_paths(root, ("**/*.py",), ())
+    relative = sorted(path.relative_to(root).as_posix() for path in py_paths)
+    assert "__pycache__/core.py" not in relative
+    assert "build/lib/core.py" not in relative
+    assert "env/lib/site.py" not in relative
+    assert "sub/deep/a1.py" in relative
+
+    py_paths, _ = walk_module_paths(root, ("**/*.py",), (), prune_pattern=("sub/deep",))
+    relative = sorted(path.relative_to(root).as_posix() for path in py_paths)
+    assert "build/lib/core.py" in relative
+    assert "sub/deep/a1.py" not in relative
+
+
+def test_walk_module_paths_prune_packages(tmp_path):
+    """Test subpackages named like build output directories are not pruned."""
+    from qtreload.utilities import walk_module_paths
+
+    root = tmp_path / "pkg"
+    for relative_path in ["build/__init__.py", "build/core.py", "dist/__init__.py", "sub/dist/core.py"]:
+        (root / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative_path).write_text("")
+
+    py_paths, _ = walk_module_paths(root, ("**/*.py",), ("**/__init__.py",))
+    relative = sorted(path.relative_to(root).as_posix() for path in py_paths)
+    assert relative == ["build/core.py"]
+
+
+def test_walk_module_paths_gitignore(tmp_path):
+    """Test .gitignore files below the module directory are honored."""
+    from qtreload.utilities import walk_module_paths
+
+    _make_tree(tmp_path)
+    root = tmp_path / "pkg"
+    (root / ".gitignore").write_text("# comment\n.hidden/\n*.qss\n!theme.qss\n/core.py\n")
+    (root / "sub" / ".gitignore").write_text("deep/b*.py\n")
+
+    py_paths, qss_paths = walk_module_paths(root, ("**/*.py",), (), ("**/*.qss",), use_gitignore=True)
+    relative = sorted(path.relative_to(root).as_posix() for path in py_paths)
+    assert relative == ["__init__.py", "sub/__init__.py", "sub/deep/a1.py", "sub/widgets.py", "test_core.py"]
+    assert [path.name for path in qss_paths] == ["theme.qss"]
+
+    py_paths, _ = walk_module_paths(root, ("**/*.py",), (), ("**/*.qss",), use_gitignore=False)
+    assert len(py_paths) == 8
+
+
+def test_get_import_path_does_not_import_parent(tmp_path, monkeypatch):
+    """Test resolving a dotted module does not execute the parent package."""
+    import sys
+
+    package = tmp_path / "side_effect_pkg"
+    (package / "sub").mkdir(parents=True)
+    (package / "__init__.py").write_text("raise RuntimeError('should not be imported')")
+    (package / "sub" / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert get_import_path("side_effect_pkg.sub") == package / "sub"
+    assert get_import_path("side_effect_pkg.missing") is None
+    assert "side_effect_pkg" not in sys.modules
+
+
+def test_get_module_root_memoized(tmp_path, monkeypatch):
+    """Test module roots are cached until sys.path changes."""
+    from qtreload.utilities import _get_spec, get_module_root
+
+    package = tmp_path / "memo_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with patch("qtreload.utilities._get_spec", wraps=_get_spec) as mock:
+        assert get_module_root("memo_pkg") == package.resolve()
+        assert get_module_root("memo_pkg") == package.resolve()
+        assert mock.call_count == 1
+
+        # missing modules are not cached
+        assert get_module_root("memo_pkg_missing") is None
+        (tmp_path / "memo_pkg_missing.py").write_text("")
+        assert get_module_root("memo_pkg_missing") == tmp_path.resolve()
+
+        monkeypatch.syspath_prepend(str(tmp_path / "other"))
+        assert get_module_root("memo_pkg") == package.resolve()
+        assert mock.call_count == 4
+
+
+def test_digest_cache(tmp_path):
+    """Test files are only considered changed if their contents differ."""
+    from qtreload.digest import DigestCache, file_digest
+
+    path = tmp_path / "one.py"
+    path.write_text("x = 1")
+    cache = DigestCache()
+    assert cache.check(str(path)) == (True, file_digest(str(path)))
+
+    cache.update({str(path): file_digest(str(path))})
+    assert str(path) in cache
+    path.write_text("x = 1")
+    assert cache.check(str(path))[0] is False
+    path.write_text("x = 2")
+    changed, digest = cache.check(str(path))
+    assert changed
+    cache.set(str(path), digest)
+    assert cache.check(str(path))[0] is False
+
+    # unreadable files are always considered changed
+    path.unlink()
+    assert cache.check(str(path)) == (True, None)
+    cache.discard(str(path))
+    assert len(cache) == 0
+
+
+def test_log_buffer():
+    """Test log buffer keeps the last records and hands out the ones that were not displayed yet."""
+    from qtreload.log import LogBuffer, LogRecord
+
+    buffer = LogBuffer(capacity=3)
+    for i in range(2):
+        buffer.append(LogRecord(f"message {i}", created=0))
+    assert [record.message for record in buffer.take_pending()] == ["message 0", "message 1"]
+    assert buffer.take_pending() == []
+
+    for i in range(2, 7):
+        buffer.append(LogRecord(f"message {i}", created=0))
+    assert (len(buffer), buffer.pending, buffer.dropped) == (3, 3, 4)
+    assert [record.message for record in buffer.take_pending()] == ["message 4", "message 5", "message 6"]
+    assert str(LogRecord("message", created=0)).endswith(" - message")
@@ -0,0 +1,240 @@
+import os
+import struct
+
+import pytest
+from qtreload import inotify
+from qtreload.watcher import DirectorySnapshot, DirectoryWatcher, PollingWatcher, create_watcher
+
+requires_inotify = pytest.mark.skipif(not inotify.is_available(), reason="inotify is not available")
+
+
+def _touch(path, content="", mtime=None):
+    path.write_text(content)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_directory_snapshot_diff(tmp_path):
+    """Test snapshot diffing reports modified, added and deleted files."""
+    _touch(tmp_path / "one.py", mtime=1_000_000_000)
+    _touch(tmp_path / "two.py", mtime=1_000_000_000)
+    _touch(tmp_path / "notes.txt")
+
+    snapshot = DirectorySnapshot(accept=lambda path: path.endswith(".py"))
+    assert snapshot.track(str(tmp_path / "one.py")) == str(tmp_path)
+    assert snapshot.track(str(tmp_path / "two.py")) is None
+
+    _touch(tmp_path / "one.py", "x = 1", mtime=2_000_000_000)
+    (tmp_path / "two.py").unlink()
+    _touch(tmp_path / "three.py")
+    _touch(tmp_path / "other.txt")
+    (tmp_path / "sub").mkdir()
+
+    modified, added, deleted, directories = snapshot.diff(str(tmp_path))
+    assert modified == [str(tmp_path / "one.py")]
+    assert added == [str(tmp_path / "three.py")]
+    assert deleted == [str(tmp_path / "two.py")]
+    assert directories == [str(tmp_path / "sub")]
+    assert sorted(snapshot.files()) == [str(tmp_path / "one.py"), str(tmp_path / "three.py")]
+
+    # nothing changed since
+    assert snapshot.diff(str(tmp_path)) == ([], [], [], [])
+
+
+def test_directory_watcher(qtbot, tmp_path):
+    """Test only directories are registered and file-level events are emitted."""
+    package = tmp_path / "pkg"
+    package.mkdir()
+    _touch(package / "one.py")
+    _touch(package / "two.py")
+
+    watcher = DirectoryWatcher(accept=lambda path: path.endswith(".py"))
+    watcher.addPaths([str(package / "one.py"), str(package / "two.py")])
+    assert watcher.directories() == [str(package)]
+    assert sorted(watcher.files()) == [str(package / "one.py"), str(package / "two.py")]
+
+    with qtbot.waitSignal(watcher.fileAdded) as blocker:
+        _touch(package / "three.py")
+    assert blocker.args == [str(package / "three.py")]
+
+    with qtbot.waitSignal(watcher.fileRemoved) as blocker:
+        (package / "two.py").unlink()
+    assert blocker.args == [str(package / "two.py")]
+
+    # atomic save (write temporary file and rename it over the original)
+    with qtbot.waitSignal(watcher.fileChanged) as blocker:
+        _touch(package / ".one.py.tmp", "x = 1")
+        os.replace(package / ".one.py.tmp", package / "one.py")
+    assert blocker.args == [str(package / "one.py")]
+
+    # files in new sub-directories are picked up as well
+    with qtbot.waitSignal(watcher.fileAdded) as blocker:
+        (package / "sub").mkdir()
+        _touch(package / "sub" / "four.py")
+    assert blocker.args == [str(package / "sub" / "four.py")]
+
+    watcher.removePaths(watcher.directories())
+    assert watcher.directories() == []
+
+
+def test_directory_watcher_in_place_write(qtbot, tmp_path):
+    """Test files written in place are reported with the default backend."""
+    _touch(tmp_path / "one.py", mtime=1_000_000_000)
+    watcher = DirectoryWatcher()
+    assert watcher.backend in ("inotify", "polling")
+    watcher.addPaths([str(tmp_path / "one.py")])
+    # the polling backend takes its baseline snapshot in the background
+    qtbot.wait(200)
+
+    with qtbot.waitSignal(watcher.fileChanged) as blocker:
+        (tmp_path / "one.py").write_text("x = 1")
+    assert blocker.args == [str(tmp_path / "one.py")]
+
+
+def test_create_watcher_invalid_backend():
+    """Test unknown backends are rejected."""
+    with pytest.raises(ValueError, match="Invalid watcher backend"):
+        create_watcher("nope")
+
+
+def test_inotify_parse_events():
+    """Test raw inotify events are parsed, with names stripped of padding."""
+    data = struct.pack("iIII", 1, inotify.IN_MODIFY, 0, 8) + b"one.py\0\0"
+    data += struct.pack("iIII", 2, inotify.IN_DELETE_SELF, 0, 0)
+    assert inotify.parse_events(data) == [(1, inotify.IN_MODIFY, "one.py"), (2, inotify.IN_DELETE_SELF, "")]
+
+
+@requires_inotify
+def test_inotify_watcher(qtbot, tmp_path):
+    """Test in-place writes and atomic saves are reported, once per batch."""
+    _touch(tmp_path / "one.py")
+    _touch(tmp_path / "other.py")
+    (tmp_path / "sub").mkdir()
+
+    watcher = create_watcher("inotify")
+    assert isinstance(watcher, inotify.InotifyWatcher)
+    assert watcher.addPaths([str(tmp_path / "one.py"), str(tmp_path / "sub"), str(tmp_path / "missing.py")]) == [
+        str(tmp_path / "missing.py")
+    ]
+    assert watcher.files() == [str(tmp_path / "one.py")]
+    assert watcher.directories() == [str(tmp_path / "sub")]
+
+    changed = []
+    watcher.fileChanged.connect(changed.append)
+    with qtbot.waitSignal(watcher.fileChanged):
+        for i in range(5):
+            with open(tmp_path / "one.py", "a") as f:
+                f.write(f"x = {i}\n")
+        _touch(tmp_path / "other.py", "y = 1")
+    assert changed == [str(tmp_path / "one.py")]
+
+    # file keeps being watched after atomic save
+    for _ in range(2):
+        with qtbot.waitSignal(watcher.fileChanged) as blocker:
+            _touch(tmp_path / ".one.py.tmp", "x = 1")
+            os.replace(tmp_path / ".one.py.tmp", tmp_path / "one.py")
+        assert blocker.args == [str(tmp_path / "one.py")]
+
+    with qtbot.waitSignal(watcher.directoryChanged) as blocker:
+        _touch(tmp_path / "sub" / "new.py")
+    assert blocker.args == [str(tmp_path / "sub")]
+
+    assert watcher.removePaths([str(tmp_path / "one.py"), str(tmp_path / "sub")]) == []
+    assert watcher.files() == watcher.directories() == []
+    watcher.close()
+
+
+@requires_inotify
+def test_directory_watcher_inotify_in_place_write(qtbot, tmp_path):
+    """Test the inotify backend reports in-place writes in directory mode."""
+    _touch(tmp_path / "one.py", mtime=1_000_000_000)
+    watcher = DirectoryWatcher(backend="inotify")
+    watcher.addPaths([str(tmp_path / "one.py")])
+
+    with qtbot.waitSignal(watcher.fileChanged) as blocker:
+        (tmp_path / "one.py").write_text("x = 1")
+    assert blocker.args == [str(tmp_path / "one.py")]
+
+
+def test_poller_batches(tmp_path):
+    """Test the poller scans at most `max_entries` entries per tick and reports changes after the baseline."""
+    from qtreload.watcher import _Poller, _PollingState
+
+    paths = []
+    for i in range(4):
+        (tmp_path / f"dir{i}").mkdir()
+        _touch(tmp_path / f"dir{i}" / "one.py")
+        _touch(tmp_path / f"dir{i}" / "two.py")
+        paths.append(str(tmp_path / f"dir{i}" / "one.py"))
+
+    state = _PollingState(0.1, 1.0, max_entries=5)
+    state.update(set(paths), {str(tmp_path / "dir3")})
+    poller = _Poller(state)
+    poller.refresh()
+    # each directory has 3 entries (itself and two files), so two directories are scanned per tick
+    assert poller.tick() == ([], [], None)
+    files, directories, cycle = poller.tick()
+    assert (files, directories) == ([], [])
+    assert cycle[1] == 12
+
+    _touch(tmp_path / "dir1" / "one.py", "x = 1")
+    _touch(tmp_path / "dir2" / "two.py", "x = 1")
+    _touch(tmp_path / "dir3" / "three.py")
+    assert poller.tick() == ([str(tmp_path / "dir1" / "one.py")], [], None)
+    files, directories, cycle = poller.tick()
+    assert (files, directories) == ([], [str(tmp_path / "dir3")])
+    assert cycle is not None
+
+
+def test_polling_watcher(qtbot, tmp_path):
+    """Test the polling backend reports in-place writes and cycle durations."""
+    _touch(tmp_path / "one.py")
+    watcher = create_watcher("polling")
+    assert isinstance(watcher, PollingWatcher)
+    assert watcher.addPaths([str(tmp_path / "one.py"), str(tmp_path / "missing.py")]) == [str(tmp_path / "missing.py")]
+    assert watcher.files() == [str(tmp_path / "one.py")]
+
+    with qtbot.waitSignal(watcher.cycleFinished) as blocker:
+        pass
+    duration, entries = blocker.args
+    assert duration >= 0
+    assert entries == 2
+
+    with qtbot.waitSignal(watcher.fileChanged) as blocker:
+        (tmp_path / "one.py").write_text("x = 1")
+    assert blocker.args == [str(tmp_path / "one.py")]
+
+    assert watcher.removePaths([str(tmp_path / "one.py")]) == []
+    assert watcher.files() == []
+    watcher.close()
+
+
+def test_qt_watcher_atomic_save(qtbot, tmp_path):
+    """Test the qt backend keeps watching files that are replaced by atomic saves."""
+    from qtreload.watcher import QtFileWatcher
+
+    _touch(tmp_path / "one.py")
+    watcher = create_watcher("qt")
+    assert isinstance(watcher, QtFileWatcher)
+    watcher.addPaths([str(tmp_path / "one.py")])
+
+    with qtbot.waitSignal(watcher.fileRewatched) as blocker:
+        _touch(tmp_path / "one.py.tmp", "x = 1")
+        os.replace(tmp_path / "one.py.tmp", tmp_path / "one.py")
+    assert blocker.args == [str(tmp_path / "one.py")]
+    assert watcher.files() == [str(tmp_path / "one.py")]
+
+    with qtbot.waitSignal(watcher.fileChanged) as blocker:
+        _touch(tmp_path / "one.py", "x = 2")
+    assert blocker.args == [str(tmp_path / "one.py")]
+
+    # files that are missing for a moment are watched again once they are back
+    with qtbot.waitSignal(watcher.fileRewatched):
+        (tmp_path / "one.py").unlink()
+        qtbot.wait(30)
+        _touch(tmp_path / "one.py", "x = 3")
+    assert watcher.files() == [str(tmp_path / "one.py")]
+    assert watcher.rewatched == 2
+
+    assert watcher.removePaths([str(tmp_path / "one.py")]) == []
+    assert watcher.files() == []